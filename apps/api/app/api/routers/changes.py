@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db, require_roles
+from app.core.utils import decode_cursor, encode_cursor
+from app.repositories.target_changes import list_changes
+from app.schemas.changes import ChangePage
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+
+@router.get("", response_model=ChangePage)
+def list_(
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None, description="next_cursor da consulta anterior"),
+    target_id: int | None = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_roles("admin", "analyst")),
+) -> ChangePage:
+    """
+    Relevant report changes of the tenant, in commit order. An entry shows up once every
+    transaction that started before it has finished, so polling with next_cursor sees each
+    entry exactly once; a long-running transaction in the database delays new entries.
+    """
+    after = (0, 0)
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+            # Cursors from before the feed was commit-ordered only carry after_id; their entries have txid 0
+            after = (int(values.get("after_txid", 0)), int(values["after_id"]))
+        except (ValueError, KeyError, TypeError) as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+    items = list_changes(db, current_user.tenant_id, after=after, limit=limit, target_id=target_id)
+    if items:
+        after = (items[-1].txid, items[-1].id)
+    return ChangePage(items=items, next_cursor=encode_cursor({"after_txid": after[0], "after_id": after[1]}))
@@ -1,13 +1,29 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 
 from app.core.deps import require_roles
+from app.services.job_events import stream_events
 from app.services.job_queue import get_job_state
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
 
+@router.get("/stream")
+async def stream(
+    request: Request,
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+    current_user=Depends(require_roles("admin", "analyst")),
+) -> StreamingResponse:
+    """Job state changes and batch progress for the caller's tenant, as Server-Sent Events."""
+    return StreamingResponse(
+        stream_events(current_user.tenant_id, last_event_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{job_id}")
 def get_job(job_id: str, current_user=Depends(require_roles("admin", "analyst"))) -> dict:
     state = get_job_state(job_id)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.deps import get_db, require_roles
+from app.repositories.monitors import delete_monitor, get_monitor, list_monitors, set_tenant_paused
+from app.repositories.targets import get_target
+from app.schemas.monitors import MonitorOut, MonitorUpsert
+from app.services.audit_service import log_event
+from app.services.monitor_service import upsert_monitor
+
+router = APIRouter(tags=["monitors"])
+
+
+@router.put("/targets/{target_id}/monitor", response_model=MonitorOut)
+def put_monitor(
+    target_id: int,
+    payload: MonitorUpsert,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_roles("admin", "analyst")),
+) -> MonitorOut:
+    target = get_target(db, current_user.tenant_id, target_id)
+    if not target:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target not found")
+    monitor = upsert_monitor(db, current_user.tenant_id, target.id, payload.interval_seconds, payload.paused)
+    log_event(
+        db,
+        current_user.tenant_id,
+        current_user.id,
+        "monitor_upsert",
+        {"target_id": target.id, "interval_seconds": monitor.interval_seconds, "paused": monitor.paused},
+    )
+    return monitor
+
+
+@router.get("/targets/{target_id}/monitor", response_model=MonitorOut)
+def get_one(
+    target_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_roles("admin", "analyst")),
+) -> MonitorOut:
+    monitor = get_monitor(db, current_user.tenant_id, target_id)
+    if not monitor:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Monitor not found")
+    return monitor
+
+
+@router.delete("/targets/{target_id}/monitor", status_code=status.HTTP_204_NO_CONTENT)
+def delete(
+    target_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_roles("admin", "analyst")),
+) -> Response:
+    monitor = get_monitor(db, current_user.tenant_id, target_id)
+    if not monitor:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Monitor not found")
+    delete_monitor(db, monitor)
+    log_event(db, current_user.tenant_id, current_user.id, "monitor_delete", {"target_id": target_id})
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/monitors", response_model=list[MonitorOut])
+def list_all(
+    db: Session = Depends(get_db),
+    current_user=Depends(require_roles("admin", "analyst")),
+) -> list[MonitorOut]:
+    return list_monitors(db, current_user.tenant_id)
+
+
+@router.post("/monitors:pause")
+def pause_all(
+    db: Session = Depends(get_db),
+    current_user=Depends(require_roles("admin")),
+) -> dict:
+    updated = set_tenant_paused(db, current_user.tenant_id, True, settings.monitor_jitter)
+    log_event(db, current_user.tenant_id, current_user.id, "monitors_pause", {"updated": updated})
+    return {"status": "paused", "updated": updated}
+
+
+@router.post("/monitors:resume")
+def resume_all(
+    db: Session = Depends(get_db),
+    current_user=Depends(require_roles("admin")),
+) -> dict:
+    updated = set_tenant_paused(db, current_user.tenant_id, False, settings.monitor_jitter)
+    log_event(db, current_user.tenant_id, current_user.id, "monitors_resume", {"updated": updated})
+    return {"status": "resumed", "updated": updated}
@@ -1,22 +1,29 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_db, require_roles
-from app.repositories.reports import get_latest_report
+from app.core.deps import get_async_db, require_roles_async
+from app.repositories.reports import get_latest_report_async
 from app.schemas.reports import ReportOut
+from app.services.payload_store import load_document_async
 
 router = APIRouter(prefix="/targets", tags=["reports"])
 
 
 @router.get("/{target_id}/report/latest", response_model=ReportOut)
-def latest_report(
+async def latest_report(
     target_id: int,
-    db: Session = Depends(get_db),
-    current_user=Depends(require_roles("admin", "analyst")),
+    include_details: bool = Query(default=False, description="Incluir o documento bruto do provedor em summary_json.details"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(require_roles_async("admin", "analyst")),
 ) -> ReportOut:
-    report = get_latest_report(db, current_user.tenant_id, target_id)
+    report = await get_latest_report_async(db, current_user.tenant_id, target_id)
     if not report:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
-    return report
+    out = ReportOut.model_validate(report)
+    # Details are only fetched (and decompressed) when asked for; older reports still carry them inline
+    if include_details and report.details_blob_id:
+        details = await load_document_async(db, report.details_blob_id)
+        out.summary_json = {**report.summary_json, "details": details or {}}
+    return out
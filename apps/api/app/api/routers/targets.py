@@ -1,60 +1,161 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_db, require_roles
-from app.repositories.targets import create_target, get_target, list_targets
-from app.schemas.targets import TargetCreate, TargetOut
-from app.services.check_service import run_cnpj_check
-from app.services.job_queue import enqueue_check_job
+from app.core.deps import get_async_db, get_db, request_deadline, require_roles, require_roles_async
+from app.core.utils import decode_cursor, encode_cursor
+from app.repositories.targets import create_target_async, get_target_async, get_targets_by_ids, list_targets_async
+from app.schemas.targets import BatchCheckRequest, TargetCreate, TargetOut, TargetPage
+from app.services.check_service import run_cnpj_check_async, run_cnpj_checks_batch
+from app.services.job_queue import enqueue_check_job, enqueue_check_jobs, get_job_state
+from app.services.target_import import detect_format, start_import
 from app.core.config import settings
-from app.services.audit_service import log_event
+from app.services.audit_service import log_event, log_event_async
 
 router = APIRouter(prefix="/targets", tags=["targets"])
 
 
 @router.post("", response_model=TargetOut, status_code=status.HTTP_201_CREATED)
-def create(
+async def create(
     payload: TargetCreate,
-    db: Session = Depends(get_db),
-    current_user=Depends(require_roles("admin", "analyst")),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(require_roles_async("admin", "analyst")),
 ) -> TargetOut:
-    target = create_target(
+    target = await create_target_async(
         db,
         tenant_id=current_user.tenant_id,
         document=payload.document,
         name_hint=payload.name_hint,
         target_type=payload.type,
     )
-    log_event(db, current_user.tenant_id, current_user.id, "target_create", {"target_id": target.id})
+    await log_event_async(db, current_user.tenant_id, current_user.id, "target_create", {"target_id": target.id})
     return target
 
 
-@router.get("", response_model=list[TargetOut])
-def list_all(
+@router.get("", response_model=TargetPage)
+async def list_all(
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = Query(default=None, description="next_cursor da página anterior"),
+    document_prefix: str | None = Query(default=None, pattern=r"^\d{1,14}$"),
+    type: str | None = Query(default=None, max_length=50),
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    report_status: str | None = Query(default=None, max_length=50, description="Status do relatório mais recente"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(require_roles_async("admin", "analyst")),
+) -> TargetPage:
+    before_id = None
+    if cursor:
+        try:
+            before_id = int(decode_cursor(cursor)["before_id"])
+        except (ValueError, KeyError, TypeError) as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+    items, next_before_id = await list_targets_async(
+        db,
+        tenant_id=current_user.tenant_id,
+        limit=limit,
+        before_id=before_id,
+        document_prefix=document_prefix,
+        target_type=type,
+        created_from=created_from,
+        created_to=created_to,
+        report_status=report_status,
+    )
+    next_cursor = encode_cursor({"before_id": next_before_id}) if next_before_id is not None else None
+    return TargetPage(items=items, next_cursor=next_cursor)
+
+
+@router.post(":import", status_code=status.HTTP_202_ACCEPTED)
+def import_targets(
+    file: UploadFile = File(description="CSV (colunas document,name_hint,type) ou NDJSON com os mesmos campos"),
+    format: str | None = Query(default=None, pattern="^(csv|ndjson)$", description="Padrão: pela extensão do arquivo"),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_roles("admin", "analyst")),
+) -> dict:
+    fmt = format or detect_format(file.filename, file.content_type)
+    try:
+        job_id, rows = start_import(db, current_user.tenant_id, current_user.id, file.file, fmt)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    # Progress: GET /jobs/{job_id} or `import` events on GET /jobs/stream
+    return {"status": "queued", "job_id": job_id, "rows": rows}
+
+
+@router.post("/checks:batch")
+def run_check_batch(
+    payload: BatchCheckRequest,
+    async_mode: bool = Query(default=False, description="Enfileirar os checks como jobs de baixa prioridade"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=128),
+    deadline: float = Depends(request_deadline),
     db: Session = Depends(get_db),
     current_user=Depends(require_roles("admin", "analyst")),
-) -> list[TargetOut]:
-    return list_targets(db, tenant_id=current_user.tenant_id)
+) -> dict:
+    target_ids = list(dict.fromkeys(payload.target_ids))
+    targets = {target.id: target for target in get_targets_by_ids(db, current_user.tenant_id, target_ids)}
+    found = [targets[target_id] for target_id in target_ids if target_id in targets]
+
+    if async_mode and settings.async_checks_enabled:
+        # Bulk class: the worker schedules it fairly against other tenants' interactive checks
+        batch_id, job_ids = enqueue_check_jobs(
+            current_user.tenant_id,
+            [(target.id, target.document) for target in found],
+            idempotency_key=idempotency_key,
+        )
+        jobs = dict(zip((target.id for target in found), job_ids))
+        log_event(db, current_user.tenant_id, current_user.id, "check_batch_enqueue", {"target_ids": target_ids})
+        return {
+            "status": "queued",
+            "batch_id": batch_id,
+            "jobs": [
+                {"target_id": target_id, "job_id": jobs[target_id]}
+                if target_id in jobs
+                else {"target_id": target_id, "status": "error", "error": "Target not found"}
+                for target_id in payload.target_ids
+            ],
+        }
+
+    by_id = {
+        item["target_id"]: item
+        for item in run_cnpj_checks_batch(
+            db, current_user.tenant_id, found, deadline=deadline, audit_user_id=current_user.id
+        )
+    }
+    results = [
+        by_id.get(target_id, {"target_id": target_id, "status": "error", "error": "Target not found"})
+        for target_id in payload.target_ids
+    ]
+    return {"status": "ok", "results": results}
 
 
 @router.post("/{target_id}/check")
-def run_check(
+async def run_check(
     target_id: int,
     async_mode: bool = Query(default=False, description="Executar check de forma assíncrona"),
-    db: Session = Depends(get_db),
-    current_user=Depends(require_roles("admin", "analyst")),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=128),
+    deadline: float = Depends(request_deadline),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(require_roles_async("admin", "analyst")),
 ) -> dict:
-    target = get_target(db, current_user.tenant_id, target_id)
+    target = await get_target_async(db, current_user.tenant_id, target_id)
     if not target:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target not found")
 
     if async_mode and settings.async_checks_enabled:
-        job_id = enqueue_check_job(current_user.tenant_id, target.id, target.document)
-        log_event(db, current_user.tenant_id, current_user.id, "check_enqueue", {"target_id": target.id})
-        return {"status": "queued", "job_id": job_id}
+        # The queue client is synchronous; keep its round-trips off the event loop
+        job_id = await run_in_threadpool(
+            enqueue_check_job, current_user.tenant_id, target.id, target.document, idempotency_key=idempotency_key
+        )
+        await log_event_async(db, current_user.tenant_id, current_user.id, "check_enqueue", {"target_id": target.id})
+        # A deduplicated enqueue answers with the existing job, which may be running or already done
+        state = await run_in_threadpool(get_job_state, job_id) or {"status": "queued"}
+        return {"status": state["status"], "job_id": job_id}
 
-    summary = run_cnpj_check(db, current_user.tenant_id, target.id, target.document)
-    log_event(db, current_user.tenant_id, current_user.id, "check_run", {"target_id": target.id, "status": summary.get("status")})
+    summary = await run_cnpj_check_async(
+        db, current_user.tenant_id, target.id, target.document, deadline=deadline, audit_user_id=current_user.id
+    )
     return {"status": "ok", "summary": summary}
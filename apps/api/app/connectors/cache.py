@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import redis.asyncio as aioredis
+import structlog
+from redis.exceptions import RedisError
+
+from app.connectors import codec
+from app.core.config import settings
+from app.core.metrics import record_cnpj_cache
+
+logger = structlog.get_logger()
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    payload: dict | None  # None marks a negative entry (CNPJ unknown to the providers)
+    fresh_until: float
+    expires_at: float
+
+    @property
+    def not_found(self) -> bool:
+        return self.payload is None
+
+    def is_stale(self, now: float) -> bool:
+        return now >= self.fresh_until
+
+
+class LocalCache:
+    """Size-bounded LRU with per-entry expiry. Only touched from the connector loop, so no locking."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def get(self, key: str, now: float) -> CacheEntry | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if now >= entry.expires_at:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_local = LocalCache(settings.cnpj_local_cache_size)
+
+
+def cache_key(cnpj: str) -> str:
+    return f"cnpj:{cnpj}"
+
+
+def make_entry(payload: dict, now: float | None = None) -> CacheEntry:
+    """Jitter the fresh TTL so entries written together do not all expire together."""
+    now = time.time() if now is None else now
+    jitter = settings.cnpj_cache_ttl_jitter
+    ttl = settings.cnpj_cache_ttl_seconds * random.uniform(1 - jitter, 1 + jitter)
+    fresh_until = now + ttl
+    return CacheEntry(payload, fresh_until, fresh_until + settings.cnpj_cache_stale_seconds)
+
+
+def _encode(entry: CacheEntry) -> bytes:
+    return codec.encode({"payload": entry.payload, "fresh_until": entry.fresh_until})
+
+
+def _decode(raw: bytes, ttl: int, now: float) -> CacheEntry:
+    data = codec.decode(raw)
+    if "fresh_until" not in data:
+        # Entradas antigas (payload puro): tratar como frescas até o TTL do Redis
+        return CacheEntry(data, now + ttl, now + ttl)
+    return CacheEntry(data["payload"], data["fresh_until"], now + ttl)
+
+
+def _local_entry(entry: CacheEntry, now: float) -> CacheEntry:
+    # The local tier never outlives its own TTL, so replicas converge on Redis refreshes
+    expires_at = min(entry.expires_at, now + settings.cnpj_local_cache_ttl_seconds)
+    return CacheEntry(entry.payload, min(entry.fresh_until, expires_at), expires_at)
+
+
+async def _read_redis(redis_client: aioredis.Redis, cnpjs: list[str], now: float) -> dict[str, CacheEntry | None]:
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for cnpj in cnpjs:
+            pipe.get(cache_key(cnpj))
+            pipe.ttl(cache_key(cnpj))
+        values = await pipe.execute()
+    except RedisError as exc:
+        logger.warning("cnpj_cache_get_failed", count=len(cnpjs), error=str(exc))
+        return {}
+
+    entries: dict[str, CacheEntry | None] = {}
+    for index, cnpj in enumerate(cnpjs):
+        raw, ttl = values[2 * index], values[2 * index + 1]
+        try:
+            entry = _decode(raw, max(int(ttl or 0), 1), now) if raw else None
+        except ValueError as exc:
+            # Written by a newer format or corrupted; treat as a miss and let the fetch overwrite it
+            logger.warning("cnpj_cache_decode_failed", cnpj=cnpj, error=str(exc))
+            entry = None
+        if entry is not None:
+            _local.set(cnpj, _local_entry(entry, now))
+        entries[cnpj] = entry
+    return entries
+
+
+async def get_many(redis_client: aioredis.Redis | None, cnpjs: list[str]) -> dict[str, CacheEntry]:
+    """Resolve entries from the local tier first, then one Redis round-trip for the rest."""
+    now = time.time()
+    found: dict[str, CacheEntry] = {}
+    remote: list[str] = []
+    for cnpj in cnpjs:
+        entry = _local.get(cnpj, now)
+        if entry is None:
+            record_cnpj_cache("local", "miss")
+            remote.append(cnpj)
+            continue
+        record_cnpj_cache("local", "stale" if entry.is_stale(now) else "hit")
+        found[cnpj] = entry
+
+    if not remote or not redis_client:
+        return found
+
+    for cnpj, entry in (await _read_redis(redis_client, remote, now)).items():
+        if entry is None:
+            record_cnpj_cache("redis", "miss")
+            continue
+        record_cnpj_cache("redis", "stale" if entry.is_stale(now) else "hit")
+        found[cnpj] = entry
+    return found
+
+
+async def peek_many(redis_client: aioredis.Redis, cnpjs: list[str]) -> dict[str, CacheEntry]:
+    """Redis-only lookup without tier metrics, used while waiting on another process's fetch."""
+    entries = await _read_redis(redis_client, cnpjs, time.time())
+    return {cnpj: entry for cnpj, entry in entries.items() if entry is not None}
+
+
+async def _write(redis_client: aioredis.Redis | None, entries: dict[str, CacheEntry], now: float) -> None:
+    for cnpj, entry in entries.items():
+        _local.set(cnpj, _local_entry(entry, now))
+    record_cnpj_cache("local", "write", len(entries))
+
+    if not redis_client:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for cnpj, entry in entries.items():
+            pipe.setex(cache_key(cnpj), max(int(entry.expires_at - now), 1), _encode(entry))
+        await pipe.execute()
+        record_cnpj_cache("redis", "write", len(entries))
+    except RedisError as exc:
+        logger.warning("cnpj_cache_set_failed", count=len(entries), error=str(exc))
+
+
+async def set_many(redis_client: aioredis.Redis | None, payloads: list[dict]) -> None:
+    """Write payloads to both tiers; the Redis side is a single pipelined round-trip."""
+    if not payloads:
+        return
+    now = time.time()
+    await _write(redis_client, {payload["cnpj"]: make_entry(payload, now) for payload in payloads}, now)
+
+
+async def set_not_found(redis_client: aioredis.Redis | None, cnpjs: list[str]) -> None:
+    """Negative-cache CNPJs the providers reported as unknown, for a short fixed TTL and no stale window."""
+    if not cnpjs:
+        return
+    now = time.time()
+    expires_at = now + settings.cnpj_negative_cache_ttl_seconds
+    await _write(redis_client, {cnpj: CacheEntry(None, expires_at, expires_at) for cnpj in cnpjs}, now)
+    record_cnpj_cache("negative", "write", len(cnpjs))
+
+
+def clear_local() -> None:
+    _local.clear()
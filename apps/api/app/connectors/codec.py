@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Callable
+
+import structlog
+
+from app.core.config import settings
+
+try:  # optional: smaller and faster than JSON for the nested provider payloads
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+try:  # optional: better ratio/speed than zlib on multi-KB payloads
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+logger = structlog.get_logger()
+
+# Wire format for cached values: [version][codec][compression] + body.
+# Entries written before the header existed are bare JSON text and always start
+# with "{", which can never collide with a version byte.
+FORMAT_VERSION = 1
+
+CODECS = {"json": 1, "msgpack": 2}
+COMPRESSIONS = {"none": 0, "zlib": 1, "zstd": 2}
+
+_warned: set[str] = set()
+
+
+def _dumps_json(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _serializers() -> dict[int, tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    serializers = {CODECS["json"]: (_dumps_json, json.loads)}
+    if msgpack is not None:
+        serializers[CODECS["msgpack"]] = (
+            lambda value: msgpack.packb(value, use_bin_type=True),
+            lambda body: msgpack.unpackb(body, raw=False),
+        )
+    return serializers
+
+
+def _compressors() -> dict[int, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    compressors = {
+        COMPRESSIONS["none"]: (bytes, bytes),
+        COMPRESSIONS["zlib"]: (lambda body: zlib.compress(body, 6), zlib.decompress),
+    }
+    if zstandard is not None:
+        compressors[COMPRESSIONS["zstd"]] = (
+            lambda body: zstandard.ZstdCompressor(level=3).compress(body),
+            lambda body: zstandard.ZstdDecompressor().decompress(body),
+        )
+    return compressors
+
+
+_SERIALIZERS = _serializers()
+_COMPRESSORS = _compressors()
+
+
+def _resolve(name: str, table: dict[str, int], available: dict, default: str, kind: str) -> int:
+    ident = table.get(name)
+    if ident is None or ident not in available:
+        if name not in _warned:
+            _warned.add(name)
+            logger.warning("cnpj_cache_codec_unavailable", kind=kind, requested=name, using=default)
+        return table[default]
+    return ident
+
+
+def encode(value: Any, codec: str | None = None, compression: str | None = None) -> bytes:
+    """Serialize with the configured codec; compress only bodies above the size threshold."""
+    codec_id = _resolve(codec or settings.cnpj_cache_codec, CODECS, _SERIALIZERS, "json", "codec")
+    body = _SERIALIZERS[codec_id][0](value)
+    compression_id = COMPRESSIONS["none"]
+    if len(body) >= settings.cnpj_cache_compress_min_bytes:
+        compression_id = _resolve(
+            compression or settings.cnpj_cache_compression, COMPRESSIONS, _COMPRESSORS, "zlib", "compression"
+        )
+        if compression_id != COMPRESSIONS["none"]:
+            body = _COMPRESSORS[compression_id][0](body)
+    return bytes((FORMAT_VERSION, codec_id, compression_id)) + body
+
+
+def decode(raw: bytes | str) -> Any:
+    """
+    Inverse of encode; also accepts legacy bare-JSON values. Raises ValueError on unknown
+    formats and on corrupt bodies, so callers can treat both as a miss.
+    """
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    if raw[:1] == b"{":
+        return json.loads(raw)
+    if len(raw) < 3 or raw[0] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported cache format version: {raw[:1]!r}")
+    codec_id, compression_id = raw[1], raw[2]
+    if codec_id not in _SERIALIZERS or compression_id not in _COMPRESSORS:
+        raise ValueError(f"Unsupported cache codec/compression: {codec_id}/{compression_id}")
+    try:
+        return _SERIALIZERS[codec_id][1](_COMPRESSORS[compression_id][1](raw[3:]))
+    except Exception as exc:
+        # zlib.error, zstandard.ZstdError and msgpack errors share no base class
+        raise ValueError(f"Corrupt cache value: {exc}") from exc
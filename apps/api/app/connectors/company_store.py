@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import structlog
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.repositories.companies import get_companies, upsert_companies
+
+logger = structlog.get_logger()
+
+# Sources that are either local already or not real data; never persisted here
+_SKIP_SOURCES = {"mock", "offline"}
+
+
+def load_many(cnpjs: list[str]) -> dict[str, dict]:
+    """Payloads fetched within CNPJ_COMPANY_TTL_SECONDS; older rows count as misses."""
+    if not cnpjs:
+        return {}
+    fetched_after = datetime.now(timezone.utc) - timedelta(seconds=settings.cnpj_company_ttl_seconds)
+    db = SessionLocal()
+    try:
+        return {company.cnpj: company.payload_json for company in get_companies(db, cnpjs, fetched_after)}
+    except SQLAlchemyError as exc:
+        logger.warning("cnpj_company_store_read_failed", count=len(cnpjs), error=str(exc))
+        return {}
+    finally:
+        db.close()
+
+
+def save_many(payloads: list[dict]) -> None:
+    now = datetime.now(timezone.utc)
+    rows = {
+        payload["cnpj"]: {
+            "cnpj": payload["cnpj"],
+            "payload_json": payload,
+            "source": payload.get("source", "unknown"),
+            "fetched_at": now,
+        }
+        for payload in payloads
+        if payload.get("source") not in _SKIP_SOURCES
+    }
+    if not rows:
+        return
+    db = SessionLocal()
+    try:
+        upsert_companies(db, list(rows.values()))
+    except SQLAlchemyError as exc:
+        db.rollback()
+        logger.warning("cnpj_company_store_write_failed", count=len(rows), error=str(exc))
+    finally:
+        db.close()
+
+
+# Blocking DB I/O stays off the connector loop
+async def load_many_async(cnpjs: list[str]) -> dict[str, dict]:
+    return await asyncio.to_thread(load_many, cnpjs)
+
+
+async def save_many_async(payloads: list[dict]) -> None:
+    await asyncio.to_thread(save_many, payloads)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Coroutine, TypeVar
+
+import httpx
+import redis.asyncio as aioredis
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+# All connector I/O runs on one dedicated event loop so the shared AsyncClients
+# (and their connection pools) are never touched from a foreign loop.
+_loop: asyncio.AbstractEventLoop | None = None
+_clients: dict[str, httpx.AsyncClient] = {}
+_redis: aioredis.Redis | None = None
+_semaphores: dict[str, asyncio.Semaphore] = {}
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.cnpj_http_max_connections,
+        max_keepalive_connections=settings.cnpj_http_max_keepalive,
+        keepalive_expiry=settings.cnpj_http_keepalive_seconds,
+    )
+
+
+def _http2_available() -> bool:
+    if not settings.cnpj_http2_enabled:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:  # pragma: no cover - optional extra
+        logger.warning("cnpj_http2_unavailable", detail="h2 not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is not None and not _loop.is_closed():
+        return _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="connector-loop", daemon=True)
+            thread.start()
+            _loop = loop
+    return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a connector coroutine from synchronous code and block for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+async def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Await a connector coroutine from any event loop; cancellation propagates to the connector loop."""
+    loop = get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def get_client(provider: str, headers: dict[str, str], timeout: httpx.Timeout) -> httpx.AsyncClient:
+    """Return the process-wide keep-alive client for a provider. Must be called on the connector loop."""
+    client = _clients.get(provider)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            headers=headers,
+            follow_redirects=True,
+            http2=_http2_available(),
+            limits=_limits(),
+        )
+        _clients[provider] = client
+        logger.info("cnpj_http_client_created", provider=provider)
+    return client
+
+
+def get_redis() -> aioredis.Redis:
+    """
+    Process-wide asyncio Redis client for connector state (cache, leases, breakers, rate
+    limits). Must be used on the connector loop: a slow Redis then only delays the lookups
+    waiting on it instead of blocking the loop.
+    """
+    global _redis
+    if _redis is None:
+        # Raw bytes: cached values are binary-encoded (see connectors.codec)
+        _redis = aioredis.Redis.from_url(
+            settings.redis_url,
+            socket_timeout=settings.cnpj_redis_timeout_seconds,
+            socket_connect_timeout=settings.cnpj_redis_timeout_seconds,
+        )
+    return _redis
+
+
+def get_semaphore(provider: str) -> asyncio.Semaphore:
+    """Per-provider in-flight request cap shared by every caller on the connector loop."""
+    semaphore = _semaphores.get(provider)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.cnpj_provider_max_concurrency)
+        _semaphores[provider] = semaphore
+    return semaphore
+
+
+async def _aclose_clients() -> None:
+    global _redis
+    clients = list(_clients.items())
+    _clients.clear()
+    _semaphores.clear()
+    redis_client, _redis = _redis, None
+    if redis_client is not None:
+        try:
+            await redis_client.aclose()
+        except Exception as exc:  # pragma: no cover - best effort on shutdown
+            logger.warning("cnpj_redis_close_failed", error=str(exc))
+    for provider, client in clients:
+        try:
+            await client.aclose()
+        except Exception as exc:  # pragma: no cover - best effort on shutdown
+            logger.warning("cnpj_http_client_close_failed", provider=provider, error=str(exc))
+
+
+def close_clients() -> None:
+    global _loop
+    with _lock:
+        loop, _loop = _loop, None
+    if loop is None or loop.is_closed():
+        return
+    asyncio.run_coroutine_threadsafe(_aclose_clients(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def pool_stats() -> dict[str, dict[str, int]]:
+    """Connections open/idle and requests waiting per provider pool (httpcore internals, best effort)."""
+    stats: dict[str, dict[str, int]] = {}
+    for provider, client in list(_clients.items()):
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        requests = list(getattr(pool, "_requests", []) or [])
+        stats[provider] = {
+            "open": len(connections),
+            "idle": sum(1 for conn in connections if conn.is_idle()),
+            "waiting": sum(1 for req in requests if req.is_queued()),
+        }
+    return stats
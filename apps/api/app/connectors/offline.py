@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db.session import SessionLocal
+from app.domain.models import CnpjRegistryEntry
+from app.repositories.cnpj_registry import get_registry_entries
+
+logger = structlog.get_logger()
+
+# Local copy of the Receita open-data dump (see services.registry_import); consulted
+# before any network provider and never rate-limited.
+NAME = "offline"
+
+
+def _normalize(entry: CnpjRegistryEntry) -> dict:
+    return {
+        "cnpj": entry.cnpj,
+        "razao_social": entry.razao_social,
+        "situacao": entry.situacao,
+        "abertura": entry.abertura.isoformat() if entry.abertura else None,
+        "consulta_em": datetime.now(timezone.utc).isoformat(),
+        "source": NAME,
+        "full_data": {
+            "nome_fantasia": entry.nome_fantasia,
+            "natureza_juridica": entry.natureza_juridica,
+            "porte": entry.porte,
+            "capital_social": str(entry.capital_social) if entry.capital_social is not None else None,
+            "data_situacao": entry.data_situacao.isoformat() if entry.data_situacao else None,
+            "cnae_principal": entry.cnae_principal,
+            "uf": entry.uf,
+            "municipio": entry.municipio,
+            "cep": entry.cep,
+            "release": entry.release,
+        },
+    }
+
+
+def lookup_many(cnpjs: list[str]) -> dict[str, dict]:
+    """One primary-key query for the whole batch; failures degrade to 'not in the registry'."""
+    if not cnpjs:
+        return {}
+    db = SessionLocal()
+    try:
+        return {entry.cnpj: _normalize(entry) for entry in get_registry_entries(db, cnpjs)}
+    except SQLAlchemyError as exc:
+        logger.warning("cnpj_offline_lookup_failed", count=len(cnpjs), error=str(exc))
+        return {}
+    finally:
+        db.close()
+
+
+async def lookup_many_async(cnpjs: list[str]) -> dict[str, dict]:
+    # Blocking DB I/O stays off the connector loop
+    return await asyncio.to_thread(lookup_many, cnpjs)
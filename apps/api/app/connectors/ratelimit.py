@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+
+import redis.asyncio as aioredis
+import structlog
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import record_provider_rate_limit
+
+logger = structlog.get_logger()
+
+# Token bucket refilled continuously at rate tokens/ms; Redis TIME keeps every replica on one clock.
+# Returns {allowed, ms until the next token}.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  wait = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate) + 1000)
+return {allowed, wait}
+"""
+
+
+class ProviderRateLimited(Exception):
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} rate limit reached")
+        self.provider = provider
+
+
+_scripts: dict[int, object] = {}
+# Fallback buckets when Redis is unavailable: provider -> (tokens, last refill monotonic seconds)
+_local_buckets: dict[str, tuple[float, float]] = {}
+
+
+async def _take_redis(
+    redis_client: aioredis.Redis, provider: str, capacity: int, per_seconds: float
+) -> tuple[bool, float]:
+    script = _scripts.get(id(redis_client))
+    if script is None or script.registered_client is not redis_client:
+        script = redis_client.register_script(_TAKE_SCRIPT)
+        _scripts[id(redis_client)] = script
+    allowed, wait_ms = await script(keys=[f"cnpj:ratelimit:{provider}"], args=[capacity, capacity / (per_seconds * 1000)])
+    return bool(allowed), int(wait_ms) / 1000
+
+
+def _take_local(provider: str, capacity: int, per_seconds: float) -> tuple[bool, float]:
+    rate = capacity / per_seconds
+    now = time.monotonic()
+    tokens, last = _local_buckets.get(provider, (float(capacity), now))
+    tokens = min(capacity, tokens + (now - last) * rate)
+    if tokens >= 1:
+        _local_buckets[provider] = (tokens - 1, now)
+        return True, 0.0
+    _local_buckets[provider] = (tokens, now)
+    return False, math.ceil((1 - tokens) / rate * 1000) / 1000
+
+
+async def _take(
+    redis_client: aioredis.Redis | None, provider: str, capacity: int, per_seconds: float
+) -> tuple[bool, float]:
+    if redis_client:
+        try:
+            return await _take_redis(redis_client, provider, capacity, per_seconds)
+        except RedisError as exc:
+            logger.warning("cnpj_rate_limit_redis_failed", provider=provider, error=str(exc))
+    return _take_local(provider, capacity, per_seconds)
+
+
+async def acquire(redis_client: aioredis.Redis | None, provider: str, wait: float) -> None:
+    """
+    Take one token from the provider's shared bucket. Waits up to `wait` seconds
+    for a refill (0 = skip right away) and raises ProviderRateLimited otherwise.
+    Providers without a configured limit pass straight through.
+    """
+    limit = settings.cnpj_provider_rate_limit_map().get(provider)
+    if limit is None:
+        return
+    capacity, per_seconds = limit
+    deadline = time.monotonic() + wait
+    waited = False
+    while True:
+        allowed, retry_in = await _take(redis_client, provider, capacity, per_seconds)
+        if allowed:
+            record_provider_rate_limit(provider, "waited" if waited else "acquired")
+            return
+        if time.monotonic() + retry_in > deadline:
+            record_provider_rate_limit(provider, "skipped")
+            logger.info("cnpj_rate_limited", provider=provider, retry_in=retry_in)
+            raise ProviderRateLimited(provider)
+        waited = True
+        await asyncio.sleep(retry_in)
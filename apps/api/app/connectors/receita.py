@@ -1,33 +1,45 @@
 from __future__ import annotations
 
+import asyncio
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import Callable
 import httpx
+import redis.asyncio as aioredis
 import structlog
-import redis
-from redis.exceptions import RedisError
-import json
 
+from app.connectors import cache, company_store, http, offline, ratelimit, routing, singleflight
+from app.connectors.http import get_client, get_semaphore, run_async, run_sync
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, remaining
+from app.core.metrics import record_cnpj_cache, record_cnpj_coalesce, record_cnpj_provider_fetch
 from app.core.utils import normalize_cnpj
 
 logger = structlog.get_logger()
 RETRY_STATUSES = {500, 502, 503, 504}
 MAX_ATTEMPTS = 3
-CACHE_TTL_SECONDS = settings.cnpj_cache_ttl_seconds
 
-_redis_client: redis.Redis | None = None
+# Background stale-while-revalidate refreshes, one per CNPJ (connector loop only)
+_refreshing: dict[str, asyncio.Task] = {}
+_inflight = singleflight.Group()
+_router = routing.ProviderRouter()
 
 
-def _get_redis() -> redis.Redis | None:
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
+def _get_redis() -> aioredis.Redis | None:
+    # Connector loop only: the asyncio client is bound to it
     try:
-        _redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+        return http.get_redis()
     except Exception as exc:  # pragma: no cover - fallback if redis down
         logger.warning("cnpj_cache_disabled", error=str(exc))
-        _redis_client = None
-    return _redis_client
+        return None
+
+
+class CnpjNotFound(Exception):
+    def __init__(self, cnpj: str, source: str = "cache"):
+        super().__init__(f"CNPJ {cnpj} não encontrado")
+        self.cnpj = cnpj
+        self.source = source
 
 
 def _mock_response(cnpj: str) -> dict:
@@ -41,168 +53,525 @@ def _mock_response(cnpj: str) -> dict:
     }
 
 
-def fetch_cnpj(cnpj: str, use_mock: bool = False) -> dict:
-    cnpj_clean = normalize_cnpj(cnpj)
+def _normalize_publica(cnpj: str, data: dict) -> dict:
+    return {
+        "cnpj": cnpj,
+        "razao_social": data.get("razao_social"),
+        "situacao": data.get("estabelecimento", {}).get("situacao_cadastral"),
+        "abertura": data.get("estabelecimento", {}).get("data_inicio_atividade"),
+        "consulta_em": datetime.now(timezone.utc).isoformat(),
+        "source": "publica.cnpj.ws",
+        "full_data": data,
+    }
 
-    redis_client = _get_redis()
-    cache_key = f"cnpj:{cnpj_clean}"
-    if redis_client:
-        try:
-            cached = redis_client.get(cache_key)
-        except RedisError as exc:
-            logger.warning("cnpj_cache_get_failed", cnpj=cnpj_clean, error=str(exc))
-            cached = None
-
-        if cached:
-            logger.info("cnpj_fetch_cache_hit", cnpj=cnpj_clean)
-            try:
-                redis_client.incr("metrics:cnpj_cache_hit")
-            except RedisError:
-                pass
-            return json.loads(cached)
 
-    if use_mock:
-        logger.info("cnpj_fetch_mock", cnpj=cnpj_clean)
-        return _mock_response(cnpj_clean)
+def _normalize_brasilapi(cnpj: str, data: dict) -> dict:
+    return {
+        "cnpj": cnpj,
+        "razao_social": data.get("razao_social"),
+        "situacao": data.get("descricao_situacao_cadastral"),
+        "abertura": data.get("data_inicio_atividade"),
+        "consulta_em": datetime.now(timezone.utc).isoformat(),
+        "source": "brasilapi",
+        "full_data": data,
+    }
 
-    # First attempt: publica.cnpj.ws
-    try:
-        url = f"https://publica.cnpj.ws/cnpj/{cnpj_clean}"
-        headers = {
+
+def _normalize_receitaws(cnpj: str, data: dict) -> dict:
+    # receitaws answers 200 with {"status": "ERROR", "message": ...} for unknown/rejected CNPJs
+    if data.get("status") == "ERROR":
+        raise CnpjNotFound(cnpj, "receitaws")
+    return {
+        "cnpj": cnpj,
+        "razao_social": data.get("nome"),
+        "situacao": data.get("situacao"),
+        "abertura": data.get("abertura"),
+        "consulta_em": datetime.now(timezone.utc).isoformat(),
+        "source": "receitaws",
+        "full_data": data,
+    }
+
+
+@dataclass(frozen=True)
+class Provider:
+    name: str
+    url: str
+    headers: dict[str, str]
+    timeout: httpx.Timeout
+    normalize: Callable[[str, dict], dict]
+    metric: str
+
+
+@dataclass(frozen=True)
+class FetchOptions:
+    """Per-call knobs threaded from the public entry points down to each provider attempt."""
+
+    token_wait: float = 0.0
+    # Absolute time.monotonic() budget for the whole lookup; None = provider timeouts only
+    deadline: float | None = None
+
+
+# Ordem de fallback: publica.cnpj.ws -> BrasilAPI -> receitaws (lenta, limitada)
+PROVIDERS: tuple[Provider, ...] = (
+    Provider(
+        name="publica.cnpj.ws",
+        url="https://publica.cnpj.ws/cnpj/{cnpj}",
+        headers={
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "application/json",
-        }
+        },
         # Shorten timeout for primary to fail faster to fallback
-        timeout = httpx.Timeout(15.0, connect=5.0)
+        timeout=httpx.Timeout(15.0, connect=5.0),
+        normalize=_normalize_publica,
+        metric="publica",
+    ),
+    Provider(
+        name="brasilapi",
+        url="https://brasilapi.com.br/api/cnpj/v1/{cnpj}",
+        headers={"User-Agent": "VeriGov/1.0", "Accept": "application/json"},
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        normalize=_normalize_brasilapi,
+        metric="brasilapi",
+    ),
+    Provider(
+        name="receitaws",
+        url="https://www.receitaws.com.br/v1/cnpj/{cnpj}",
+        headers={"User-Agent": "VeriGov/1.0", "Accept": "application/json"},
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        normalize=_normalize_receitaws,
+        metric="receitaws",
+    ),
+)
 
-        logger.info("cnpj_fetch_primary_start", source="publica.cnpj.ws", cnpj=cnpj_clean)
-        
-        with httpx.Client(timeout=timeout, headers=headers, follow_redirects=True, http2=False) as client:
-            resp = client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            payload = {
-                "cnpj": cnpj_clean,
-                "razao_social": data.get("razao_social"),
-                "situacao": data.get("estabelecimento", {}).get("situacao_cadastral"),
-                "abertura": data.get("estabelecimento", {}).get("data_inicio_atividade"),
-                "consulta_em": datetime.now(timezone.utc).isoformat(),
-                "source": "publica.cnpj.ws",
-                "full_data": data,
-            }
-            
-            if redis_client:
-                try:
-                    redis_client.setex(cache_key, CACHE_TTL_SECONDS, json.dumps(payload))
-                    redis_client.incr("metrics:cnpj_cache_write")
-                    redis_client.incr("metrics:cnpj_fetch_success_publica")
-                except RedisError as exc:
-                    logger.warning("cnpj_cache_set_failed", cnpj=cnpj_clean, error=str(exc))
-            return payload
-
-    except Exception as primary_exc:
-        logger.warning(
-            "cnpj_fetch_primary_failed",
-            cnpj=cnpj_clean,
-            error=str(primary_exc),
-            detail="Falling back to BrasilAPI"
-        )
 
-    # Second attempt: BrasilAPI
-    try:
-        url = f"https://brasilapi.com.br/api/cnpj/v1/{cnpj_clean}"
-        headers = {
-             "User-Agent": "VeriGov/1.0",
-             "Accept": "application/json",
-        }
-        timeout = httpx.Timeout(30.0, connect=10.0)
-        
-        logger.info("cnpj_fetch_fallback_start", source="brasilapi", cnpj=cnpj_clean)
-
-        with httpx.Client(timeout=timeout, headers=headers, follow_redirects=True) as client:
-            resp = client.get(url)
+def _attempt_timeout(provider: Provider, deadline: float | None) -> httpx.Timeout:
+    """The provider's own timeout, shrunk to the remaining request budget."""
+    left = remaining(deadline)
+    if left is None:
+        return provider.timeout
+    if left < settings.cnpj_min_attempt_seconds:
+        raise DeadlineExceeded(f"Not enough time left to query {provider.name}")
+    return httpx.Timeout(min(provider.timeout.read, left), connect=min(provider.timeout.connect, left))
+
+
+async def _fetch_from_provider(
+    provider: Provider, cnpj: str, primary: bool, redis_client: aioredis.Redis | None, opts: FetchOptions
+) -> dict:
+    logger.info(
+        "cnpj_fetch_primary_start" if primary else "cnpj_fetch_fallback_start",
+        source=provider.name,
+        cnpj=cnpj,
+    )
+    _attempt_timeout(provider, opts.deadline)  # fail fast before spending a rate-limit token
+    left = remaining(opts.deadline)
+    # Raises ProviderRateLimited so the hedged loop moves on to the next provider
+    await ratelimit.acquire(redis_client, provider.name, wait=opts.token_wait if left is None else min(opts.token_wait, left))
+    client = get_client(provider.name, headers=provider.headers, timeout=provider.timeout)
+    async with get_semaphore(provider.name):
+        timeout = _attempt_timeout(provider, opts.deadline)
+        start = time.monotonic()
+        try:
+            resp = await client.get(provider.url.format(cnpj=cnpj), timeout=timeout)
             resp.raise_for_status()
-            data = resp.json()
-            
-            payload = {
-                "cnpj": cnpj_clean,
-                "razao_social": data.get("razao_social"),
-                "situacao": data.get("descricao_situacao_cadastral"),
-                "abertura": data.get("data_inicio_atividade"),
-                "consulta_em": datetime.now(timezone.utc).isoformat(),
-                "source": "brasilapi",
-                "full_data": data,
-            }
-            
-            if redis_client:
-                try:
-                    redis_client.setex(cache_key, CACHE_TTL_SECONDS, json.dumps(payload))
-                    redis_client.incr("metrics:cnpj_cache_write")
-                    redis_client.incr("metrics:cnpj_fetch_success_brasilapi")
-                except RedisError as exc:
-                    logger.warning("cnpj_cache_set_failed", cnpj=cnpj_clean, error=str(exc))
-            return payload
-
-    except Exception as fallback_exc:
-        logger.warning(
-            "cnpj_fetch_fallback_failed",
-            cnpj=cnpj_clean,
-            error=str(fallback_exc),
-            detail="Falling back to receitaws"
-        )
+        except httpx.TimeoutException:
+            # Only blame the provider when its own timeout fired, not a shrunken request budget
+            if timeout.read >= provider.timeout.read:
+                await _router.record(redis_client, provider.name, False, time.monotonic() - start)
+            raise
+        except httpx.HTTPStatusError as exc:
+            # A 4xx other than 429 is an answer (e.g. unknown CNPJ), not an unhealthy provider
+            code = exc.response.status_code
+            await _router.record(redis_client, provider.name, code < 500 and code != 429, time.monotonic() - start)
+            if code == 404:
+                raise CnpjNotFound(cnpj, provider.name) from exc
+            raise
+        except Exception:
+            await _router.record(redis_client, provider.name, False, time.monotonic() - start)
+            raise
+        await _router.record(redis_client, provider.name, True, time.monotonic() - start)
+    return provider.normalize(cnpj, resp.json())
+
+
+async def _fetch_hedged(cnpj: str, opts: FetchOptions) -> tuple[Provider, dict]:
+    """
+    Walk the providers in router order (healthiest first, open breakers
+    skipped), but fire the next one in parallel when the in-flight attempts
+    have not answered within the hedge delay (or one fails). The first good
+    payload wins and the remaining attempts are cancelled.
+    """
+    redis_client = _get_redis()
+    providers = await _router.order(redis_client, PROVIDERS)
+    if not providers:
+        logger.warning("cnpj_router_all_open", cnpj=cnpj)
+        raise RuntimeError("All CNPJ providers unavailable (circuit open)")
+
+    hedge_delay = settings.cnpj_hedge_delay_seconds
+    pending: dict[asyncio.Task, int] = {}
+    next_index = 0
+    last_exc: Exception | None = None
+    not_found: CnpjNotFound | None = None
+    rate_limited: ratelimit.ProviderRateLimited | None = None
+
+    def _launch() -> None:
+        nonlocal next_index
+        provider = providers[next_index]
+        task = asyncio.create_task(_fetch_from_provider(provider, cnpj, next_index == 0, redis_client, opts))
+        pending[task] = next_index
+        next_index += 1
 
-    # Third attempt: receitaws (lenta, limitada)
+    _launch()
     try:
-        url = f"https://www.receitaws.com.br/v1/cnpj/{cnpj_clean}"
-        headers = {
-             "User-Agent": "VeriGov/1.0",
-             "Accept": "application/json",
-        }
-        timeout = httpx.Timeout(30.0, connect=10.0)
-        logger.info("cnpj_fetch_fallback_start", source="receitaws", cnpj=cnpj_clean)
-
-        with httpx.Client(timeout=timeout, headers=headers, follow_redirects=True) as client:
-            resp = client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-
-            payload = {
-                "cnpj": cnpj_clean,
-                "razao_social": data.get("nome"),
-                "situacao": data.get("situacao"),
-                "abertura": data.get("abertura"),
-                "consulta_em": datetime.now(timezone.utc).isoformat(),
-                "source": "receitaws",
-                "full_data": data,
-            }
-
-            if redis_client:
-                try:
-                    redis_client.setex(cache_key, CACHE_TTL_SECONDS, json.dumps(payload))
-                    redis_client.incr("metrics:cnpj_cache_write")
-                    redis_client.incr("metrics:cnpj_fetch_success_receitaws")
-                except RedisError as exc:
-                    logger.warning("cnpj_cache_set_failed", cnpj=cnpj_clean, error=str(exc))
-            return payload
+        while pending:
+            can_hedge = hedge_delay > 0 and next_index < len(providers)
+            wait_for = hedge_delay if can_hedge else None
+            left = remaining(opts.deadline)
+            if left is not None:
+                wait_for = left if wait_for is None else min(wait_for, left)
+            done, _ = await asyncio.wait(pending.keys(), timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if remaining(opts.deadline) == 0:
+                    raise DeadlineExceeded("Deadline exceeded while waiting on CNPJ providers")
+                # Without a provider left to hedge with, the wait only timed out a hair early
+                if can_hedge:
+                    logger.info("cnpj_fetch_hedge", cnpj=cnpj, source=providers[next_index].name)
+                    _launch()
+                continue
+
+            for task in sorted(done, key=pending.__getitem__):
+                index = pending.pop(task)
+                exc = task.exception()
+                if exc is None:
+                    return providers[index], task.result()
+                if isinstance(exc, ratelimit.ProviderRateLimited):
+                    rate_limited = exc
+                else:
+                    last_exc = exc
+                if isinstance(exc, CnpjNotFound):
+                    not_found = exc
+                logger.warning(
+                    "cnpj_fetch_primary_failed" if index == 0 else "cnpj_fetch_fallback_failed",
+                    cnpj=cnpj,
+                    source=providers[index].name,
+                    error=str(exc),
+                )
+                if next_index < len(providers):
+                    _launch()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if remaining(opts.deadline) == 0 or isinstance(last_exc, DeadlineExceeded):
+        raise DeadlineExceeded("Deadline exceeded before any CNPJ provider answered") from last_exc
+    if not_found is not None:
+        # No provider had the CNPJ and at least one said so explicitly
+        raise not_found
+    # ProviderRateLimited only when every provider was skipped for lack of tokens
+    raise last_exc if last_exc is not None else rate_limited
 
+
+async def _fetch_remote(cnpj_clean: str, opts: FetchOptions) -> dict:
+    """Fetch from the provider chain; falls back to mock data when allowed."""
+    try:
+        provider, payload = await _fetch_hedged(cnpj_clean, opts)
+    except DeadlineExceeded:
+        # Expired work fails fast; serving mock data here would hide the timeout
+        logger.warning("cnpj_fetch_deadline_exceeded", cnpj=cnpj_clean)
+        raise
+    except CnpjNotFound:
+        logger.info("cnpj_fetch_not_found", cnpj=cnpj_clean)
+        raise
+    except ratelimit.ProviderRateLimited:
+        # Every provider is out of tokens: fail so the caller retries later instead of caching mock data
+        logger.warning("cnpj_fetch_rate_limited", cnpj=cnpj_clean)
+        raise
     except Exception as last_exc:
         logger.error(
             "cnpj_fetch_all_failed",
             cnpj=cnpj_clean,
             error=str(last_exc),
         )
+        if not settings.allow_mock_on_error:
+            raise
+
+        logger.warning("cnpj_fetch_mock_fallback", cnpj=cnpj_clean)
+        record_cnpj_provider_fetch("mock")
+        return _mock_response(cnpj_clean)
+    record_cnpj_provider_fetch(provider.metric)
+    return payload
+
+
+async def _fetch_and_store(
+    redis_client: aioredis.Redis | None, cnpjs: list[str], opts: FetchOptions
+) -> dict[str, dict | BaseException]:
+    outcomes: dict[str, dict | BaseException] = {}
+    if settings.cnpj_company_store_enabled and cnpjs:
+        # Durable shared tier: survives Redis flushes/evictions, so tenants do not all refetch
+        stored = await company_store.load_many_async(cnpjs)
+        record_cnpj_cache("company", "hit", len(stored))
+        record_cnpj_cache("company", "miss", len(cnpjs) - len(stored))
+        outcomes.update(stored)
+    pending = [cnpj for cnpj in cnpjs if cnpj not in outcomes]
+    if settings.cnpj_offline_enabled and pending:
+        # The local registry answers without touching the network; only its misses go to providers
+        found = await offline.lookup_many_async(pending)
+        for _ in found:
+            record_cnpj_provider_fetch(offline.NAME)
+        outcomes.update(found)
+    remote = [cnpj for cnpj in pending if cnpj not in outcomes]
+
+    # Concurrency per provider is capped inside _fetch_from_provider
+    fetched = await asyncio.gather(*(_fetch_remote(cnpj, opts) for cnpj in remote), return_exceptions=True)
+    outcomes.update(zip(remote, fetched))
+    # Mock fallbacks are answered but never cached: the next lookup should try the providers again
+    await cache.set_many(
+        redis_client,
+        [
+            outcome
+            for outcome in outcomes.values()
+            if not isinstance(outcome, BaseException) and outcome.get("source") != "mock"
+        ],
+    )
+    await cache.set_not_found(redis_client, [cnpj for cnpj, outcome in outcomes.items() if isinstance(outcome, CnpjNotFound)])
+    if settings.cnpj_company_store_enabled:
+        await company_store.save_many_async([outcome for outcome in fetched if not isinstance(outcome, BaseException)])
+    return outcomes
+
+
+async def _wait_for_leaders(
+    redis_client: aioredis.Redis, cnpjs: list[str], opts: FetchOptions
+) -> dict[str, dict | BaseException]:
+    """Poll the cache while another process holds the lease; stop early on keys whose lease vanished."""
+    found: dict[str, dict | BaseException] = {}
+    pending = list(cnpjs)
+    deadline = time.monotonic() + settings.cnpj_lease_ttl_seconds
+    if opts.deadline is not None:
+        deadline = min(deadline, opts.deadline)
+    while pending and time.monotonic() < deadline:
+        await asyncio.sleep(settings.cnpj_lease_poll_seconds)
+        for cnpj, entry in (await cache.peek_many(redis_client, pending)).items():
+            found[cnpj] = CnpjNotFound(cnpj) if entry.not_found else entry.payload
+        pending = [cnpj for cnpj in pending if cnpj not in found]
+        if pending:
+            held = await singleflight.held_leases(redis_client, pending)
+            pending = [cnpj for cnpj in pending if cnpj in held]
+    return found
+
+
+async def _load_claimed(
+    redis_client: aioredis.Redis | None, cnpjs: list[str], opts: FetchOptions
+) -> dict[str, dict | BaseException]:
+    tokens = await singleflight.acquire_leases(redis_client, cnpjs)
+    if tokens is None:
+        leaders, followers = cnpjs, []
+    else:
+        leaders = [cnpj for cnpj in cnpjs if cnpj in tokens]
+        followers = [cnpj for cnpj in cnpjs if cnpj not in tokens]
+    record_cnpj_coalesce("leader", len(leaders))
+
+    async def _lead() -> dict[str, dict | BaseException]:
+        try:
+            return await _fetch_and_store(redis_client, leaders, opts)
+        finally:
+            await singleflight.release_leases(redis_client, tokens or {})
+
+    async def _follow() -> dict[str, dict | BaseException]:
+        if not followers:
+            return {}
+        waited = await _wait_for_leaders(redis_client, followers, opts)
+        record_cnpj_coalesce("waited", len(waited))
+        rest = [cnpj for cnpj in followers if cnpj not in waited]
+        if rest:
+            logger.info("cnpj_lease_wait_expired", count=len(rest))
+            record_cnpj_coalesce("lease_fallback", len(rest))
+        return {**waited, **await _fetch_and_store(redis_client, rest, opts)}
+
+    led, followed = await asyncio.gather(_lead(), _follow())
+    return {**led, **followed}
+
+
+async def _load_many(
+    redis_client: aioredis.Redis | None, cnpjs: list[str], opts: FetchOptions
+) -> dict[str, dict | BaseException]:
+    """
+    Fetch cache misses with single-flight: concurrent callers in this process share
+    one fetch per CNPJ, and a short Redis lease lets one process hit the providers
+    while the others wait on the cache key.
+    """
+    claimed, joined = _inflight.claim(cnpjs)
+    record_cnpj_coalesce("joined", len(joined))
+    outcomes: dict[str, dict | BaseException] = {}
+    try:
+        if claimed:
+            outcomes.update(await _load_claimed(redis_client, claimed, opts))
+    finally:
+        for cnpj in claimed:
+            outcome = outcomes.get(cnpj, RuntimeError("CNPJ fetch cancelled"))
+            if isinstance(outcome, BaseException):
+                _inflight.resolve(cnpj, exc=outcome)
+            else:
+                _inflight.resolve(cnpj, result=outcome)
+
+    for cnpj, future in joined.items():
+        try:
+            outcomes[cnpj] = await asyncio.wait_for(asyncio.shield(future), remaining(opts.deadline))
+        except asyncio.TimeoutError:
+            outcomes[cnpj] = DeadlineExceeded("Deadline exceeded waiting on in-flight CNPJ fetch")
+        except Exception as exc:
+            outcomes[cnpj] = exc
+    return outcomes
+
+
+async def _refresh(redis_client: aioredis.Redis | None, cnpj_clean: str) -> None:
+    tokens = await singleflight.acquire_leases(redis_client, [cnpj_clean])
+    if tokens is not None and cnpj_clean not in tokens:
+        # Another process is already fetching this CNPJ
+        _refreshing.pop(cnpj_clean, None)
+        return
+    try:
+        # Provider chain only: a failed refresh keeps serving the stale entry rather than mock data
+        _provider, payload = await _fetch_hedged(cnpj_clean, FetchOptions())
+        await cache.set_many(redis_client, [payload])
+        if settings.cnpj_company_store_enabled:
+            await company_store.save_many_async([payload])
+        logger.info("cnpj_cache_refreshed", cnpj=cnpj_clean, source=payload.get("source"))
+    except Exception as exc:
+        logger.warning("cnpj_cache_refresh_failed", cnpj=cnpj_clean, error=str(exc))
+    finally:
+        await singleflight.release_leases(redis_client, tokens or {})
+        _refreshing.pop(cnpj_clean, None)
+
+
+def _schedule_refresh(redis_client: aioredis.Redis | None, cnpj_clean: str) -> None:
+    if cnpj_clean not in _refreshing:
+        _refreshing[cnpj_clean] = asyncio.create_task(_refresh(redis_client, cnpj_clean))
+
+
+async def _fetch_cnpj(cnpj_clean: str, use_mock: bool, opts: FetchOptions) -> dict:
+    redis_client = _get_redis()
+    entry = (await cache.get_many(redis_client, [cnpj_clean])).get(cnpj_clean)
+    if entry is not None and entry.not_found:
+        logger.info("cnpj_fetch_negative_hit", cnpj=cnpj_clean)
+        raise CnpjNotFound(cnpj_clean)
+    if entry is not None:
+        stale = entry.is_stale(time.time())
+        logger.info("cnpj_fetch_cache_hit", cnpj=cnpj_clean, stale=stale)
+        if stale and not use_mock:
+            _schedule_refresh(redis_client, cnpj_clean)
+        return entry.payload
+
+    if use_mock:
+        logger.info("cnpj_fetch_mock", cnpj=cnpj_clean)
+        return _mock_response(cnpj_clean)
+
+    outcome = (await _load_many(redis_client, [cnpj_clean], opts))[cnpj_clean]
+    if isinstance(outcome, BaseException):
+        raise outcome
+    return outcome
+
+
+async def _fetch_cnpj_many(cnpjs: list[str], use_mock: bool, opts: FetchOptions) -> list[dict]:
+    normalized: list[str | None] = []
+    errors: dict[int, str] = {}
+    for index, value in enumerate(cnpjs):
+        try:
+            normalized.append(normalize_cnpj(value))
+        except ValueError as exc:
+            normalized.append(None)
+            errors[index] = str(exc)
+
+    unique = list(dict.fromkeys(cnpj for cnpj in normalized if cnpj))
+    redis_client = _get_redis()
+    now = time.time()
+    found: dict[str, dict] = {}
+    failed: dict[str, BaseException] = {}
+    for cnpj, entry in (await cache.get_many(redis_client, unique)).items():
+        if entry.not_found:
+            failed[cnpj] = CnpjNotFound(cnpj)
+            continue
+        found[cnpj] = entry.payload
+        if entry.is_stale(now) and not use_mock:
+            _schedule_refresh(redis_client, cnpj)
+    misses = [cnpj for cnpj in unique if cnpj not in found and cnpj not in failed]
+    logger.info(
+        "cnpj_fetch_many",
+        requested=len(cnpjs),
+        unique=len(unique),
+        cache_hits=len(found) + len(failed),
+        misses=len(misses),
+    )
+
+    if use_mock:
+        found.update({cnpj: _mock_response(cnpj) for cnpj in misses})
+    else:
+        for cnpj, outcome in (await _load_many(redis_client, misses, opts)).items():
+            if isinstance(outcome, BaseException):
+                failed[cnpj] = outcome
+            else:
+                found[cnpj] = outcome
+
+    results: list[dict] = []
+    for index, (value, cnpj) in enumerate(zip(cnpjs, normalized)):
+        if cnpj is None:
+            results.append({"cnpj": value, "ok": False, "error": errors[index]})
+        elif cnpj in found:
+            results.append({"cnpj": cnpj, "ok": True, "data": found[cnpj]})
+        else:
+            exc = failed[cnpj]
+            results.append(
+                {
+                    "cnpj": cnpj,
+                    "ok": False,
+                    "error": str(exc),
+                    "not_found": isinstance(exc, CnpjNotFound),
+                    "timed_out": isinstance(exc, DeadlineExceeded),
+                }
+            )
+    return results
+
+
+def _options(token_wait: float | None, deadline: float | None = None) -> FetchOptions:
+    return FetchOptions(
+        token_wait=settings.cnpj_rate_limit_wait_seconds if token_wait is None else token_wait,
+        deadline=deadline,
+    )
+
+
+async def fetch_cnpj_async(
+    cnpj: str, use_mock: bool = False, token_wait: float | None = None, deadline: float | None = None
+) -> dict:
+    cnpj_clean = normalize_cnpj(cnpj)
+    return await run_async(_fetch_cnpj(cnpj_clean, use_mock, _options(token_wait, deadline)))
+
+
+def fetch_cnpj(
+    cnpj: str, use_mock: bool = False, token_wait: float | None = None, deadline: float | None = None
+) -> dict:
+    """
+    Blocking wrapper over fetch_cnpj_async for sync callers (check service, job worker).
+    `token_wait` is how long to wait for a rate-limited provider's token before
+    skipping to the next one (defaults to CNPJ_RATE_LIMIT_WAIT_SECONDS). `deadline`
+    (time.monotonic()) shrinks every provider timeout to the remaining budget and
+    raises DeadlineExceeded once it is spent.
+    """
+    cnpj_clean = normalize_cnpj(cnpj)
+    return run_sync(_fetch_cnpj(cnpj_clean, use_mock, _options(token_wait, deadline)))
+
+
+async def fetch_cnpj_many_async(
+    cnpjs: list[str], use_mock: bool = False, token_wait: float | None = None, deadline: float | None = None
+) -> list[dict]:
+    return await run_async(_fetch_cnpj_many(cnpjs, use_mock, _options(token_wait, deadline)))
+
 
-        if settings.allow_mock_on_error:
-            logger.warning("cnpj_fetch_mock_fallback", cnpj=cnpj_clean)
-            payload = _mock_response(cnpj_clean)
-            if redis_client:
-                try:
-                    redis_client.setex(cache_key, CACHE_TTL_SECONDS, json.dumps(payload))
-                    redis_client.incr("metrics:cnpj_cache_write")
-                    redis_client.incr("metrics:cnpj_fetch_success_mock")
-                except RedisError as exc:
-                    logger.warning("cnpj_cache_set_failed", cnpj=cnpj_clean, error=str(exc))
-            return payload
-
-        raise last_exc
+def fetch_cnpj_many(
+    cnpjs: list[str], use_mock: bool = False, token_wait: float | None = None, deadline: float | None = None
+) -> list[dict]:
+    """
+    Bulk lookup: one pass over the cache tiers for hits, deduplicated provider fetches for the
+    misses and one pipelined write-back. Results keep input order; each item is
+    {"cnpj", "ok", "data"} or {"cnpj", "ok": False, "error"}. Misses still pending at
+    `deadline` come back as errors flagged "timed_out".
+    """
+    return run_sync(_fetch_cnpj_many(cnpjs, use_mock, _options(token_wait, deadline)))
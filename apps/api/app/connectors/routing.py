@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Protocol, Sequence, TypeVar
+
+import redis.asyncio as aioredis
+import structlog
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import record_breaker_transition, record_provider_health
+
+logger = structlog.get_logger()
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+
+class _Named(Protocol):
+    name: str
+
+
+P = TypeVar("P", bound=_Named)
+
+
+class ProviderStats:
+    """Rolling window of (ok, latency) samples for one provider."""
+
+    def __init__(self, window: int):
+        self.samples: deque[tuple[bool, float]] = deque(maxlen=window)
+        self.consecutive_failures = 0
+
+    def record(self, ok: bool, latency: float) -> None:
+        self.samples.append((ok, latency))
+        self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self.consecutive_failures = 0
+
+    @property
+    def success_rate(self) -> float:
+        if not self.samples:
+            return 1.0
+        return sum(1 for ok, _ in self.samples if ok) / len(self.samples)
+
+    def latency_quantile(self, q: float) -> float:
+        latencies = sorted(latency for ok, latency in self.samples if ok)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def score(self) -> float:
+        """Expected seconds per good answer; lower is healthier. Unknown providers rank last."""
+        if len(self.samples) < settings.cnpj_router_min_samples:
+            return float("inf")
+        return self.latency_quantile(0.5) / max(self.success_rate, 0.05)
+
+
+class ProviderRouter:
+    """
+    Orders providers by health and keeps a circuit breaker per provider.
+
+    Breaker state lives in Redis so every replica sees a trip at once:
+    `cnpj:breaker:{name}` (TTL = cooldown) means open; once it expires the
+    `...:tripped` marker keeps the breaker half-open until a single probe,
+    elected with SET NX on `...:probe`, succeeds. Without Redis the same keys
+    are kept in process memory.
+    """
+
+    def __init__(self) -> None:
+        self._stats: dict[str, ProviderStats] = {}
+        self._local_state: dict[str, float] = {}
+
+    def stats(self, name: str) -> ProviderStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = ProviderStats(settings.cnpj_router_window)
+            self._stats[name] = stats
+        return stats
+
+    # -- shared state helpers -------------------------------------------------
+
+    async def _get_many(self, redis_client: aioredis.Redis | None, keys: list[str]) -> list[bool]:
+        if redis_client:
+            try:
+                return [value is not None for value in await redis_client.mget(keys)]
+            except RedisError as exc:
+                logger.warning("cnpj_breaker_state_failed", error=str(exc))
+        now = time.monotonic()
+        return [self._local_state.get(key, 0) > now for key in keys]
+
+    async def _set(self, redis_client: aioredis.Redis | None, key: str, ttl: float, nx: bool = False) -> bool:
+        if redis_client:
+            try:
+                return bool(await redis_client.set(key, "1", px=int(ttl * 1000), nx=nx))
+            except RedisError as exc:
+                logger.warning("cnpj_breaker_state_failed", error=str(exc))
+        now = time.monotonic()
+        if nx and self._local_state.get(key, 0) > now:
+            return False
+        self._local_state[key] = now + ttl
+        return True
+
+    async def _delete(self, redis_client: aioredis.Redis | None, *keys: str) -> None:
+        if redis_client:
+            try:
+                await redis_client.delete(*keys)
+                return
+            except RedisError as exc:
+                logger.warning("cnpj_breaker_state_failed", error=str(exc))
+        for key in keys:
+            self._local_state.pop(key, None)
+
+    @staticmethod
+    def _key(name: str, suffix: str = "") -> str:
+        return f"cnpj:breaker:{name}{suffix}"
+
+    async def state(self, redis_client: aioredis.Redis | None, name: str) -> str:
+        is_open, tripped = await self._get_many(redis_client, [self._key(name), self._key(name, ":tripped")])
+        if is_open:
+            return OPEN
+        return HALF_OPEN if tripped else CLOSED
+
+    # -- routing ----------------------------------------------------------------
+
+    async def order(self, redis_client: aioredis.Redis | None, providers: Sequence[P]) -> list[P]:
+        """Closed providers by score (configured order breaks ties), then at most one half-open probe each."""
+        keys = [key for p in providers for key in (self._key(p.name), self._key(p.name, ":tripped"))]
+        flags = await self._get_many(redis_client, keys)
+        closed: list[tuple[float, int, P]] = []
+        probes: list[P] = []
+        for index, provider in enumerate(providers):
+            is_open, tripped = flags[2 * index], flags[2 * index + 1]
+            if is_open:
+                continue
+            if tripped:
+                if await self._set(redis_client, self._key(provider.name, ":probe"), settings.cnpj_breaker_probe_seconds, nx=True):
+                    self._transition(provider.name, OPEN, HALF_OPEN)
+                    probes.append(provider)
+                continue
+            closed.append((self.stats(provider.name).score(), index, provider))
+        return [provider for _score, _index, provider in sorted(closed, key=lambda item: item[:2])] + probes
+
+    async def record(self, redis_client: aioredis.Redis | None, name: str, ok: bool, latency: float) -> None:
+        stats = self.stats(name)
+        stats.record(ok, latency)
+        record_provider_health(name, stats.success_rate, stats.latency_quantile(0.5), stats.latency_quantile(0.95))
+
+        state = await self.state(redis_client, name)
+        if state == HALF_OPEN:
+            if ok:
+                await self._delete(redis_client, self._key(name, ":tripped"), self._key(name, ":probe"))
+                self._transition(name, HALF_OPEN, CLOSED)
+            else:
+                await self._trip(redis_client, name, HALF_OPEN)
+            return
+
+        if state == CLOSED and not ok and self._should_trip(stats):
+            await self._trip(redis_client, name, CLOSED)
+
+    @staticmethod
+    def _should_trip(stats: ProviderStats) -> bool:
+        if stats.consecutive_failures >= settings.cnpj_breaker_consecutive_failures:
+            return True
+        return (
+            len(stats.samples) >= settings.cnpj_router_min_samples
+            and 1 - stats.success_rate >= settings.cnpj_breaker_failure_rate
+        )
+
+    async def _trip(self, redis_client: aioredis.Redis | None, name: str, from_state: str) -> None:
+        cooldown = settings.cnpj_breaker_cooldown_seconds
+        await self._set(redis_client, self._key(name), cooldown)
+        # Marker outlives the cooldown; cleared only by a successful half-open probe
+        await self._set(redis_client, self._key(name, ":tripped"), cooldown * 10)
+        await self._delete(redis_client, self._key(name, ":probe"))
+        self.stats(name).reset()
+        self._transition(name, from_state, OPEN)
+
+    @staticmethod
+    def _transition(name: str, from_state: str, to_state: str) -> None:
+        logger.warning("cnpj_breaker_transition", provider=name, from_state=from_state, to_state=to_state)
+        record_breaker_transition(name, to_state)
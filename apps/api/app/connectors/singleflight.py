@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+from uuid import uuid4
+
+import redis.asyncio as aioredis
+import structlog
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# Compare-and-delete so a holder whose lease already expired never frees someone else's lease
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class Group:
+    """
+    In-process single-flight: the first caller for a key claims it and every
+    concurrent caller awaits the same future. Connector-loop only, no locking.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def claim(self, keys: list[str]) -> tuple[list[str], dict[str, asyncio.Future]]:
+        """Split keys into (claimed by this caller, already in flight elsewhere)."""
+        claimed: list[str] = []
+        joined: dict[str, asyncio.Future] = {}
+        loop = asyncio.get_running_loop()
+        for key in keys:
+            future = self._inflight.get(key)
+            if future is not None:
+                joined[key] = future
+                continue
+            self._inflight[key] = loop.create_future()
+            claimed.append(key)
+        return claimed, joined
+
+    def resolve(self, key: str, result: object = None, exc: BaseException | None = None) -> None:
+        future = self._inflight.pop(key, None)
+        if future is None or future.done():
+            return
+        if exc is not None:
+            future.set_exception(exc)
+            future.exception()  # followers may be gone; avoid "never retrieved" noise
+        else:
+            future.set_result(result)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+def lease_key(key: str) -> str:
+    return f"cnpj:lease:{key}"
+
+
+async def acquire_leases(redis_client: aioredis.Redis | None, keys: list[str]) -> dict[str, str] | None:
+    """
+    Try to take a short Redis lease per key in one round-trip. Returns key -> token
+    for the leases won, or None when Redis is unavailable (caller should fetch alone).
+    """
+    if not redis_client or not keys:
+        return None
+    token = uuid4().hex
+    ttl_ms = int(settings.cnpj_lease_ttl_seconds * 1000)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(lease_key(key), token, nx=True, px=ttl_ms)
+        won = await pipe.execute()
+    except RedisError as exc:
+        logger.warning("cnpj_lease_acquire_failed", count=len(keys), error=str(exc))
+        return None
+    return {key: token for key, ok in zip(keys, won) if ok}
+
+
+async def release_leases(redis_client: aioredis.Redis | None, tokens: dict[str, str]) -> None:
+    if not redis_client or not tokens:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key, token in tokens.items():
+            pipe.eval(_RELEASE_SCRIPT, 1, lease_key(key), token)
+        await pipe.execute()
+    except RedisError as exc:
+        logger.warning("cnpj_lease_release_failed", count=len(tokens), error=str(exc))
+
+
+async def held_leases(redis_client: aioredis.Redis, keys: list[str]) -> set[str]:
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.exists(lease_key(key))
+        held = await pipe.execute()
+    except RedisError as exc:
+        logger.warning("cnpj_lease_check_failed", count=len(keys), error=str(exc))
+        return set()
+    return {key for key, exists in zip(keys, held) if exists}
@@ -6,6 +6,8 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = Field(alias="DATABASE_URL")
+    # Async routes connect through asyncpg; derived from DATABASE_URL unless set
+    async_database_url_override: str = Field(default="", alias="ASYNC_DATABASE_URL")
     redis_url: str = Field(alias="REDIS_URL")
     jwt_secret: str = Field(alias="JWT_SECRET")
     jwt_access_minutes: int = Field(default=15, alias="JWT_ACCESS_MINUTES")
@@ -14,9 +16,88 @@ class Settings(BaseSettings):
     use_mock_connectors: bool = Field(default=True, alias="USE_MOCK_CONNECTORS")
     auto_create_tables: bool = Field(default=False, alias="AUTO_CREATE_TABLES")
     cnpj_cache_ttl_seconds: int = Field(default=86400, alias="CNPJ_CACHE_TTL_SECONDS")
+    cnpj_cache_ttl_jitter: float = Field(default=0.1, alias="CNPJ_CACHE_TTL_JITTER")
+    # Past the fresh TTL, entries are served stale for this long while one background refresh runs
+    cnpj_cache_stale_seconds: int = Field(default=3600, alias="CNPJ_CACHE_STALE_SECONDS")
+    cnpj_negative_cache_ttl_seconds: int = Field(default=900, alias="CNPJ_NEGATIVE_CACHE_TTL_SECONDS")
+    # Redis value encoding: json|msgpack, compressed with zlib|zstd|none once the body reaches the threshold
+    cnpj_cache_codec: str = Field(default="json", alias="CNPJ_CACHE_CODEC")
+    cnpj_cache_compression: str = Field(default="zlib", alias="CNPJ_CACHE_COMPRESSION")
+    cnpj_cache_compress_min_bytes: int = Field(default=1024, alias="CNPJ_CACHE_COMPRESS_MIN_BYTES")
+    cnpj_local_cache_size: int = Field(default=10000, alias="CNPJ_LOCAL_CACHE_SIZE")
+    cnpj_local_cache_ttl_seconds: int = Field(default=300, alias="CNPJ_LOCAL_CACHE_TTL_SECONDS")
+    # Durable shared tier (companies table) between Redis and the providers
+    cnpj_company_store_enabled: bool = Field(default=True, alias="CNPJ_COMPANY_STORE_ENABLED")
+    cnpj_company_ttl_seconds: int = Field(default=7 * 86400, alias="CNPJ_COMPANY_TTL_SECONDS")
+    # Answer from the imported Receita dump (cnpj_registry) before calling any network provider
+    cnpj_offline_enabled: bool = Field(default=False, alias="CNPJ_OFFLINE_ENABLED")
+    cnpj_http_max_connections: int = Field(default=20, alias="CNPJ_HTTP_MAX_CONNECTIONS")
+    cnpj_http_max_keepalive: int = Field(default=10, alias="CNPJ_HTTP_MAX_KEEPALIVE")
+    cnpj_http_keepalive_seconds: float = Field(default=30.0, alias="CNPJ_HTTP_KEEPALIVE_SECONDS")
+    cnpj_http2_enabled: bool = Field(default=False, alias="CNPJ_HTTP2_ENABLED")
+    cnpj_provider_max_concurrency: int = Field(default=10, alias="CNPJ_PROVIDER_MAX_CONCURRENCY")
+    # Connector Redis calls (cache, leases, breakers, rate limits) give up after this and use in-process state
+    cnpj_redis_timeout_seconds: float = Field(default=1.0, alias="CNPJ_REDIS_TIMEOUT_SECONDS")
+    # Shared token buckets per provider, e.g. "publica.cnpj.ws:3/60,receitaws:3/60" (tokens/seconds)
+    cnpj_provider_rate_limits: str = Field(default="", alias="CNPJ_PROVIDER_RATE_LIMITS")
+    # How long a caller waits for a provider token before skipping to the next provider
+    cnpj_rate_limit_wait_seconds: float = Field(default=0.0, alias="CNPJ_RATE_LIMIT_WAIT_SECONDS")
+    cnpj_rate_limit_bulk_wait_seconds: float = Field(default=10.0, alias="CNPJ_RATE_LIMIT_BULK_WAIT_SECONDS")
+    # Cross-process single-flight lease; followers poll the cache key for up to this long
+    cnpj_lease_ttl_seconds: float = Field(default=30.0, alias="CNPJ_LEASE_TTL_SECONDS")
+    cnpj_lease_poll_seconds: float = Field(default=0.1, alias="CNPJ_LEASE_POLL_SECONDS")
+    cnpj_router_window: int = Field(default=50, alias="CNPJ_ROUTER_WINDOW")
+    cnpj_router_min_samples: int = Field(default=5, alias="CNPJ_ROUTER_MIN_SAMPLES")
+    cnpj_breaker_consecutive_failures: int = Field(default=5, alias="CNPJ_BREAKER_CONSECUTIVE_FAILURES")
+    cnpj_breaker_failure_rate: float = Field(default=0.5, alias="CNPJ_BREAKER_FAILURE_RATE")
+    cnpj_breaker_cooldown_seconds: float = Field(default=30.0, alias="CNPJ_BREAKER_COOLDOWN_SECONDS")
+    cnpj_breaker_probe_seconds: float = Field(default=30.0, alias="CNPJ_BREAKER_PROBE_SECONDS")
+    # Seconds to wait on in-flight providers before firing the next one in parallel; 0 = strictly serial
+    cnpj_hedge_delay_seconds: float = Field(default=2.0, alias="CNPJ_HEDGE_DELAY_SECONDS")
     allow_mock_on_error: bool = Field(default=True, alias="ALLOW_MOCK_ON_ERROR")
+    # Default budget for synchronous checks; clients may ask for less/more via X-Request-Timeout
+    request_deadline_seconds: float = Field(default=25.0, alias="REQUEST_DEADLINE_SECONDS")
+    request_deadline_max_seconds: float = Field(default=60.0, alias="REQUEST_DEADLINE_MAX_SECONDS")
+    # Provider attempts with less budget than this are skipped instead of started
+    cnpj_min_attempt_seconds: float = Field(default=0.5, alias="CNPJ_MIN_ATTEMPT_SECONDS")
     async_checks_enabled: bool = Field(default=False, alias="ASYNC_CHECKS_ENABLED")
     async_max_workers: int = Field(default=2, alias="ASYNC_MAX_WORKERS")
+    # Redis Streams job queue consumed by `python -m app.worker`
+    worker_concurrency: int = Field(default=4, alias="WORKER_CONCURRENCY")
+    job_max_attempts: int = Field(default=5, alias="JOB_MAX_ATTEMPTS")
+    job_retry_base_seconds: float = Field(default=5.0, alias="JOB_RETRY_BASE_SECONDS")
+    job_retry_max_seconds: float = Field(default=300.0, alias="JOB_RETRY_MAX_SECONDS")
+    # Messages left unacked this long by a (presumably dead) consumer are reclaimed
+    job_claim_idle_seconds: float = Field(default=300.0, alias="JOB_CLAIM_IDLE_SECONDS")
+    job_timeout_seconds: float = Field(default=120.0, alias="JOB_TIMEOUT_SECONDS")
+    # Fair scheduling: classes served by weighted round-robin, tenants by deficit round-robin
+    # within a class. Weights are "name:weight" lists, e.g. "interactive:4,bulk:1" / "12:3".
+    job_priority_weights: str = Field(default="interactive:4,bulk:1", alias="JOB_PRIORITY_WEIGHTS")
+    job_tenant_weights: str = Field(default="", alias="JOB_TENANT_WEIGHTS")
+    # Enqueue dedup: a finished check of the same target is reused for this long (0 disables);
+    # Idempotency-Key headers map to the job they created for JOB_IDEMPOTENCY_TTL_SECONDS
+    job_result_reuse_seconds: int = Field(default=300, alias="JOB_RESULT_REUSE_SECONDS")
+    job_idempotency_ttl_seconds: int = Field(default=86400, alias="JOB_IDEMPOTENCY_TTL_SECONDS")
+    # GET /jobs/stream: per-tenant event log kept for Last-Event-ID replay, and keepalive cadence
+    job_events_maxlen: int = Field(default=1000, alias="JOB_EVENTS_MAXLEN")
+    job_events_heartbeat_seconds: float = Field(default=15.0, alias="JOB_EVENTS_HEARTBEAT_SECONDS")
+    # Monitoring scheduler (`python -m app.scheduler`): due schedules are enqueued as bulk jobs
+    monitor_min_interval_seconds: int = Field(default=3600, alias="MONITOR_MIN_INTERVAL_SECONDS")
+    monitor_default_interval_seconds: int = Field(default=86400, alias="MONITOR_DEFAULT_INTERVAL_SECONDS")
+    monitor_jitter: float = Field(default=0.1, alias="MONITOR_JITTER")
+    monitor_batch_size: int = Field(default=500, alias="MONITOR_BATCH_SIZE")
+    monitor_poll_seconds: float = Field(default=5.0, alias="MONITOR_POLL_SECONDS")
+    # POST /targets:import: staged rows are validated and merged this many at a time
+    target_import_batch_size: int = Field(default=10000, alias="TARGET_IMPORT_BATCH_SIZE")
+    # checks/audit_log are partitioned by month; partitions are created this many months ahead.
+    # Retention (`python -m app.retention`) drops months past the longest tenant policy and
+    # deletes, in batches, the rows of tenants with a shorter one.
+    partition_premake_months: int = Field(default=3, alias="PARTITION_PREMAKE_MONTHS")
+    retention_default_days: int = Field(default=1825, alias="RETENTION_DEFAULT_DAYS")
+    retention_purge_batch_size: int = Field(default=5000, alias="RETENTION_PURGE_BATCH_SIZE")
+    retention_detach_only: bool = Field(default=False, alias="RETENTION_DETACH_ONLY")
+    retention_interval_seconds: float = Field(default=86400.0, alias="RETENTION_INTERVAL_SECONDS")
+    worker_metrics_port: int = Field(default=9101, alias="WORKER_METRICS_PORT")
     metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
     rate_limit_per_minute: int = Field(default=120, alias="RATE_LIMIT_PER_MINUTE")
     rate_limit_per_minute_tenant: int = Field(default=240, alias="RATE_LIMIT_PER_MINUTE_TENANT")
@@ -26,5 +107,37 @@ class Settings(BaseSettings):
             return []
         return [origin.strip() for origin in self.cors_origins.split(",") if origin.strip()]
 
+    def async_database_url(self) -> str:
+        if self.async_database_url_override:
+            return self.async_database_url_override
+        scheme, _, rest = self.database_url.partition("://")
+        return f"{scheme.split('+')[0]}+asyncpg://{rest}"
+
+    @staticmethod
+    def _weight_map(spec: str) -> dict[str, int]:
+        weights: dict[str, int] = {}
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            name, _, weight = item.strip().rpartition(":")
+            weights[name] = max(1, int(weight))
+        return weights
+
+    def job_priority_weight_map(self) -> dict[str, int]:
+        return self._weight_map(self.job_priority_weights)
+
+    def job_tenant_weight_map(self) -> dict[str, int]:
+        return self._weight_map(self.job_tenant_weights)
+
+    def cnpj_provider_rate_limit_map(self) -> dict[str, tuple[int, float]]:
+        limits: dict[str, tuple[int, float]] = {}
+        for item in self.cnpj_provider_rate_limits.split(","):
+            if not item.strip():
+                continue
+            provider, _, spec = item.strip().rpartition(":")
+            tokens, _, seconds = spec.partition("/")
+            limits[provider] = (int(tokens), float(seconds or 60))
+        return limits
+
 
 settings = Settings()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import time
+
+# Deadlines are absolute time.monotonic() values so they survive hops between
+# threads and the connector event loop within one process.
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, detail: str = "Request deadline exceeded"):
+        super().__init__(detail)
+
+
+def deadline_in(seconds: float | None) -> float | None:
+    if seconds is None:
+        return None
+    return time.monotonic() + seconds
+
+
+def remaining(deadline: float | None) -> float | None:
+    """Seconds left before the deadline (never negative), or None when unbounded."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def check(deadline: float | None, what: str = "request") -> None:
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
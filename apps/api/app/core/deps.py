@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+from typing import AsyncIterator
+
 import jwt
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 
+from app.core.config import settings
+from app.core.deadline import deadline_in
 from app.core.security import decode_token
-from app.db.session import SessionLocal
+from app.db.rls import tenant_context
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.domain.models import User
+from app.repositories.users import get_user_by_id, get_user_by_id_async
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
@@ -26,11 +32,7 @@ def get_db() -> Session:
         db.close()
 
 
-def get_current_user(
-    request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+def _access_claims(credentials: HTTPAuthorizationCredentials | None) -> dict:
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
     try:
@@ -39,14 +41,27 @@ def get_current_user(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
     if payload.get("type") != "access":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.query(User).filter(User.id == int(payload["sub"])).one_or_none()
+    return payload
+
+
+def _check_user(user: User | None, payload: dict) -> User:
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not active")
     if int(payload.get("tenant_id", -1)) != user.tenant_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid tenant context")
+    return user
+
+
+def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    payload = _access_claims(credentials)
+    user = _check_user(get_user_by_id(db, int(payload["sub"])), payload)
     request.state.tenant_id = user.tenant_id
     try:
-        db.execute(text(f"SET LOCAL app.tenant_id = {int(user.tenant_id)}"))
+        db.execute(tenant_context(user.tenant_id))
     except Exception:
         db.rollback()
     return user
@@ -59,3 +74,48 @@ def require_roles(*roles: str):
         return current_user
 
     return _guard
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        finally:
+            try:
+                await db.rollback()
+            except Exception:
+                pass
+
+
+async def get_current_user_async(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    """get_current_user for async routes; the tenant is set on the request's async session."""
+    payload = _access_claims(credentials)
+    user = _check_user(await get_user_by_id_async(db, int(payload["sub"])), payload)
+    request.state.tenant_id = user.tenant_id
+    try:
+        await db.execute(tenant_context(user.tenant_id))
+    except Exception:
+        await db.rollback()
+    return user
+
+
+def require_roles_async(*roles: str):
+    async def _guard(current_user: User = Depends(get_current_user_async)) -> User:
+        if current_user.role not in roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
+        return current_user
+
+    return _guard
+
+
+def request_deadline(
+    x_request_timeout: float | None = Header(default=None, alias="X-Request-Timeout"),
+) -> float:
+    """Absolute deadline (time.monotonic()) for this request, from the client header or the default budget."""
+    seconds = settings.request_deadline_seconds if x_request_timeout is None else x_request_timeout
+    return deadline_in(min(max(seconds, 0.0), settings.request_deadline_max_seconds))
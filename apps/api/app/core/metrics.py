@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 try:
-    from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
     _PROM_AVAILABLE = True
 except Exception:  # pragma: no cover - fallback when lib not installed/offline
     _PROM_AVAILABLE = False
@@ -19,7 +19,11 @@ except Exception:  # pragma: no cover - fallback when lib not installed/offline
         def observe(self, value: float) -> None:
             return None
 
+        def set(self, value: float) -> None:
+            return None
+
     Counter = _DummyMetric  # type: ignore
+    Gauge = _DummyMetric  # type: ignore
     Histogram = _DummyMetric  # type: ignore
 
     def generate_latest() -> bytes:
@@ -59,6 +63,78 @@ CNPJ_CHECK_COUNT = Counter(
     ["outcome", "source"],
 )
 
+CNPJ_CACHE_EVENTS = Counter(
+    "cnpj_cache_events_total",
+    "CNPJ cache lookups and writes per tier",
+    ["tier", "result"],
+)
+
+CNPJ_PROVIDER_FETCH = Counter(
+    "cnpj_provider_fetch_total",
+    "Successful CNPJ payloads per upstream provider",
+    ["provider"],
+)
+
+CNPJ_FETCH_COALESCE = Counter(
+    "cnpj_fetch_coalesce_total",
+    "CNPJ cache-miss fetches by single-flight role (leader/joined/waited/lease_fallback)",
+    ["role"],
+)
+
+CNPJ_BREAKER_TRANSITIONS = Counter(
+    "cnpj_breaker_transitions_total",
+    "Circuit breaker state transitions per provider",
+    ["provider", "to_state"],
+)
+
+CNPJ_PROVIDER_SUCCESS_RATIO = Gauge(
+    "cnpj_provider_success_ratio",
+    "Rolling success ratio per CNPJ provider",
+    ["provider"],
+)
+
+CNPJ_PROVIDER_LATENCY = Gauge(
+    "cnpj_provider_latency_seconds",
+    "Rolling latency quantiles per CNPJ provider",
+    ["provider", "quantile"],
+)
+
+CNPJ_PROVIDER_RATE_LIMIT = Counter(
+    "cnpj_provider_rate_limit_total",
+    "Outbound provider token bucket outcomes (acquired/waited/skipped)",
+    ["provider", "outcome"],
+)
+
+CNPJ_HTTP_POOL_CONNECTIONS = Gauge(
+    "cnpj_http_pool_connections",
+    "Outbound connector HTTP pool state per provider",
+    ["provider", "state"],
+)
+
+JOB_EVENTS = Counter(
+    "job_events_total",
+    "Async check job lifecycle events (enqueued/deduplicated/scheduled/done/failed/retried/reclaimed/dead)",
+    ["event"],
+)
+
+REPORTS_SKIPPED = Counter(
+    "reports_skipped_total",
+    "Successful checks that wrote no report because no relevant field changed",
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    "job_queue_depth",
+    "Queued plus in-flight async check jobs per priority class and tenant",
+    ["priority", "tenant"],
+)
+
+JOB_QUEUE_WAIT = Histogram(
+    "job_queue_wait_seconds",
+    "Time from enqueue until a worker picks the job, per priority class and tenant",
+    ["priority", "tenant"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 15, 60, 300, 900, 3600),
+)
+
 
 def record_request(method: str, path: str, status_code: int, duration_seconds: float) -> None:
     REQUEST_COUNT.labels(method=method, path=path, status_code=str(status_code)).inc()
@@ -77,5 +153,56 @@ def record_cnpj_check(outcome: str, source: str) -> None:
     CNPJ_CHECK_COUNT.labels(outcome=outcome, source=source).inc()
 
 
+def record_cnpj_cache(tier: str, result: str, amount: int = 1) -> None:
+    CNPJ_CACHE_EVENTS.labels(tier=tier, result=result).inc(amount)
+
+
+def record_cnpj_provider_fetch(provider: str) -> None:
+    CNPJ_PROVIDER_FETCH.labels(provider=provider).inc()
+
+
+def record_cnpj_coalesce(role: str, amount: int = 1) -> None:
+    if amount:
+        CNPJ_FETCH_COALESCE.labels(role=role).inc(amount)
+
+
+def record_breaker_transition(provider: str, to_state: str) -> None:
+    CNPJ_BREAKER_TRANSITIONS.labels(provider=provider, to_state=to_state).inc()
+
+
+def record_provider_health(provider: str, success_rate: float, p50: float, p95: float) -> None:
+    CNPJ_PROVIDER_SUCCESS_RATIO.labels(provider=provider).set(success_rate)
+    CNPJ_PROVIDER_LATENCY.labels(provider=provider, quantile="0.5").set(p50)
+    CNPJ_PROVIDER_LATENCY.labels(provider=provider, quantile="0.95").set(p95)
+
+
+def record_provider_rate_limit(provider: str, outcome: str) -> None:
+    CNPJ_PROVIDER_RATE_LIMIT.labels(provider=provider, outcome=outcome).inc()
+
+
+def record_http_pool_stats(stats: dict[str, dict[str, int]]) -> None:
+    for provider, values in stats.items():
+        for state, value in values.items():
+            CNPJ_HTTP_POOL_CONNECTIONS.labels(provider=provider, state=state).set(value)
+
+
 def metrics_response():
     return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def record_job_event(event: str, amount: int = 1) -> None:
+    if amount:
+        JOB_EVENTS.labels(event=event).inc(amount)
+
+
+def record_report_skipped(amount: int = 1) -> None:
+    if amount:
+        REPORTS_SKIPPED.inc(amount)
+
+
+def record_job_wait(priority: str, tenant: str, seconds: float) -> None:
+    JOB_QUEUE_WAIT.labels(priority=priority, tenant=tenant).observe(max(seconds, 0.0))
+
+
+def record_job_queue_depth(priority: str, tenant: str, depth: int) -> None:
+    JOB_QUEUE_DEPTH.labels(priority=priority, tenant=tenant).set(depth)
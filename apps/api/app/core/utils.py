@@ -1,11 +1,44 @@
+import base64
+import json
 import re
 
 
 CNPJ_RE = re.compile(r"^\d{14}$")
 
 
+_CNPJ_WEIGHTS = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def cnpj_check_digits(base: str) -> str:
+    """Modulus-11 check digits for the first 12 digits of a CNPJ."""
+    digits = [int(char) for char in base]
+    for _ in range(2):
+        total = sum(d * w for d, w in zip(digits, _CNPJ_WEIGHTS[-len(digits):]))
+        remainder = total % 11
+        digits.append(0 if remainder < 2 else 11 - remainder)
+    return f"{digits[-2]}{digits[-1]}"
+
+
 def normalize_cnpj(value: str) -> str:
     digits = re.sub(r"\D", "", value)
     if not CNPJ_RE.match(digits):
         raise ValueError("CNPJ must have 14 digits")
+    if digits == digits[0] * 14 or cnpj_check_digits(digits[:12]) != digits[12:]:
+        raise ValueError("CNPJ check digits are invalid")
     return digits
+
+
+def encode_cursor(values: dict) -> str:
+    """Opaque pagination cursor (URL-safe base64 JSON); clients pass it back unchanged."""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,40 @@
+"""cnpj registry imported from the Receita open-data dump
+
+Revision ID: 0002_cnpj_registry
+Revises: 0001_initial
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_cnpj_registry"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cnpj_registry",
+        sa.Column("cnpj", sa.String(length=14), primary_key=True),
+        sa.Column("razao_social", sa.String(length=255)),
+        sa.Column("nome_fantasia", sa.String(length=255)),
+        sa.Column("natureza_juridica", sa.String(length=8)),
+        sa.Column("porte", sa.String(length=4)),
+        sa.Column("capital_social", sa.Numeric(18, 2)),
+        sa.Column("situacao", sa.String(length=20)),
+        sa.Column("data_situacao", sa.Date()),
+        sa.Column("abertura", sa.Date()),
+        sa.Column("cnae_principal", sa.String(length=8)),
+        sa.Column("uf", sa.String(length=2)),
+        sa.Column("municipio", sa.String(length=8)),
+        sa.Column("cep", sa.String(length=8)),
+        sa.Column("release", sa.String(length=16), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cnpj_registry")
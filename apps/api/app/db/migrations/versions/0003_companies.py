@@ -0,0 +1,31 @@
+"""shared companies table (durable CNPJ cache tier)
+
+Revision ID: 0003_companies
+Revises: 0002_cnpj_registry
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_companies"
+down_revision = "0002_cnpj_registry"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "companies",
+        sa.Column("cnpj", sa.String(length=14), primary_key=True),
+        sa.Column("payload_json", sa.JSON(), nullable=False),
+        sa.Column("source", sa.String(length=50), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_companies_fetched_at", "companies", ["fetched_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_companies_fetched_at", table_name="companies")
+    op.drop_table("companies")
@@ -0,0 +1,38 @@
+"""monitoring schedules
+
+Revision ID: 0004_monitors
+Revises: 0003_companies
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_monitors"
+down_revision = "0003_companies"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "monitors",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tenant_id", sa.Integer(), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("target_id", sa.Integer(), sa.ForeignKey("targets.id"), nullable=False),
+        sa.Column("interval_seconds", sa.Integer(), nullable=False),
+        sa.Column("paused", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("next_run_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_enqueued_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+        sa.UniqueConstraint("target_id", name="uq_monitors_target_id"),
+    )
+    op.create_index("ix_monitors_tenant_id", "monitors", ["tenant_id"])
+    op.create_index("ix_monitors_due", "monitors", ["next_run_at"], postgresql_where=sa.text("NOT paused"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_monitors_due", table_name="monitors")
+    op.drop_index("ix_monitors_tenant_id", table_name="monitors")
+    op.drop_table("monitors")
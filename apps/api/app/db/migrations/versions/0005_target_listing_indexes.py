@@ -0,0 +1,64 @@
+"""indexes for keyset-paginated, filtered target listing
+
+Revision ID: 0005_target_listing_indexes
+Revises: 0004_monitors
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_target_listing_indexes"
+down_revision = "0004_monitors"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # targets/reports are large and written constantly: build without blocking writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_targets_tenant_id_id", "targets", ["tenant_id", "id"], postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            "ix_targets_tenant_document_prefix",
+            "targets",
+            ["tenant_id", "document"],
+            postgresql_ops={"document": "varchar_pattern_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_targets_tenant_type",
+            "targets",
+            ["tenant_id", sa.text("upper(type)"), "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_targets_tenant_created_at",
+            "targets",
+            ["tenant_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_reports_target_created_at",
+            "reports",
+            ["target_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in (
+            ("ix_reports_target_created_at", "reports"),
+            ("ix_targets_tenant_created_at", "targets"),
+            ("ix_targets_tenant_type", "targets"),
+            ("ix_targets_tenant_document_prefix", "targets"),
+            ("ix_targets_tenant_id_id", "targets"),
+        ):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,76 @@
+"""latest report pointer and per-target report versions
+
+Revision ID: 0006_latest_report_pointer
+Revises: 0005_target_listing_indexes
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_latest_report_pointer"
+down_revision = "0005_target_listing_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("targets", sa.Column("latest_report_id", sa.Integer(), nullable=True))
+    op.add_column("targets", sa.Column("report_version", sa.Integer(), nullable=False, server_default="0"))
+    op.create_foreign_key(
+        "fk_targets_latest_report_id", "targets", "reports", ["latest_report_id"], ["id"], ondelete="SET NULL"
+    )
+
+    # Reports were all written as version 1: number them in creation order, then point each target at its last one
+    op.execute(
+        """
+        UPDATE reports r SET version = n.version
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY target_id ORDER BY created_at, id) AS version FROM reports
+        ) n
+        WHERE r.id = n.id AND r.version IS DISTINCT FROM n.version
+        """
+    )
+    op.execute(
+        """
+        UPDATE targets t SET latest_report_id = l.id, report_version = l.version
+        FROM (
+            SELECT DISTINCT ON (target_id) target_id, id, version FROM reports ORDER BY target_id, created_at DESC, id DESC
+        ) l
+        WHERE t.id = l.target_id
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_reports_tenant_target_created_at",
+            "reports",
+            ["tenant_id", "target_id", sa.text("created_at DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Superseded: the latest report is now reached through the pointer
+        op.drop_index(
+            "ix_reports_target_created_at", table_name="reports", postgresql_concurrently=True, if_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_reports_target_created_at",
+            "reports",
+            ["target_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_reports_tenant_target_created_at",
+            table_name="reports",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_constraint("fk_targets_latest_report_id", "targets", type_="foreignkey")
+    op.drop_column("targets", "report_version")
+    op.drop_column("targets", "latest_report_id")
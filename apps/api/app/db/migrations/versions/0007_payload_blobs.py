@@ -0,0 +1,40 @@
+"""content-addressed payload blobs referenced by checks and reports
+
+Revision ID: 0007_payload_blobs
+Revises: 0006_latest_report_pointer
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_payload_blobs"
+down_revision = "0006_latest_report_pointer"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payload_blobs",
+        sa.Column("id", sa.String(length=64), primary_key=True),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+    )
+    # Existing rows keep their inline payloads; readers handle both shapes
+    op.add_column(
+        "checks",
+        sa.Column("payload_blob_id", sa.String(length=64), sa.ForeignKey("payload_blobs.id"), nullable=True),
+    )
+    op.add_column(
+        "reports",
+        sa.Column("details_blob_id", sa.String(length=64), sa.ForeignKey("payload_blobs.id"), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("reports", "details_blob_id")
+    op.drop_column("checks", "payload_blob_id")
+    op.drop_table("payload_blobs")
@@ -0,0 +1,38 @@
+"""snapshot hash on targets and the change feed
+
+Revision ID: 0008_target_changes
+Revises: 0007_payload_blobs
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_target_changes"
+down_revision = "0007_payload_blobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Left NULL for existing targets: the first check after the upgrade compares against the latest report
+    op.add_column("targets", sa.Column("snapshot_hash", sa.String(length=64), nullable=True))
+    op.add_column("targets", sa.Column("last_verified_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_table(
+        "target_changes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tenant_id", sa.Integer(), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("target_id", sa.Integer(), sa.ForeignKey("targets.id"), nullable=False),
+        sa.Column("report_id", sa.Integer(), sa.ForeignKey("reports.id"), nullable=False),
+        sa.Column("changes_json", sa.JSON(), nullable=False),
+        sa.Column("detected_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+    )
+    op.create_index("ix_target_changes_target_id", "target_changes", ["target_id"])
+    op.create_index("ix_target_changes_tenant_id_id", "target_changes", ["tenant_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_table("target_changes")
+    op.drop_column("targets", "last_verified_at")
+    op.drop_column("targets", "snapshot_hash")
@@ -0,0 +1,152 @@
+"""monthly range partitions for checks and audit_log, tenant retention policy
+
+Revision ID: 0009_partition_checks_audit
+Revises: 0008_target_changes
+Create Date: 2026-10-18 16:00:00.000000
+
+Rows are copied into the new partitioned tables, which holds an exclusive lock on both
+tables for the duration: run it in a maintenance window on large installations.
+"""
+
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_partition_checks_audit"
+down_revision = "0008_target_changes"
+branch_labels = None
+depends_on = None
+
+PREMAKE_MONTHS = 3
+
+
+def _checks_columns(id_type) -> list:
+    return [
+        sa.Column("id", id_type, server_default=sa.text("nextval('checks_id_seq')"), nullable=False),
+        sa.Column("tenant_id", sa.Integer(), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("target_id", sa.Integer(), sa.ForeignKey("targets.id"), nullable=False),
+        sa.Column("provider", sa.String(length=50), nullable=False),
+        sa.Column("status", sa.String(length=50), nullable=False),
+        sa.Column("raw_payload_json", sa.JSON(), nullable=False),
+        sa.Column("payload_blob_id", sa.String(length=64), sa.ForeignKey("payload_blobs.id"), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    ]
+
+
+def _audit_columns(id_type) -> list:
+    return [
+        sa.Column("id", id_type, server_default=sa.text("nextval('audit_log_id_seq')"), nullable=False),
+        sa.Column("tenant_id", sa.Integer(), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("action", sa.String(length=100), nullable=False),
+        sa.Column("metadata_json", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    ]
+
+
+# table -> (partition column, column factory, secondary indexes)
+TABLES = {
+    "checks": ("fetched_at", _checks_columns, {"ix_checks_tenant_id": "tenant_id", "ix_checks_target_id": "target_id"}),
+    "audit_log": ("created_at", _audit_columns, {"ix_audit_log_tenant_id": "tenant_id", "ix_audit_log_user_id": "user_id"}),
+}
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# Parent policies keep the names app.db.rls uses
+POLICIES = {"checks": "checks_tenant_isolation", "audit_log": "audit_tenant_isolation"}
+
+
+def _isolate(name: str) -> None:
+    policy = POLICIES.get(name, f"{name}_tenant_isolation")
+    op.execute(f"ALTER TABLE {name} ENABLE ROW LEVEL SECURITY")
+    op.execute(f"DROP POLICY IF EXISTS {policy} ON {name}")
+    op.execute(f"CREATE POLICY {policy} ON {name} USING (tenant_id = app_current_tenant())")
+
+
+def _swap(table: str, old: str, create) -> None:
+    """Rename `table` to `old`, free its sequence and index names, and build the replacement with `create`."""
+    op.rename_table(table, old)
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    for index in TABLES[table][2]:
+        op.drop_index(index, table_name=old)
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    create()
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+
+def upgrade() -> None:
+    # Same helper as app.db.rls; databases built only from migrations may not have it yet
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_current_tenant() RETURNS integer AS $$
+        BEGIN
+          RETURN COALESCE(NULLIF(current_setting('app.tenant_id', true), '')::int, -1);
+        EXCEPTION WHEN others THEN
+          RETURN -1;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.add_column("tenants", sa.Column("retention_days", sa.Integer(), nullable=True))
+
+    bind = op.get_bind()
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    for table, (column, columns, indexes) in TABLES.items():
+        old = f"{table}_unpartitioned"
+        oldest = bind.execute(sa.text(f"SELECT min({column}) FROM {table}")).scalar()
+        op.execute(f"ALTER SEQUENCE {table}_id_seq AS bigint")
+        _swap(
+            table,
+            old,
+            lambda: op.create_table(
+                table,
+                *columns(sa.BigInteger()),
+                sa.PrimaryKeyConstraint("id", column, name=f"{table}_pkey"),
+                postgresql_partition_by=f"RANGE ({column})",
+            ),
+        )
+
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        _isolate(f"{table}_default")
+        month = oldest.date().replace(day=1) if oldest else today
+        while month <= _add_months(today, PREMAKE_MONTHS):
+            name = f"{table}_p{month:%Y%m}"
+            upper = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{month} 00:00+00') TO ('{upper} 00:00+00')"
+            )
+            _isolate(name)
+            month = upper
+
+        names = ", ".join(c.name for c in columns(sa.BigInteger()))
+        select = names.replace(column, f"COALESCE({column}, now())")
+        op.execute(f"INSERT INTO {table} ({names}) SELECT {select} FROM {old}")
+        op.drop_table(old)
+        for index, indexed in indexes.items():
+            op.create_index(index, table, [indexed])
+        _isolate(table)
+
+
+def downgrade() -> None:
+    for table, (_column, columns, indexes) in TABLES.items():
+        old = f"{table}_partitioned"
+        _swap(
+            table,
+            old,
+            lambda: op.create_table(
+                table, *columns(sa.Integer()), sa.PrimaryKeyConstraint("id", name=f"{table}_pkey")
+            ),
+        )
+        op.execute(f"ALTER SEQUENCE {table}_id_seq AS integer")
+        names = ", ".join(c.name for c in columns(sa.Integer()))
+        op.execute(f"INSERT INTO {table} ({names}) SELECT {names} FROM {old}")
+        op.drop_table(old)  # takes its partitions along
+        for index, indexed in indexes.items():
+            op.create_index(index, table, [indexed])
+        _isolate(table)
+    op.drop_column("tenants", "retention_days")
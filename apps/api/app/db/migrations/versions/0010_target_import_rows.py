@@ -0,0 +1,35 @@
+"""staging table for bulk target imports
+
+Revision ID: 0010_target_import_rows
+Revises: 0009_partition_checks_audit
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_target_import_rows"
+down_revision = "0009_partition_checks_audit"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows only live until their import is merged, so the table skips WAL
+    op.create_table(
+        "target_import_rows",
+        sa.Column("import_id", sa.String(length=32), nullable=False),
+        sa.Column("line_no", sa.Integer(), nullable=False),
+        sa.Column("tenant_id", sa.Integer(), nullable=False),
+        sa.Column("document", sa.Text(), nullable=True),
+        sa.Column("name_hint", sa.Text(), nullable=True),
+        sa.Column("type", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("import_id", "line_no"),
+        prefixes=["UNLOGGED"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("target_import_rows")
@@ -0,0 +1,51 @@
+"""indexes on the payload_blobs references, for retention's orphan blob sweep
+
+Revision ID: 0011_payload_blob_refs
+Revises: 0010_target_import_rows
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_payload_blob_refs"
+down_revision = "0010_target_import_rows"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A partitioned parent cannot be indexed concurrently: create its index invalid (ON ONLY),
+    # build one per partition without blocking writes, and attach them, which validates it
+    op.execute("CREATE INDEX IF NOT EXISTS ix_checks_payload_blob_id ON ONLY checks (payload_blob_id)")
+    partitions = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'checks'::regclass"
+            )
+        )
+        .scalars()
+        .all()
+    )
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            index = f"{partition}_payload_blob_id_idx"
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {partition} (payload_blob_id)")
+            op.execute(f"ALTER INDEX ix_checks_payload_blob_id ATTACH PARTITION {index}")
+        op.create_index(
+            "ix_reports_details_blob_id",
+            "reports",
+            ["details_blob_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_reports_details_blob_id", table_name="reports", postgresql_concurrently=True, if_exists=True)
+    # Drops the partitions' indexes along with it
+    op.drop_index("ix_checks_payload_blob_id", table_name="checks", if_exists=True)
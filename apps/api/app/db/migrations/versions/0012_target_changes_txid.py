@@ -0,0 +1,47 @@
+"""commit-ordered change feed: writing transaction id on target_changes
+
+Revision ID: 0012_target_changes_txid
+Revises: 0011_payload_blob_refs
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012_target_changes_txid"
+down_revision = "0011_payload_blob_refs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing entries get 0 (a constant default, so no table rewrite) and keep their id order
+    op.add_column("target_changes", sa.Column("txid", sa.BigInteger(), nullable=False, server_default="0"))
+    op.alter_column("target_changes", "txid", server_default=sa.text("pg_current_xact_id()::text::bigint"))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_target_changes_tenant_txid_id",
+            "target_changes",
+            ["tenant_id", "txid", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_target_changes_tenant_id_id", table_name="target_changes", postgresql_concurrently=True, if_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_target_changes_tenant_id_id",
+            "target_changes",
+            ["tenant_id", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_target_changes_tenant_txid_id", table_name="target_changes", postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_column("target_changes", "txid")
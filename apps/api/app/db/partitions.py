@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timezone
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+logger = structlog.get_logger()
+
+# Append-only tables range-partitioned by month on their timestamp column
+PARTITIONED_TABLES = {"checks": "fetched_at", "audit_log": "created_at"}
+
+_MONTH_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _children(conn: Connection, table: str) -> list[str]:
+    return list(
+        conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:table AS regclass)"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+def list_partitions(conn: Connection, table: str) -> dict[str, date]:
+    """Monthly partitions currently attached to `table`, by name (the default partition is left out)."""
+    partitions: dict[str, date] = {}
+    for name in _children(conn, table):
+        match = _MONTH_SUFFIX.search(name)
+        if match:
+            partitions[name] = date(int(match.group(1)), int(match.group(2)), 1)
+    return partitions
+
+
+def default_partition(conn: Connection, table: str) -> str | None:
+    """Name of the partition catching `table`'s rows outside every monthly range, if it exists."""
+    name = f"{table}_default"
+    return name if name in _children(conn, table) else None
+
+
+def _create_partition(conn: Connection, table: str, name: str, bounds: str, stray: str | None = None) -> bool:
+    """
+    Create one partition of `table`. `stray` selects rows of the new range that already sit
+    in the default partition: Postgres refuses the range while they are there, so the default
+    is detached, the rows moved into the new partition and the default attached again.
+    """
+    # Queries go through the parent, whose policy applies; the partition gets the same one
+    # so direct access to it is isolated as well.
+    default = f"{table}_default"
+    try:
+        with conn.begin_nested():
+            if stray:
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+            conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+            conn.execute(text(f"ALTER TABLE {name} ENABLE ROW LEVEL SECURITY"))
+            conn.execute(
+                text(f"CREATE POLICY {name}_tenant_isolation ON {name} USING (tenant_id = app_current_tenant())")
+            )
+            if stray:
+                moved = conn.execute(
+                    text(
+                        f"WITH moved AS (DELETE FROM {default} WHERE {stray} RETURNING *) "
+                        f"INSERT INTO {name} SELECT * FROM moved"
+                    )
+                )
+                conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+                logger.info("partition_rows_moved", table=table, partition=name, rows=moved.rowcount)
+    except DBAPIError as exc:
+        logger.warning("partition_create_failed", table=table, partition=name, error=str(exc.orig))
+        return False
+    return True
+
+
+def ensure_partitions(engine: Engine, months_ahead: int, start: date | None = None) -> list[str]:
+    """
+    Create the monthly partitions from `start` (default: the current month) up to `months_ahead`
+    months from now, plus a default partition catching rows outside every range. Rows of a new
+    month already caught by the default partition are moved into it. Idempotent; returns the
+    partitions it created. Bounds are UTC month starts.
+    """
+    today = month_start(datetime.now(timezone.utc))
+    first = month_start(start) if start else today
+    created: list[str] = []
+    with engine.connect() as conn:
+        for table, column in PARTITIONED_TABLES.items():
+            existing = set(_children(conn, table))
+            default = f"{table}_default"
+            has_default = default in existing or _create_partition(conn, table, default, "DEFAULT")
+            month = first
+            while month <= add_months(today, months_ahead):
+                name = partition_name(table, month)
+                lower, upper = f"'{month} 00:00+00'", f"'{add_months(month, 1)} 00:00+00'"
+                bounds = f"FOR VALUES FROM ({lower}) TO ({upper})"
+                if name not in existing:
+                    in_range = f"{column} >= {lower} AND {column} < {upper}"
+                    stray = has_default and conn.execute(
+                        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})")
+                    ).scalar()
+                    if _create_partition(conn, table, name, bounds, in_range if stray else None):
+                        created.append(name)
+                month = add_months(month, 1)
+        conn.commit()
+    return created
+
+
+def drop_partition(conn: Connection, table: str, name: str, detach_only: bool = False) -> None:
+    """Take a whole month out of `table`: detached (kept for archiving) or dropped. No commit."""
+    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    if not detach_only:
+        conn.execute(text(f"DROP TABLE {name}"))
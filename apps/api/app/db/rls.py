@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from sqlalchemy import text
+from sqlalchemy import TextClause, text
 from sqlalchemy.engine import Engine
 
 
+def tenant_context(tenant_id: int) -> TextClause:
+    """SET LOCAL scoping the current transaction to one tenant, as read by app_current_tenant()."""
+    return text(f"SET LOCAL app.tenant_id = {int(tenant_id)}")
+
+
 def enable_rls(engine: Engine) -> None:
-    """Enable RLS and policies for tenant-scoped tables. Safe when app.tenant_id is not set."""
+    """Enable RLS and policies for tenant-scoped and shared tables. Safe when app.tenant_id is not set."""
     ddl = """
     -- Helpers
     CREATE OR REPLACE FUNCTION app_current_tenant() RETURNS integer AS $$
@@ -45,6 +50,52 @@ def enable_rls(engine: Engine) -> None:
     DROP POLICY IF EXISTS audit_tenant_isolation ON audit_log;
     CREATE POLICY audit_tenant_isolation ON audit_log
       USING (tenant_id = app_current_tenant());
+
+    -- Monitors
+    ALTER TABLE monitors ENABLE ROW LEVEL SECURITY;
+    DROP POLICY IF EXISTS monitors_tenant_isolation ON monitors;
+    CREATE POLICY monitors_tenant_isolation ON monitors
+      USING (tenant_id = app_current_tenant());
+
+    -- Change feed
+    ALTER TABLE target_changes ENABLE ROW LEVEL SECURITY;
+    DROP POLICY IF EXISTS target_changes_tenant_isolation ON target_changes;
+    CREATE POLICY target_changes_tenant_isolation ON target_changes
+      USING (tenant_id = app_current_tenant());
+
+    -- Staged target imports
+    ALTER TABLE target_import_rows ENABLE ROW LEVEL SECURITY;
+    DROP POLICY IF EXISTS target_import_rows_tenant_isolation ON target_import_rows;
+    CREATE POLICY target_import_rows_tenant_isolation ON target_import_rows
+      USING (tenant_id = app_current_tenant());
+
+    -- Shared reference data: readable by every tenant, written only outside a tenant context
+    ALTER TABLE companies ENABLE ROW LEVEL SECURITY;
+    DROP POLICY IF EXISTS companies_shared_read ON companies;
+    CREATE POLICY companies_shared_read ON companies FOR SELECT
+      USING (true);
+    DROP POLICY IF EXISTS companies_system_write ON companies;
+    CREATE POLICY companies_system_write ON companies
+      USING (app_current_tenant() = -1)
+      WITH CHECK (app_current_tenant() = -1);
+
+    -- Content-addressed payloads: any tenant may read and add (never change) a blob
+    ALTER TABLE payload_blobs ENABLE ROW LEVEL SECURITY;
+    DROP POLICY IF EXISTS payload_blobs_shared_read ON payload_blobs;
+    CREATE POLICY payload_blobs_shared_read ON payload_blobs FOR SELECT
+      USING (true);
+    DROP POLICY IF EXISTS payload_blobs_shared_insert ON payload_blobs;
+    CREATE POLICY payload_blobs_shared_insert ON payload_blobs FOR INSERT
+      WITH CHECK (true);
+
+    ALTER TABLE cnpj_registry ENABLE ROW LEVEL SECURITY;
+    DROP POLICY IF EXISTS cnpj_registry_shared_read ON cnpj_registry;
+    CREATE POLICY cnpj_registry_shared_read ON cnpj_registry FOR SELECT
+      USING (true);
+    DROP POLICY IF EXISTS cnpj_registry_system_write ON cnpj_registry;
+    CREATE POLICY cnpj_registry_system_write ON cnpj_registry
+      USING (app_current_tenant() = -1)
+      WITH CHECK (app_current_tenant() = -1);
     """
     with engine.connect() as conn:
         conn.execute(text(ddl))
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
 engine = create_engine(settings.database_url, pool_pre_ping=True, future=True)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+# Async routes (asyncpg): no request holds a worker thread while it waits on the database.
+# Objects stay loaded after commit so handlers can serialize them without another round-trip.
+async_engine = create_async_engine(settings.async_database_url(), pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
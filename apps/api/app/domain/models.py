@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, JSON, String, func
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, ForeignKey, Index, Integer, JSON, LargeBinary, Numeric, String, Text, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -13,6 +14,8 @@ class Tenant(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, index=True)
+    # LGPD retention for checks and audit entries; NULL means RETENTION_DEFAULT_DAYS
+    retention_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -30,6 +33,18 @@ class User(Base):
 
 class Target(Base):
     __tablename__ = "targets"
+    __table_args__ = (
+        # Keyset listing (GET /targets) walks (tenant_id, id) newest first; the others back its filters
+        Index("ix_targets_tenant_id_id", "tenant_id", "id"),
+        Index(
+            "ix_targets_tenant_document_prefix",
+            "tenant_id",
+            "document",
+            postgresql_ops={"document": "varchar_pattern_ops"},
+        ),
+        Index("ix_targets_tenant_type", "tenant_id", text("upper(type)"), "id"),
+        Index("ix_targets_tenant_created_at", "tenant_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), index=True)
@@ -37,37 +52,151 @@ class Target(Base):
     document: Mapped[str] = mapped_column(String(32), index=True)
     name_hint: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Maintained with every report insert (see repositories.reports.insert_reports)
+    latest_report_id: Mapped[int | None] = mapped_column(
+        ForeignKey("reports.id", use_alter=True, ondelete="SET NULL"), nullable=True
+    )
+    report_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Change detection: hash of the relevant fields of the latest report, and when they were last confirmed
+    snapshot_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    last_verified_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
 
 class Check(Base):
     __tablename__ = "checks"
+    # Monthly partitions (app.db.partitions); retention drops whole months instead of deleting rows
+    __table_args__ = {"postgresql_partition_by": "RANGE (fetched_at)"}
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), index=True)
     target_id: Mapped[int] = mapped_column(ForeignKey("targets.id"), index=True)
     provider: Mapped[str] = mapped_column(String(50))
     status: Mapped[str] = mapped_column(String(50))
     raw_payload_json: Mapped[dict] = mapped_column(JSON)
-    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Raw provider document (full_data), stored once in payload_blobs
+    payload_blob_id: Mapped[str | None] = mapped_column(ForeignKey("payload_blobs.id"), nullable=True, index=True)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("ix_reports_tenant_target_created_at", "tenant_id", "target_id", text("created_at DESC")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), index=True)
     target_id: Mapped[int] = mapped_column(ForeignKey("targets.id"), index=True)
     version: Mapped[int] = mapped_column(Integer, default=1)
     summary_json: Mapped[dict] = mapped_column(JSON)
+    # summary_json["details"] lives in payload_blobs; resolved only when a reader asks for it
+    details_blob_id: Mapped[str | None] = mapped_column(ForeignKey("payload_blobs.id"), nullable=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     action: Mapped[str] = mapped_column(String(100))
     metadata_json: Mapped[dict] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+
+
+class TargetChange(Base):
+    """Change feed entry: relevant report fields that changed between two checks of a target."""
+
+    __tablename__ = "target_changes"
+    __table_args__ = (Index("ix_target_changes_tenant_txid_id", "tenant_id", "txid", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"))
+    target_id: Mapped[int] = mapped_column(ForeignKey("targets.id"), index=True)
+    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id"))
+    changes_json: Mapped[dict] = mapped_column(JSON)  # {field: {"from": old, "to": new}}
+    detected_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Writing transaction's id: the feed is ordered by it so entries committing out of id order are not skipped
+    txid: Mapped[int] = mapped_column(BigInteger, server_default=text("pg_current_xact_id()::text::bigint"))
+
+
+class TargetImportRow(Base):
+    """Uploaded row of a bulk target import, staged with COPY until the import job merges it."""
+
+    __tablename__ = "target_import_rows"
+    # Transient data: skipping WAL makes staging large uploads much cheaper
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    import_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    line_no: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant_id: Mapped[int] = mapped_column(Integer)
+    document: Mapped[str | None] = mapped_column(Text, nullable=True)
+    name_hint: Mapped[str | None] = mapped_column(Text, nullable=True)
+    type: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class Monitor(Base):
+    """Periodic re-check schedule for one target."""
+
+    __tablename__ = "monitors"
+    __table_args__ = (
+        # Due-work lookups only ever touch active schedules, ordered by next run
+        Index("ix_monitors_due", "next_run_at", postgresql_where=text("NOT paused")),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), index=True)
+    target_id: Mapped[int] = mapped_column(ForeignKey("targets.id"), unique=True)
+    interval_seconds: Mapped[int] = mapped_column(Integer)
+    paused: Mapped[bool] = mapped_column(Boolean, default=False)
+    next_run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_enqueued_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class PayloadBlob(Base):
+    """Content-addressed raw provider document: sha256 of its canonical JSON, stored compressed. Shared by every tenant."""
+
+    __tablename__ = "payload_blobs"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    size: Mapped[int] = mapped_column(Integer)  # uncompressed JSON bytes
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class Company(Base):
+    """Latest normalized provider payload per CNPJ, shared by every tenant (durable tier behind Redis)."""
+
+    __tablename__ = "companies"
+
+    cnpj: Mapped[str] = mapped_column(String(14), primary_key=True)
+    payload_json: Mapped[dict] = mapped_column(JSON)
+    source: Mapped[str] = mapped_column(String(50))
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+
+
+class CnpjRegistryEntry(Base):
+    """Row of the Receita Federal open-data dump (one per establishment). Shared reference data, not tenant-scoped."""
+
+    __tablename__ = "cnpj_registry"
+
+    cnpj: Mapped[str] = mapped_column(String(14), primary_key=True)
+    razao_social: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    nome_fantasia: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    natureza_juridica: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    porte: Mapped[str | None] = mapped_column(String(4), nullable=True)
+    capital_social: Mapped[Decimal | None] = mapped_column(Numeric(18, 2), nullable=True)
+    situacao: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    data_situacao: Mapped[date | None] = mapped_column(Date, nullable=True)
+    abertura: Mapped[date | None] = mapped_column(Date, nullable=True)
+    cnae_principal: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    uf: Mapped[str | None] = mapped_column(String(2), nullable=True)
+    municipio: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    cep: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    # Dump release that last changed this row, e.g. "2026-09"
+    release: Mapped[str] = mapped_column(String(16))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
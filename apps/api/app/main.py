@@ -3,14 +3,16 @@ from __future__ import annotations
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routers import auth, health, jobs, reports, targets, users, metrics
+from app.api.routers import auth, changes, health, jobs, monitors, reports, targets, users, metrics
+from app.connectors.http import close_clients
 from app.core.config import settings
 from app.core.logging import configure_logging
 from app.core.middleware import RequestLogMiddleware, SecurityHeadersMiddleware, RateLimitMiddleware
 from app.db.base import Base
-from app.db.session import engine
+from app.db.session import async_engine, engine
 from app.domain import models  # noqa: F401
 from app.core.tracing import setup_tracing
+from app.db.partitions import ensure_partitions
 from app.db.rls import enable_rls
 
 
@@ -36,13 +38,23 @@ def on_startup() -> None:
     if settings.auto_create_tables:
         Base.metadata.create_all(bind=engine)
     enable_rls(engine)
+    ensure_partitions(engine, settings.partition_premake_months)
     setup_tracing(app, otlp_endpoint=None)
 
 
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    close_clients()
+    # Pooled asyncpg connections belong to this event loop
+    await async_engine.dispose()
+
+
 app.include_router(health.router)
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(targets.router)
 app.include_router(reports.router)
 app.include_router(jobs.router)
+app.include_router(monitors.router)
+app.include_router(changes.router)
 app.include_router(metrics.router)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.domain.models import AuditLog
@@ -11,3 +13,17 @@ def create_audit_log(db: Session, tenant_id: int, user_id: int, action: str, met
     db.commit()
     db.refresh(entry)
     return entry
+
+
+async def create_audit_log_async(
+    db: AsyncSession, tenant_id: int, user_id: int, action: str, metadata: dict | None = None
+) -> None:
+    db.add(AuditLog(tenant_id=tenant_id, user_id=user_id, action=action, metadata_json=metadata or {}))
+    await db.commit()
+
+
+def insert_audit_log(db: Session, tenant_id: int, user_id: int, action: str, metadata: dict | None = None) -> None:
+    """Audit entry written inside the caller's transaction (no commit, no refresh)."""
+    db.execute(
+        insert(AuditLog).values(tenant_id=tenant_id, user_id=user_id, action=action, metadata_json=metadata or {})
+    )
@@ -1,26 +1,16 @@
 from __future__ import annotations
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.domain.models import Check
 
 
-def create_check(
-    db: Session,
-    tenant_id: int,
-    target_id: int,
-    provider: str,
-    status: str,
-    payload: dict,
-) -> Check:
-    check = Check(
-        tenant_id=tenant_id,
-        target_id=target_id,
-        provider=provider,
-        status=status,
-        raw_payload_json=payload,
-    )
-    db.add(check)
-    db.commit()
-    db.refresh(check)
-    return check
+def insert_checks(db: Session, rows: list[dict]) -> list[int]:
+    """
+    One multi-row INSERT ... RETURNING id for checks (keys: tenant_id, target_id, provider,
+    status, raw_payload_json). Does not commit: part of the caller's unit of work.
+    """
+    if not rows:
+        return []
+    return list(db.execute(insert(Check).values(rows).returning(Check.id)).scalars())
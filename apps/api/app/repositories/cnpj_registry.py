@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from app.domain.models import CnpjRegistryEntry
+
+
+def get_registry_entries(db: Session, cnpjs: list[str]) -> list[CnpjRegistryEntry]:
+    if not cnpjs:
+        return []
+    return db.query(CnpjRegistryEntry).filter(CnpjRegistryEntry.cnpj.in_(cnpjs)).all()
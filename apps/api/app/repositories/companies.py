@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.domain.models import Company
+
+
+def get_companies(db: Session, cnpjs: list[str], fetched_after: datetime) -> list[Company]:
+    if not cnpjs:
+        return []
+    return (
+        db.query(Company)
+        .filter(Company.cnpj.in_(cnpjs))
+        .filter(Company.fetched_at >= fetched_after)
+        .all()
+    )
+
+
+def upsert_companies(db: Session, rows: list[dict]) -> None:
+    """Insert or replace by CNPJ in one statement; an older fetch never overwrites a newer one."""
+    if not rows:
+        return
+    stmt = insert(Company).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Company.cnpj],
+        set_={
+            "payload_json": stmt.excluded.payload_json,
+            "source": stmt.excluded.source,
+            "fetched_at": stmt.excluded.fetched_at,
+        },
+        where=Company.fetched_at < stmt.excluded.fetched_at,
+    )
+    db.execute(stmt)
+    db.commit()
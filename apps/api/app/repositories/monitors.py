@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.domain.models import Monitor, Target
+
+
+def get_monitor(db: Session, tenant_id: int, target_id: int) -> Monitor | None:
+    return (
+        db.query(Monitor)
+        .filter(Monitor.tenant_id == tenant_id)
+        .filter(Monitor.target_id == target_id)
+        .one_or_none()
+    )
+
+
+def list_monitors(db: Session, tenant_id: int) -> list[Monitor]:
+    return db.query(Monitor).filter(Monitor.tenant_id == tenant_id).order_by(Monitor.id.desc()).all()
+
+
+def save_monitor(db: Session, monitor: Monitor) -> Monitor:
+    db.add(monitor)
+    db.commit()
+    db.refresh(monitor)
+    return monitor
+
+
+def delete_monitor(db: Session, monitor: Monitor) -> None:
+    db.delete(monitor)
+    db.commit()
+
+
+def set_tenant_paused(db: Session, tenant_id: int, paused: bool, resume_spread: float) -> int:
+    """Pause/resume every schedule of a tenant. Overdue schedules resume spread over `resume_spread` x interval."""
+    values: dict = {"paused": paused}
+    if not paused:
+        spread = func.make_interval(0, 0, 0, 0, 0, 0, func.random() * resume_spread * Monitor.interval_seconds)
+        values["next_run_at"] = func.greatest(Monitor.next_run_at, func.now() + spread)
+    result = db.execute(
+        update(Monitor)
+        .where(Monitor.tenant_id == tenant_id)
+        .where(Monitor.paused.is_(not paused))
+        .values(**values)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def claim_due_monitors(db: Session, now: datetime, limit: int) -> list[tuple[Monitor, str]]:
+    """
+    Lock up to `limit` due schedules (with their target document) for this transaction.
+    Served by the partial ix_monitors_due index; SKIP LOCKED lets several schedulers share the work.
+    """
+    return (
+        db.query(Monitor, Target.document)
+        .join(Target, Target.id == Monitor.target_id)
+        .filter(Monitor.paused.is_(False))
+        .filter(Monitor.next_run_at <= now)
+        .order_by(Monitor.next_run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=Monitor)
+        .all()
+    )
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.domain.models import PayloadBlob
+
+
+def put_blobs(db: Session, rows: list[dict]) -> None:
+    """
+    Insert blobs (id, data, size) that are not stored yet and key-share lock all of them until
+    commit, so retention's orphan sweep (which skips locked blobs) cannot delete one the caller
+    is about to reference. A blob the sweep deleted between the two statements is inserted
+    again. No commit.
+    """
+    pending = sorted(rows, key=lambda row: row["id"])
+    while pending:
+        db.execute(insert(PayloadBlob).values(pending).on_conflict_do_nothing(index_elements=[PayloadBlob.id]))
+        locked = set(
+            db.execute(
+                select(PayloadBlob.id)
+                .where(PayloadBlob.id.in_([row["id"] for row in pending]))
+                .order_by(PayloadBlob.id)
+                .with_for_update(key_share=True)
+            ).scalars()
+        )
+        pending = [row for row in pending if row["id"] not in locked]
+
+
+def get_blob_data(db: Session, blob_id: str) -> bytes | None:
+    return db.query(PayloadBlob.data).filter(PayloadBlob.id == blob_id).scalar()
+
+
+async def get_blob_data_async(db: AsyncSession, blob_id: str) -> bytes | None:
+    return await db.scalar(select(PayloadBlob.data).where(PayloadBlob.id == blob_id))
@@ -1,34 +1,74 @@
 from __future__ import annotations
 
+import json
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.domain.models import Report
-
-
-def create_report(
-    db: Session,
-    tenant_id: int,
-    target_id: int,
-    version: int,
-    summary: dict,
-) -> Report:
-    report = Report(
-        tenant_id=tenant_id,
-        target_id=target_id,
-        version=version,
-        summary_json=summary,
-    )
-    db.add(report)
-    db.commit()
-    db.refresh(report)
-    return report
+from app.domain.models import Report, Target
+
+# Report ids are drawn up front so a single UPDATE can bump the target's version counter and
+# point latest_report_id at the row inserted by the same statement. The UPDATE row-locks each
+# target, so concurrent writers get consecutive versions instead of duplicates.
+_INSERT_REPORTS_SQL = """
+WITH v AS (
+    SELECT nextval(pg_get_serial_sequence('reports', 'id')) AS report_id, target_id, summary_json, details_blob_id
+    FROM (VALUES {rows}) AS v(target_id, summary_json, details_blob_id)
+), bumped AS (
+    UPDATE targets t
+    SET report_version = t.report_version + 1, latest_report_id = v.report_id
+    FROM v
+    WHERE t.id = v.target_id AND t.tenant_id = :tenant_id
+    RETURNING v.report_id, t.id AS target_id, t.report_version, v.summary_json, v.details_blob_id
+)
+INSERT INTO reports (id, tenant_id, target_id, version, summary_json, details_blob_id)
+SELECT report_id, :tenant_id, target_id, report_version, summary_json, details_blob_id FROM bumped
+RETURNING id, target_id
+"""
+
+
+def insert_reports(db: Session, tenant_id: int, rows: list[tuple[int, dict, str | None]]) -> dict[int, int]:
+    """
+    Insert (target_id, summary, details_blob_id) reports in one statement, versioned per target
+    and set as each target's latest report. Targets must be distinct within a call. No commit.
+    Returns {target_id: report_id}.
+    """
+    if not rows:
+        return {}
+    params: dict = {"tenant_id": tenant_id}
+    values = []
+    for index, (target_id, summary, details_blob_id) in enumerate(rows):
+        params[f"target_{index}"] = target_id
+        params[f"summary_{index}"] = json.dumps(summary)
+        params[f"blob_{index}"] = details_blob_id
+        values.append(
+            f"(CAST(:target_{index} AS integer), CAST(:summary_{index} AS json), CAST(:blob_{index} AS varchar))"
+        )
+    sql = _INSERT_REPORTS_SQL.format(rows=", ".join(values))
+    return {target_id: report_id for report_id, target_id in db.execute(text(sql), params)}
+
+
+def get_report_summaries(db: Session, report_ids: list[int]) -> dict[int, dict]:
+    if not report_ids:
+        return {}
+    return dict(db.query(Report.id, Report.summary_json).filter(Report.id.in_(report_ids)).all())
 
 
 def get_latest_report(db: Session, tenant_id: int, target_id: int) -> Report | None:
+    """Primary-key fetch through the target's latest_report_id pointer."""
     return (
         db.query(Report)
-        .filter(Report.tenant_id == tenant_id)
-        .filter(Report.target_id == target_id)
-        .order_by(Report.created_at.desc())
-        .first()
+        .join(Target, Target.latest_report_id == Report.id)
+        .filter(Target.tenant_id == tenant_id)
+        .filter(Target.id == target_id)
+        .one_or_none()
+    )
+
+
+async def get_latest_report_async(db: AsyncSession, tenant_id: int, target_id: int) -> Report | None:
+    return await db.scalar(
+        select(Report)
+        .join(Target, Target.latest_report_id == Report.id)
+        .where(Target.tenant_id == tenant_id, Target.id == target_id)
     )
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Text, func, insert, tuple_
+from sqlalchemy.orm import Session
+
+from app.domain.models import TargetChange
+
+
+def insert_changes(db: Session, rows: list[dict]) -> None:
+    """One multi-row INSERT (keys: tenant_id, target_id, report_id, changes_json). No commit."""
+    if rows:
+        db.execute(insert(TargetChange).values(rows))
+
+
+def list_changes(
+    db: Session, tenant_id: int, after: tuple[int, int], limit: int, target_id: int | None = None
+) -> list[TargetChange]:
+    """
+    Feed entries after the (txid, id) position `after`, in that order, so clients can poll
+    incrementally. Only entries of transactions older than every one still running are
+    returned: anything committing later sorts after them, so a poller never skips an entry.
+    """
+    # Oldest transaction still in progress; entries at or past it may yet be joined by earlier ones
+    horizon = func.pg_snapshot_xmin(func.pg_current_snapshot()).cast(Text).cast(BigInteger)
+    query = (
+        db.query(TargetChange)
+        .filter(TargetChange.tenant_id == tenant_id)
+        .filter(tuple_(TargetChange.txid, TargetChange.id) > tuple_(*after))
+        .filter(TargetChange.txid < horizon)
+    )
+    if target_id is not None:
+        query = query.filter(TargetChange.target_id == target_id)
+    return query.order_by(TargetChange.txid, TargetChange.id).limit(limit).all()
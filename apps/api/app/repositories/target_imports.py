@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Validates and normalizes one chunk of staged rows in a single statement (check digits
+# included), then adds the documents the tenant does not have yet. Rows repeating a
+# document, in the file or already in targets, are skipped.
+_MERGE_SQL = text(
+    r"""
+WITH chunk AS (
+    SELECT line_no, regexp_replace(coalesce(document, ''), '[^0-9]', '', 'g') AS digits,
+           left(nullif(btrim(name_hint), ''), 255) AS name_hint,
+           left(coalesce(nullif(btrim(type), ''), 'CNPJ'), 50) AS type
+    FROM target_import_rows
+    WHERE import_id = :import_id AND line_no > :after_line
+    ORDER BY line_no
+    LIMIT :limit
+), checked AS (
+    SELECT c.*, CASE
+        WHEN length(c.digits) = 14 AND c.digits !~ '^(.)\1*$' THEN
+            substr(c.digits, 13, 1)::int = CASE WHEN m.r1 < 2 THEN 0 ELSE 11 - m.r1 END
+            AND substr(c.digits, 14, 1)::int = CASE WHEN m.r2 < 2 THEN 0 ELSE 11 - m.r2 END
+        ELSE false
+    END AS valid
+    FROM chunk c
+    CROSS JOIN LATERAL (
+        SELECT
+            sum(substr(c.digits, i, 1)::int * (ARRAY[5,4,3,2,9,8,7,6,5,4,3,2])[i]) FILTER (WHERE i <= 12) % 11 AS r1,
+            sum(substr(c.digits, i, 1)::int * (ARRAY[6,5,4,3,2,9,8,7,6,5,4,3,2])[i]) % 11 AS r2
+        FROM generate_series(1, 13) AS i
+        WHERE length(c.digits) = 14
+    ) m
+), candidates AS (
+    SELECT DISTINCT ON (digits) line_no, digits, name_hint, type
+    FROM checked
+    WHERE valid
+    ORDER BY digits, line_no
+), inserted AS (
+    INSERT INTO targets (tenant_id, type, document, name_hint)
+    SELECT :tenant_id, c.type, c.digits, c.name_hint
+    FROM candidates c
+    WHERE NOT EXISTS (SELECT 1 FROM targets t WHERE t.tenant_id = :tenant_id AND t.document = c.digits)
+    ORDER BY c.line_no
+    RETURNING id
+)
+SELECT
+    (SELECT max(line_no) FROM chunk) AS last_line,
+    (SELECT count(*) FROM chunk) AS rows,
+    (SELECT count(*) FROM inserted) AS created,
+    (SELECT array_agg(line_no ORDER BY line_no) FROM checked WHERE NOT valid) AS invalid_lines
+"""
+)
+
+
+@dataclass
+class MergeResult:
+    last_line: int
+    rows: int
+    created: int
+    invalid_lines: list[int]
+
+
+def stage_rows(
+    db: Session, import_id: str, tenant_id: int, rows: Iterable[tuple[int, str | None, str | None, str | None]]
+) -> int:
+    """COPY (line_no, document, name_hint, type) rows into the staging table. No commit; returns the row count."""
+    cursor = db.connection().connection.driver_connection.cursor()
+    count = 0
+    with cursor.copy(
+        "COPY target_import_rows (import_id, tenant_id, line_no, document, name_hint, type) FROM STDIN"
+    ) as copy:
+        for line_no, document, name_hint, target_type in rows:
+            copy.write_row((import_id, tenant_id, line_no, document, name_hint, target_type))
+            count += 1
+    return count
+
+
+def merge_staged(db: Session, tenant_id: int, import_id: str, after_line: int, limit: int) -> MergeResult | None:
+    """
+    Merge the next `limit` staged rows after `after_line` into targets; None once all rows are
+    done. Imports of one tenant are serialized until commit so concurrent ones cannot both
+    add the same document. No commit.
+    """
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('target_import'), :tenant_id)"), {"tenant_id": tenant_id})
+    row = db.execute(
+        _MERGE_SQL, {"tenant_id": tenant_id, "import_id": import_id, "after_line": after_line, "limit": limit}
+    ).one()
+    if not row.rows:
+        return None
+    return MergeResult(row.last_line, row.rows, row.created, list(row.invalid_lines or []))
+
+
+def delete_staged(
+    db: Session, import_id: str | None = None, older_than_seconds: int | None = None, through_line: int | None = None
+) -> int:
+    """
+    Drop the staged rows of one import (only those up to `through_line` when given), or of
+    every import older than `older_than_seconds`. No commit.
+    """
+    if import_id is not None:
+        sql = "DELETE FROM target_import_rows WHERE import_id = :import_id"
+        if through_line is not None:
+            sql += " AND line_no <= :through_line"
+        result = db.execute(text(sql), {"import_id": import_id, "through_line": through_line})
+    else:
+        result = db.execute(
+            text("DELETE FROM target_import_rows WHERE created_at < now() - make_interval(secs => :seconds)"),
+            {"seconds": older_than_seconds},
+        )
+    return result.rowcount
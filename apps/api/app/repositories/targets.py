@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+from datetime import datetime
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.domain.models import Target
+from app.domain.models import Report, Target
 
 
 def create_target(
@@ -19,8 +23,91 @@ def create_target(
     return target
 
 
-def list_targets(db: Session, tenant_id: int) -> list[Target]:
-    return db.query(Target).filter(Target.tenant_id == tenant_id).order_by(Target.id.desc()).all()
+async def create_target_async(
+    db: AsyncSession,
+    tenant_id: int,
+    document: str,
+    name_hint: str | None,
+    target_type: str,
+) -> Target:
+    target = Target(tenant_id=tenant_id, document=document, name_hint=name_hint, type=target_type)
+    db.add(target)
+    await db.commit()
+    await db.refresh(target)
+    return target
+
+
+def _targets_page_statement(
+    tenant_id: int,
+    limit: int,
+    before_id: int | None,
+    document_prefix: str | None,
+    target_type: str | None,
+    created_from: datetime | None,
+    created_to: datetime | None,
+    report_status: str | None,
+) -> Select:
+    stmt = select(Target).where(Target.tenant_id == tenant_id)
+    if before_id is not None:
+        stmt = stmt.where(Target.id < before_id)
+    if document_prefix:
+        stmt = stmt.where(Target.document.startswith(document_prefix, autoescape=True))
+    if target_type:
+        stmt = stmt.where(func.upper(Target.type) == target_type.upper())
+    if created_from is not None:
+        stmt = stmt.where(Target.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Target.created_at < created_to)
+    if report_status:
+        stmt = stmt.join(Report, Report.id == Target.latest_report_id).where(
+            Report.summary_json["status"].as_string() == report_status
+        )
+    # One extra row tells whether another page exists without a COUNT
+    return stmt.order_by(Target.id.desc()).limit(limit + 1)
+
+
+def _page(rows: list[Target], limit: int) -> tuple[list[Target], int | None]:
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def list_targets(
+    db: Session,
+    tenant_id: int,
+    limit: int,
+    before_id: int | None = None,
+    document_prefix: str | None = None,
+    target_type: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    report_status: str | None = None,
+) -> tuple[list[Target], int | None]:
+    """
+    One keyset page of a tenant's targets, newest first: rows with id < `before_id`.
+    Returns (targets, id to continue before) — the second item is None on the last page.
+    """
+    stmt = _targets_page_statement(
+        tenant_id, limit, before_id, document_prefix, target_type, created_from, created_to, report_status
+    )
+    return _page(list(db.scalars(stmt)), limit)
+
+
+async def list_targets_async(
+    db: AsyncSession,
+    tenant_id: int,
+    limit: int,
+    before_id: int | None = None,
+    document_prefix: str | None = None,
+    target_type: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    report_status: str | None = None,
+) -> tuple[list[Target], int | None]:
+    stmt = _targets_page_statement(
+        tenant_id, limit, before_id, document_prefix, target_type, created_from, created_to, report_status
+    )
+    return _page(list(await db.scalars(stmt)), limit)
 
 
 def get_target(db: Session, tenant_id: int, target_id: int) -> Target | None:
@@ -30,3 +117,54 @@ def get_target(db: Session, tenant_id: int, target_id: int) -> Target | None:
         .filter(Target.id == target_id)
         .one_or_none()
     )
+
+
+async def get_target_async(db: AsyncSession, tenant_id: int, target_id: int) -> Target | None:
+    return await db.scalar(select(Target).where(Target.tenant_id == tenant_id, Target.id == target_id))
+
+
+def get_targets_by_ids(db: Session, tenant_id: int, target_ids: list[int]) -> list[Target]:
+    if not target_ids:
+        return []
+    return (
+        db.query(Target)
+        .filter(Target.tenant_id == tenant_id)
+        .filter(Target.id.in_(target_ids))
+        .all()
+    )
+
+
+def lock_targets(db: Session, tenant_id: int, target_ids: list[int]) -> list[tuple[int, str | None, int | None]]:
+    """(id, snapshot_hash, latest_report_id) of the targets, row-locked until the caller's commit."""
+    if not target_ids:
+        return []
+    rows = (
+        db.query(Target.id, Target.snapshot_hash, Target.latest_report_id)
+        .filter(Target.tenant_id == tenant_id)
+        .filter(Target.id.in_(target_ids))
+        .with_for_update()
+        .all()
+    )
+    return [tuple(row) for row in rows]
+
+
+def mark_verified(db: Session, tenant_id: int, hashes: dict[int, str]) -> None:
+    """Set last_verified_at = now() and the snapshot hash of each target in one statement. No commit."""
+    if not hashes:
+        return
+    params: dict = {"tenant_id": tenant_id}
+    values = []
+    for index, (target_id, value) in enumerate(hashes.items()):
+        params[f"target_{index}"] = target_id
+        params[f"hash_{index}"] = value
+        values.append(f"(CAST(:target_{index} AS integer), CAST(:hash_{index} AS varchar))")
+    db.execute(
+        text(
+            f"""
+            UPDATE targets t SET last_verified_at = now(), snapshot_hash = v.hash
+            FROM (VALUES {", ".join(values)}) AS v(id, hash)
+            WHERE t.id = v.id AND t.tenant_id = :tenant_id
+            """
+        ),
+        params,
+    )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.domain.models import Tenant
@@ -15,3 +16,8 @@ def create_tenant(db: Session, name: str) -> Tenant:
     db.commit()
     db.refresh(tenant)
     return tenant
+
+
+def list_retention_policies(db: Session) -> dict[int, int | None]:
+    """tenant id -> retention_days (None: the default policy)."""
+    return dict(db.execute(select(Tenant.id, Tenant.retention_days)).all())
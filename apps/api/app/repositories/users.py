@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.domain.models import User
@@ -13,6 +14,10 @@ def get_user_by_id(db: Session, user_id: int) -> User | None:
     return db.query(User).filter(User.id == user_id).one_or_none()
 
 
+async def get_user_by_id_async(db: AsyncSession, user_id: int) -> User | None:
+    return await db.get(User, user_id)
+
+
 def create_user(db: Session, tenant_id: int, email: str, password_hash: str, role: str) -> User:
     user = User(tenant_id=tenant_id, email=email, password_hash=password_hash, role=role)
     db.add(user)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+"""
+Partition upkeep and LGPD retention for checks and audit_log:
+
+    python -m app.retention [--once]
+
+Each pass creates the monthly partitions PARTITION_PREMAKE_MONTHS ahead, then removes
+whatever the tenants' retention policies no longer cover (see services.retention_service).
+Runs every RETENTION_INTERVAL_SECONDS; passes are idempotent, so a missed one only delays purging.
+"""
+
+import argparse
+import signal
+import threading
+
+import structlog
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+from app.db.partitions import ensure_partitions
+from app.db.session import SessionLocal, engine
+from app.services.retention_service import purge_expired
+
+logger = structlog.get_logger()
+
+
+def run_once() -> None:
+    created = ensure_partitions(engine, settings.partition_premake_months)
+    db = SessionLocal()
+    try:
+        stats = purge_expired(db)
+    finally:
+        db.close()
+    logger.info(
+        "retention_pass_done",
+        partitions_created=created,
+        partitions_removed=stats.partitions_removed,
+        rows_deleted=stats.rows_deleted,
+        blobs_deleted=stats.blobs_deleted,
+    )
+
+
+def run(stopping: threading.Event) -> None:
+    logger.info("retention_started", interval_seconds=settings.retention_interval_seconds)
+    while not stopping.is_set():
+        try:
+            run_once()
+        except Exception as exc:
+            logger.error("retention_pass_failed", error=str(exc))
+        stopping.wait(settings.retention_interval_seconds)
+    logger.info("retention_stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Partition upkeep and retention for checks/audit_log")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit (e.g. from cron)")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.once:
+        run_once()
+        return
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_args: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_args: stopping.set())
+    run(stopping)
+
+
+if __name__ == "__main__":
+    main()
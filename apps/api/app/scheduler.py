@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+"""
+Monitoring scheduler: enqueues re-checks for schedules whose next run is due.
+
+    python -m app.scheduler
+
+Safe to run more than one instance; due rows are claimed with SKIP LOCKED.
+"""
+
+import signal
+import threading
+
+import structlog
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+from app.db.session import SessionLocal
+from app.services.monitor_service import enqueue_due
+
+logger = structlog.get_logger()
+
+
+def run(stopping: threading.Event) -> None:
+    logger.info("scheduler_started", batch_size=settings.monitor_batch_size)
+    while not stopping.is_set():
+        db = SessionLocal()
+        try:
+            enqueued = enqueue_due(db)
+        except Exception as exc:
+            logger.error("scheduler_pass_failed", error=str(exc))
+            enqueued = 0
+        finally:
+            db.close()
+        # A full batch means more work is due right now
+        if enqueued < settings.monitor_batch_size:
+            stopping.wait(settings.monitor_poll_seconds)
+    logger.info("scheduler_stopped")
+
+
+def main() -> None:
+    configure_logging()
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_args: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_args: stopping.set())
+    run(stopping)
+
+
+if __name__ == "__main__":
+    main()
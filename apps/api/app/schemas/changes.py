@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ChangeOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    target_id: int
+    report_id: int
+    changes_json: dict
+    detected_at: datetime
+
+
+class ChangePage(BaseModel):
+    items: list[ChangeOut]
+    # Always set: pass it back to poll for entries after this page, even when it was empty
+    next_cursor: str
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from app.core.config import settings
+
+
+class MonitorUpsert(BaseModel):
+    interval_seconds: int = Field(default_factory=lambda: settings.monitor_default_interval_seconds)
+    paused: bool = False
+
+    @field_validator("interval_seconds")
+    @classmethod
+    def validate_interval(cls, value: int) -> int:
+        if value < settings.monitor_min_interval_seconds:
+            raise ValueError(f"interval_seconds must be at least {settings.monitor_min_interval_seconds}")
+        return value
+
+
+class MonitorOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    tenant_id: int
+    target_id: int
+    interval_seconds: int
+    paused: bool
+    next_run_at: datetime
+    last_enqueued_at: datetime | None
+    created_at: datetime
@@ -8,5 +8,7 @@ class ReportOut(BaseModel):
 
     id: int
     target_id: int
+    version: int
     summary_json: dict
+    details_blob_id: str | None = None
     created_at: datetime
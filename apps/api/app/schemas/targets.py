@@ -25,3 +25,15 @@ class TargetOut(BaseModel):
     name_hint: str | None
     type: str
     created_at: datetime
+    latest_report_id: int | None = None
+    report_version: int = 0
+    last_verified_at: datetime | None = None
+
+
+class TargetPage(BaseModel):
+    items: list[TargetOut]
+    next_cursor: str | None = None
+
+
+class BatchCheckRequest(BaseModel):
+    target_ids: list[int] = Field(min_length=1, max_length=1000)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+"""
+Throughput and latency of the hot routes (/me, /targets, report latest) served by the
+async stack against the previous thread-per-request one, while other clients keep
+running checks whose provider lookup takes --provider-ms. Sync routes hold one of the
+threadpool's workers for the whole lookup; async routes only hold a connection while
+they record the result.
+
+    python -m app.scripts.bench_async_routes [--seconds 10] [--readers 100] [--checkers 20]
+
+Requests go straight to the ASGI apps (no server, no middleware). Writes into
+DATABASE_URL under a throwaway tenant that is deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from app.api.routers import reports, targets, users
+from app.connectors import receita
+from app.core.deps import get_current_user, get_db, request_deadline, require_roles
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, async_engine
+from app.domain.models import AuditLog, Check, Report, Target, TargetChange, Tenant, User
+from app.repositories.reports import get_latest_report
+from app.repositories.targets import get_target, list_targets
+from app.schemas.auth import UserOut
+from app.schemas.reports import ReportOut
+from app.schemas.targets import TargetPage
+from app.services.check_service import CheckRecord, record_checks, run_cnpj_check
+from app.services.report_service import build_summary
+
+_PAYLOAD = {"cnpj": "12345678000195", "razao_social": "EMPRESA BENCH LTDA", "situacao": "ATIVA", "source": "bench"}
+
+
+def _sync_app() -> FastAPI:
+    # The same routes as they were before, on the sync session
+    app = FastAPI()
+    analyst = require_roles("admin", "analyst")
+
+    @app.get("/me", response_model=UserOut)
+    def me(current_user=Depends(get_current_user)):
+        return current_user
+
+    @app.get("/targets", response_model=TargetPage)
+    def list_all(db: Session = Depends(get_db), current_user=Depends(analyst)):
+        items, _next = list_targets(db, tenant_id=current_user.tenant_id, limit=50)
+        return TargetPage(items=items, next_cursor=None)
+
+    @app.get("/targets/{target_id}/report/latest", response_model=ReportOut)
+    def latest_report(target_id: int, db: Session = Depends(get_db), current_user=Depends(analyst)):
+        report = get_latest_report(db, current_user.tenant_id, target_id)
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
+        return report
+
+    @app.post("/targets/{target_id}/check")
+    def run_check(
+        target_id: int,
+        deadline: float = Depends(request_deadline),
+        db: Session = Depends(get_db),
+        current_user=Depends(analyst),
+    ):
+        target = get_target(db, current_user.tenant_id, target_id)
+        summary = run_cnpj_check(
+            db, current_user.tenant_id, target.id, target.document, deadline=deadline, audit_user_id=current_user.id
+        )
+        return {"status": "ok", "summary": summary}
+
+    return app
+
+
+def _async_app() -> FastAPI:
+    app = FastAPI()
+    for module in (users, targets, reports):
+        app.include_router(module.router)
+    return app
+
+
+def _slow_provider(delay: float):
+    async def fetch(cnpj_clean: str, use_mock: bool, opts) -> dict:
+        await asyncio.sleep(delay)
+        return {**_PAYLOAD, "cnpj": cnpj_clean}
+
+    return fetch
+
+
+async def _load(app: FastAPI, args, token: str, target_ids: list[int]) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    reads: list[float] = []
+    checks: list[float] = []
+    errors = 0
+    stop = time.perf_counter() + args.seconds
+
+    async def reader(client: httpx.AsyncClient, index: int) -> None:
+        nonlocal errors
+        paths = ["/me", "/targets", f"/targets/{target_ids[index % len(target_ids)]}/report/latest"]
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            response = await client.get(paths[(len(reads) + errors) % len(paths)], headers=headers)
+            if response.is_success:
+                reads.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    async def checker(client: httpx.AsyncClient, index: int) -> None:
+        nonlocal errors
+        path = f"/targets/{target_ids[index % len(target_ids)]}/check"
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            response = await client.post(path, headers=headers)
+            if response.is_success:
+                checks.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    # Failures such as pool checkout timeouts count as errors instead of ending the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await asyncio.gather(
+            *(reader(client, index) for index in range(args.readers)),
+            *(checker(client, index) for index in range(args.checkers)),
+        )
+    quantiles = statistics.quantiles(reads, n=20) if len(reads) > 1 else [0.0] * 19
+    return {
+        "reads/s": len(reads) / args.seconds,
+        "p50 ms": quantiles[9] * 1000,
+        "p95 ms": quantiles[18] * 1000,
+        "checks/s": len(checks) / args.seconds,
+        "errors": errors,
+    }
+
+
+async def _run(args, token: str, target_ids: list[int]) -> None:
+    print(f"{'stack':<8}{'reads/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'checks/s':>10}{'errors':>10}")
+    try:
+        for label, app in (("sync", _sync_app()), ("async", _async_app())):
+            result = await _load(app, args, token, target_ids)
+            print(f"{label:<8}" + "".join(f"{value:>10.1f}" for value in result.values()))
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--readers", type=int, default=100)
+    parser.add_argument("--checkers", type=int, default=20)
+    parser.add_argument("--provider-ms", type=float, default=500.0)
+    parser.add_argument("--targets", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    tenant = Tenant(name=f"bench-{uuid4().hex[:8]}")
+    db.add(tenant)
+    db.flush()
+    user = User(tenant_id=tenant.id, email=f"{tenant.name}@example.com", password_hash="x", role="admin")
+    bench_targets = [Target(tenant_id=tenant.id, type="CNPJ", document=_PAYLOAD["cnpj"]) for _ in range(args.targets)]
+    db.add_all([user, *bench_targets])
+    db.commit()
+    tenant_id, user_id = tenant.id, user.id
+    target_ids = [target.id for target in bench_targets]
+    # Every target starts with a report, so later checks find nothing new and only mark it verified
+    record_checks(db, tenant_id, [CheckRecord(target_id, "ok", _PAYLOAD, build_summary(_PAYLOAD)) for target_id in target_ids])
+
+    original = receita._fetch_cnpj
+    receita._fetch_cnpj = _slow_provider(args.provider_ms / 1000)
+    try:
+        asyncio.run(_run(args, create_access_token(str(user_id), tenant_id, "admin"), target_ids))
+    finally:
+        receita._fetch_cnpj = original
+        db.execute(delete(TargetChange).where(TargetChange.tenant_id == tenant_id))
+        db.execute(update(Target).where(Target.tenant_id == tenant_id).values(latest_report_id=None))
+        for model in (AuditLog, Report, Check, Target, User):
+            db.execute(delete(model).where(model.tenant_id == tenant_id))
+        db.execute(delete(Tenant).where(Tenant.id == tenant_id))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+"""
+Compare cached CNPJ value formats: bytes per entry and decode latency.
+
+    python -m app.scripts.bench_cache_codec [--entries 2000] [--redis]
+
+`legacy` is the pre-codec format (plain json.dumps of the envelope). With --redis
+the entries are also written to REDIS_URL and `MEMORY USAGE` is sampled per key.
+"""
+
+import argparse
+import json
+import random
+import time
+
+import redis
+
+from app.connectors import codec
+from app.core.config import settings
+
+
+def _sample_payload(index: int) -> dict:
+    # Shape of a publica.cnpj.ws answer after normalization, including the raw full_data
+    rng = random.Random(index)
+    cnpj = f"{rng.randrange(10**13):014d}"
+    partners = [
+        {
+            "nome": f"SOCIO {rng.randrange(10**6)} DA SILVA",
+            "tipo": "Pessoa Física",
+            "qualificacao_socio": {"id": 49, "descricao": "Sócio-Administrador"},
+            "cpf_cnpj_socio": f"***{rng.randrange(10**6):06d}**",
+            "data_entrada": "2015-03-12",
+            "faixa_etaria": "Entre 41 a 50 anos",
+        }
+        for _ in range(rng.randint(1, 6))
+    ]
+    activities = [
+        {"id": f"{rng.randrange(10**7):07d}", "secao": "G", "descricao": "Comércio varejista de mercadorias em geral"}
+        for _ in range(rng.randint(1, 12))
+    ]
+    full_data = {
+        "cnpj_raiz": cnpj[:8],
+        "razao_social": f"EMPRESA {index} COMERCIO E SERVICOS LTDA",
+        "capital_social": f"{rng.randrange(10**7)}.00",
+        "porte": {"id": "03", "descricao": "Demais"},
+        "natureza_juridica": {"id": "2062", "descricao": "Sociedade Empresária Limitada"},
+        "socios": partners,
+        "estabelecimento": {
+            "cnpj": cnpj,
+            "nome_fantasia": f"LOJA {index}",
+            "situacao_cadastral": "Ativa",
+            "data_inicio_atividade": "2010-01-01",
+            "logradouro": "AVENIDA PAULISTA",
+            "numero": str(rng.randrange(3000)),
+            "bairro": "BELA VISTA",
+            "cep": f"{rng.randrange(10**8):08d}",
+            "cidade": {"id": 3550308, "nome": "São Paulo", "ibge_id": 3550308},
+            "estado": {"id": 26, "nome": "São Paulo", "sigla": "SP"},
+            "atividade_principal": activities[0],
+            "atividades_secundarias": activities[1:],
+            "inscricoes_estaduais": [{"inscricao_estadual": f"{rng.randrange(10**12)}", "ativo": True}],
+        },
+    }
+    payload = {
+        "cnpj": cnpj,
+        "razao_social": full_data["razao_social"],
+        "situacao": "ATIVA",
+        "data_abertura": "2010-01-01",
+        "source": "publica.cnpj.ws",
+        "full_data": full_data,
+    }
+    return {"payload": payload, "fresh_until": time.time() + settings.cnpj_cache_ttl_seconds}
+
+
+def _variants() -> dict[str, tuple[str, str] | None]:
+    variants: dict[str, tuple[str, str] | None] = {"legacy": None}
+    codecs = ["json"] + (["msgpack"] if codec.msgpack is not None else [])
+    compressions = ["none", "zlib"] + (["zstd"] if codec.zstandard is not None else [])
+    for name in codecs:
+        for compression in compressions:
+            variants[f"{name}+{compression}"] = (name, compression)
+    return variants
+
+
+def _encode(value: dict, variant: tuple[str, str] | None) -> bytes:
+    if variant is None:
+        return json.dumps(value).encode("utf-8")
+    return codec.encode(value, codec=variant[0], compression=variant[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--redis", action="store_true", help="also measure MEMORY USAGE in REDIS_URL")
+    args = parser.parse_args()
+
+    values = [_sample_payload(index) for index in range(args.entries)]
+    client = redis.Redis.from_url(settings.redis_url) if args.redis else None
+
+    header = f"{'format':<16}{'avg bytes':>12}{'decode µs':>12}"
+    if client:
+        header += f"{'redis bytes':>14}"
+    print(header)
+    for name, variant in _variants().items():
+        encoded = [_encode(value, variant) for value in values]
+        start = time.perf_counter()
+        for raw in encoded:
+            codec.decode(raw)
+        decode_us = (time.perf_counter() - start) / len(encoded) * 1e6
+        line = f"{name:<16}{sum(map(len, encoded)) / len(encoded):>12.0f}{decode_us:>12.1f}"
+
+        if client:
+            keys = [f"bench:codec:{name}:{index}" for index in range(len(encoded))]
+            pipe = client.pipeline(transaction=False)
+            for key, raw in zip(keys, encoded):
+                pipe.set(key, raw, ex=300)
+            pipe.execute()
+            sample = keys[:: max(1, len(keys) // 200)]
+            usage = [client.memory_usage(key) or 0 for key in sample]
+            client.delete(*keys)
+            line += f"{sum(usage) / len(usage):>14.0f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+"""
+Statements, commits and latency per recorded check: the previous per-row path
+(add + commit + refresh for check, report and audit) against the unit of work.
+Each round flips `situacao` so every check writes a report; the "unchanged" row
+re-records the same data, which only marks the targets as verified.
+
+    python -m app.scripts.bench_check_writes [--checks 200] [--batch 50]
+
+Writes into DATABASE_URL under a throwaway tenant that is deleted afterwards.
+"""
+
+import argparse
+import time
+from uuid import uuid4
+
+from sqlalchemy import delete, event, update
+
+from app.db.session import SessionLocal, engine
+from app.domain.models import AuditLog, Check, Report, Target, TargetChange, Tenant, User
+from app.services.check_service import AuditEntry, CheckRecord, record_checks
+from app.services.report_service import build_summary
+
+_PAYLOAD = {
+    "cnpj": "12345678000195",
+    "razao_social": "EMPRESA BENCH LTDA",
+    "situacao": "ATIVA",
+    "source": "bench",
+    "full_data": {"socios": [{"nome": "SOCIO"}] * 3},
+}
+
+
+class _Counter:
+    def __init__(self) -> None:
+        self.statements = 0
+        self.commits = 0
+
+    def __enter__(self) -> "_Counter":
+        event.listen(engine, "before_cursor_execute", self._statement)
+        event.listen(engine, "commit", self._commit)
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        event.remove(engine, "before_cursor_execute", self._statement)
+        event.remove(engine, "commit", self._commit)
+
+    def _statement(self, *_args) -> None:
+        self.statements += 1
+
+    def _commit(self, *_args) -> None:
+        self.commits += 1
+
+
+def _legacy(db, tenant_id: int, user_id: int, target_id: int) -> None:
+    # What run_cnpj_check + log_event used to do for one successful check
+    for row in (
+        Check(tenant_id=tenant_id, target_id=target_id, provider="receita", status="ok", raw_payload_json=_PAYLOAD),
+        Report(tenant_id=tenant_id, target_id=target_id, version=1, summary_json=build_summary(_PAYLOAD)),
+        AuditLog(tenant_id=tenant_id, user_id=user_id, action="check_run", metadata_json={"target_id": target_id}),
+    ):
+        db.add(row)
+        db.commit()
+        db.refresh(row)
+
+
+def _payload(round_: int) -> dict:
+    return {**_PAYLOAD, "situacao": ("ATIVA", "SUSPENSA")[round_ % 2]}
+
+
+def _unit_of_work(db, tenant_id: int, user_id: int, target_ids: list[int], payload: dict = _PAYLOAD) -> None:
+    records = [CheckRecord(target_id, "ok", payload, build_summary(payload)) for target_id in target_ids]
+    record_checks(db, tenant_id, records, AuditEntry(user_id, "check_run", {"target_ids": target_ids}))
+
+
+def _measure(label: str, checks: int, run) -> None:
+    with _Counter() as counter:
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+    print(
+        f"{label:<22}{counter.statements / checks:>12.2f}{counter.commits / checks:>10.2f}"
+        f"{(counter.statements + counter.commits) / checks:>14.2f}{elapsed / checks * 1000:>10.2f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--checks", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    tenant = Tenant(name=f"bench-{uuid4().hex[:8]}")
+    db.add(tenant)
+    db.flush()
+    user = User(tenant_id=tenant.id, email=f"{tenant.name}@bench.local", password_hash="x", role="admin")
+    targets = [Target(tenant_id=tenant.id, type="CNPJ", document=_PAYLOAD["cnpj"]) for _ in range(args.batch)]
+    db.add_all([user, *targets])
+    db.commit()
+    # Plain ids: reading attributes of expired ORM objects would add SELECTs to the counts
+    tenant_id, user_id = tenant.id, user.id
+    target_ids = [target.id for target in targets]
+
+    try:
+        print(f"{'path':<22}{'stmts/chk':>12}{'commits':>10}{'round-trips':>14}{'ms/chk':>10}")
+        _measure(
+            "per-row (before)",
+            args.checks,
+            lambda: [_legacy(db, tenant_id, user_id, target_ids[i % len(target_ids)]) for i in range(args.checks)],
+        )
+        _measure(
+            "unit of work",
+            args.checks,
+            lambda: [
+                _unit_of_work(db, tenant_id, user_id, [target_ids[i % len(target_ids)]], _payload(i // len(target_ids)))
+                for i in range(args.checks)
+            ],
+        )
+        rounds = max(1, args.checks // len(target_ids))
+        _measure(
+            f"batch of {len(target_ids)}",
+            rounds * len(target_ids),
+            lambda: [_unit_of_work(db, tenant_id, user_id, target_ids, _payload(r + 1)) for r in range(rounds)],
+        )
+        _measure(
+            "unchanged",
+            rounds * len(target_ids),
+            lambda: [_unit_of_work(db, tenant_id, user_id, target_ids, _payload(rounds)) for _ in range(rounds)],
+        )
+    finally:
+        db.execute(delete(TargetChange).where(TargetChange.tenant_id == tenant_id))
+        db.execute(update(Target).where(Target.tenant_id == tenant_id).values(latest_report_id=None))
+        for model in (AuditLog, Report, Check, Target, User):
+            db.execute(delete(model).where(model.tenant_id == tenant_id))
+        db.execute(delete(Tenant).where(Tenant.id == tenant_id))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
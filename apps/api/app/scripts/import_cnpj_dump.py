@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+"""
+Import the Receita Federal open-data CNPJ dump into cnpj_registry:
+
+    python -m app.scripts.import_cnpj_dump /data/cnpj/2026-09 --release 2026-09
+
+Paths may be directories, .zip archives as published, or extracted CSVs. Re-running
+with a newer release only rewrites rows that changed.
+"""
+
+import argparse
+from datetime import date
+from pathlib import Path
+
+from app.db.session import engine
+from app.services.registry_import import import_dump
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import the Receita CNPJ open-data dump")
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument("--release", default=date.today().strftime("%Y-%m"), help="dump release label, e.g. 2026-09")
+    args = parser.parse_args()
+
+    stats = import_dump(engine, args.paths, args.release)
+    print(
+        f"release {stats.release}: {len(stats.files)} files, {stats.empresas_rows} empresas, "
+        f"{stats.estabelecimentos_rows} estabelecimentos, {stats.upserted} rows inserted/updated"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.repositories.audit_logs import create_audit_log
+from app.repositories.audit_logs import create_audit_log, create_audit_log_async
 
 
 def log_event(db: Session, tenant_id: int, user_id: int, action: str, metadata: dict | None = None) -> None:
@@ -11,3 +12,12 @@ def log_event(db: Session, tenant_id: int, user_id: int, action: str, metadata:
     except Exception:
         # Best-effort audit; avoid breaking main flow
         db.rollback()
+
+
+async def log_event_async(
+    db: AsyncSession, tenant_id: int, user_id: int, action: str, metadata: dict | None = None
+) -> None:
+    try:
+        await create_audit_log_async(db, tenant_id, user_id, action, metadata or {})
+    except Exception:
+        await db.rollback()
@@ -7,7 +7,7 @@ from app.core.security import create_access_token, create_refresh_token, hash_pa
 from app.repositories.tenants import create_tenant, get_tenant_by_name
 from app.repositories.users import create_user, get_user_by_email
 from app.core.metrics import record_login, record_registration
-from sqlalchemy import text
+from app.db.rls import tenant_context
 
 
 def register_user(db: Session, email: str, password: str, tenant_name: str) -> tuple[str, str, int]:
@@ -20,7 +20,7 @@ def register_user(db: Session, email: str, password: str, tenant_name: str) -> t
 
     tenant = create_tenant(db, tenant_name)
     try:
-        db.execute(text(f"SET LOCAL app.tenant_id = {int(tenant.id)}"))
+        db.execute(tenant_context(tenant.id))
     except Exception:
         pass
     user = create_user(db, tenant.id, email, hash_password(password), role="admin")
@@ -1,45 +1,280 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+
 import httpx
 from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.connectors.receita import fetch_cnpj
+from app.connectors.receita import CnpjNotFound, fetch_cnpj, fetch_cnpj_async, fetch_cnpj_many
 from app.core.config import settings
-from app.core.metrics import record_cnpj_check
-from app.repositories.checks import create_check
-from app.repositories.reports import create_report
-from app.services.report_service import build_summary
+from app.core.deadline import DeadlineExceeded, check as check_deadline
+from app.core.metrics import record_cnpj_check, record_report_skipped
+from app.db.rls import tenant_context
+from app.domain.models import Target
+from app.repositories.audit_logs import insert_audit_log
+from app.repositories.checks import insert_checks
+from app.repositories.reports import get_report_summaries, insert_reports
+from app.repositories.target_changes import insert_changes
+from app.repositories.targets import lock_targets, mark_verified
+from app.services.payload_store import store_documents
+from app.services.report_service import build_summary, diff_summaries, snapshot_hash
+
+
+@dataclass
+class CheckRecord:
+    target_id: int
+    status: str
+    payload: dict
+    summary: dict | None = None  # successful checks also get a report
+
+
+@dataclass
+class AuditEntry:
+    user_id: int
+    action: str
+    metadata: dict
 
 
-def run_cnpj_check(db: Session, tenant_id: int, target_id: int, cnpj: str) -> dict:
+def _detect_changes(db: Session, tenant_id: int, summaries: dict[int, dict]) -> tuple[set[int], dict[int, dict], dict[int, str]]:
+    """
+    Compare new summaries with each target's current snapshot (row-locked, so concurrent checks of
+    one target serialize). Returns (unchanged target ids, diffs of changed targets, new hashes).
+    The previous report is only read when the stored hash differs or predates change detection.
+    """
+    hashes = {target_id: snapshot_hash(summary) for target_id, summary in summaries.items()}
+    unchanged: set[int] = set()
+    pending: dict[int, int] = {}  # target id -> latest report id to diff against
+    for target_id, stored_hash, latest_report_id in lock_targets(db, tenant_id, list(summaries)):
+        if stored_hash == hashes[target_id]:
+            unchanged.add(target_id)
+        elif latest_report_id is not None:
+            pending[target_id] = latest_report_id
+
+    diffs: dict[int, dict] = {}
+    previous = get_report_summaries(db, list(pending.values()))
+    for target_id, report_id in pending.items():
+        diff = diff_summaries(previous.get(report_id, {}), summaries[target_id])
+        if diff:
+            diffs[target_id] = diff
+        else:
+            # Hash missing or from an older summary shape, but no relevant field moved
+            unchanged.add(target_id)
+    return unchanged, diffs, hashes
+
+
+def record_checks(db: Session, tenant_id: int, records: list[CheckRecord], audit: AuditEntry | None = None) -> list[int]:
+    """
+    Unit of work for check results: the checks, their reports, change-feed entries and the
+    audit entry go out as one multi-row INSERT per table and a single commit. Returns the
+    ids of the checks written.
+
+    Successful checks whose relevant fields match the target's snapshot write no check or
+    report; they only bump the target's last_verified_at. The raw provider document
+    (`full_data`, repeated as the report `details`) is written once to payload_blobs and
+    referenced by id from both rows.
+    """
     try:
-        payload = fetch_cnpj(cnpj, use_mock=settings.use_mock_connectors)
-    except Exception as exc:
-        create_check(
+        summaries = {record.target_id: record.summary for record in records if record.summary is not None}
+        unchanged, diffs, hashes = _detect_changes(db, tenant_id, summaries) if summaries else (set(), {}, {})
+        records = [record for record in records if record.summary is None or record.target_id not in unchanged]
+
+        documents = [record.payload["full_data"] for record in records if record.payload.get("full_data")]
+        blob_ids = iter(store_documents(db, documents) if documents else [])
+        check_rows: list[dict] = []
+        report_rows: list[tuple[int, dict, str | None]] = []
+        for record in records:
+            payload, blob_id = record.payload, None
+            if payload.get("full_data"):
+                blob_id = next(blob_ids)
+                payload = {key: value for key, value in payload.items() if key != "full_data"}
+            check_rows.append(
+                {
+                    "tenant_id": tenant_id,
+                    "target_id": record.target_id,
+                    "provider": "receita",
+                    "status": record.status,
+                    "raw_payload_json": payload,
+                    "payload_blob_id": blob_id,
+                }
+            )
+            if record.summary is not None:
+                summary = {key: value for key, value in record.summary.items() if key != "details"}
+                report_rows.append((record.target_id, summary, blob_id))
+        check_ids = insert_checks(db, check_rows)
+        report_ids = insert_reports(db, tenant_id, report_rows)
+        insert_changes(
             db,
-            tenant_id,
-            target_id,
-            provider="receita",
-            status="error",
-            payload={"cnpj": cnpj, "error": str(exc), "source": "publica.cnpj.ws"},
+            [
+                {"tenant_id": tenant_id, "target_id": target_id, "report_id": report_ids[target_id], "changes_json": diff}
+                for target_id, diff in diffs.items()
+                if target_id in report_ids
+            ],
         )
-        record_cnpj_check("error", "error")
-        # Include the actual error message for debugging
-        detail = f"Falha ao consultar CNPJ: {str(exc)}"
-        
-        if isinstance(exc, httpx.TimeoutException):
-            detail = f"Falha ao consultar CNPJ (timeout): {str(exc)}"
-        if isinstance(exc, httpx.HTTPStatusError) and exc.response is not None:
-            detail = f"Falha ao consultar CNPJ (status {exc.response.status_code})"
-            
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=detail,
-        ) from exc
-
-    create_check(db, tenant_id, target_id, provider="receita", status="ok", payload=payload)
-    summary = build_summary(payload)
-    create_report(db, tenant_id, target_id, version=1, summary=summary)
+        mark_verified(db, tenant_id, hashes)
+        if audit is not None:
+            insert_audit_log(db, tenant_id, audit.user_id, audit.action, audit.metadata)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if unchanged:
+        record_report_skipped(len(unchanged))
+    return check_ids
+
+
+def _check_budget(deadline: float | None) -> None:
+    try:
+        check_deadline(deadline, "CNPJ check")
+    except DeadlineExceeded as exc:
+        record_cnpj_check("timeout", "deadline")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
+
+
+def _failed_lookup(target_id: int, cnpj: str, exc: Exception) -> tuple[CheckRecord | None, HTTPException]:
+    """The check to record for a failed lookup (None when nothing is written) and the error to answer with."""
+    if isinstance(exc, ValueError):
+        # Rejected by check-digit validation before any I/O
+        record_cnpj_check("invalid", "validation")
+        return None, HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"CNPJ inválido: {exc}")
+    if isinstance(exc, CnpjNotFound):
+        record_cnpj_check("not_found", exc.source)
+        record = CheckRecord(target_id, "not_found", {"cnpj": cnpj, "error": str(exc), "source": exc.source})
+        return record, HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    if isinstance(exc, DeadlineExceeded):
+        record_cnpj_check("timeout", "deadline")
+        record = CheckRecord(target_id, "timeout", {"cnpj": cnpj, "error": str(exc), "source": "deadline"})
+        return record, HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"Tempo limite da consulta CNPJ excedido: {exc}",
+        )
+
+    record_cnpj_check("error", "error")
+    record = CheckRecord(target_id, "error", {"cnpj": cnpj, "error": str(exc), "source": "publica.cnpj.ws"})
+    # Include the actual error message for debugging
+    detail = f"Falha ao consultar CNPJ: {str(exc)}"
+    if isinstance(exc, httpx.TimeoutException):
+        detail = f"Falha ao consultar CNPJ (timeout): {str(exc)}"
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response is not None:
+        detail = f"Falha ao consultar CNPJ (status {exc.response.status_code})"
+    return record, HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=detail)
+
+
+def _check_audit(record: CheckRecord, audit_user_id: int | None) -> AuditEntry | None:
+    if audit_user_id is None:
+        return None
+    metadata = {"target_id": record.target_id, "status": (record.summary or {}).get("status", record.status)}
+    return AuditEntry(audit_user_id, "check_run", metadata)
+
+
+async def _record_async(db: AsyncSession, tenant_id: int, record: CheckRecord, audit_user_id: int | None) -> None:
+    await db.execute(tenant_context(tenant_id))
+    await db.run_sync(record_checks, tenant_id, [record], _check_audit(record, audit_user_id))
+
+
+def run_cnpj_check(
+    db: Session,
+    tenant_id: int,
+    target_id: int,
+    cnpj: str,
+    deadline: float | None = None,
+    audit_user_id: int | None = None,
+) -> dict:
+    """Check one CNPJ and record the outcome; with `audit_user_id` the `check_run` audit entry shares its transaction."""
+    _check_budget(deadline)
+    try:
+        payload = fetch_cnpj(cnpj, use_mock=settings.use_mock_connectors, deadline=deadline)
+    except Exception as exc:
+        record, error = _failed_lookup(target_id, cnpj, exc)
+        if record is not None:
+            record_checks(db, tenant_id, [record], _check_audit(record, audit_user_id))
+        raise error from exc
+
+    record = CheckRecord(target_id, "ok", payload, build_summary(payload))
+    record_checks(db, tenant_id, [record], _check_audit(record, audit_user_id))
+    record_cnpj_check("success", payload.get("source", "unknown"))
+    return record.summary
+
+
+async def run_cnpj_check_async(
+    db: AsyncSession,
+    tenant_id: int,
+    target_id: int,
+    cnpj: str,
+    deadline: float | None = None,
+    audit_user_id: int | None = None,
+) -> dict:
+    """
+    run_cnpj_check for async routes. The caller's transaction is committed before the provider
+    lookup so no connection is held while it is awaited; the outcome is recorded by
+    record_checks in a new transaction scoped to the tenant again.
+    """
+    _check_budget(deadline)
+    await db.commit()
+    try:
+        payload = await fetch_cnpj_async(cnpj, use_mock=settings.use_mock_connectors, deadline=deadline)
+    except Exception as exc:
+        record, error = _failed_lookup(target_id, cnpj, exc)
+        if record is not None:
+            await _record_async(db, tenant_id, record, audit_user_id)
+        raise error from exc
+
+    record = CheckRecord(target_id, "ok", payload, build_summary(payload))
+    await _record_async(db, tenant_id, record, audit_user_id)
     record_cnpj_check("success", payload.get("source", "unknown"))
-    return summary
+    return record.summary
+
+
+def run_cnpj_checks_batch(
+    db: Session,
+    tenant_id: int,
+    targets: list[Target],
+    deadline: float | None = None,
+    audit_user_id: int | None = None,
+) -> list[dict]:
+    """
+    Check many targets with one bulk connector lookup; per-target errors do not abort the batch.
+    The caller's transaction is committed before the lookup so no pooled connection is held
+    while it runs; all outcomes (and the `check_batch` audit entry) are then written in one
+    transaction. Lookups still pending at `deadline` are recorded as timeouts.
+    """
+    _check_budget(deadline)
+    # Committing expires the ORM objects, so read what the lookup needs first
+    items = [(target.id, target.document) for target in targets]
+    db.commit()
+    lookups = fetch_cnpj_many(
+        [document for _target_id, document in items],
+        use_mock=settings.use_mock_connectors,
+        token_wait=settings.cnpj_rate_limit_bulk_wait_seconds,
+        deadline=deadline,
+    )
+    records: list[CheckRecord] = []
+    results: list[dict] = []
+    for (target_id, document), lookup in zip(items, lookups):
+        if not lookup["ok"]:
+            if lookup.get("not_found"):
+                check_status, source = "not_found", "batch"
+            elif lookup.get("timed_out"):
+                check_status, source = "timeout", "deadline"
+            else:
+                check_status, source = "error", "batch"
+            records.append(CheckRecord(target_id, check_status, {"cnpj": document, "error": lookup["error"], "source": source}))
+            record_cnpj_check(check_status, "error" if check_status == "error" else source)
+            results.append({"target_id": target_id, "status": check_status, "error": lookup["error"]})
+            continue
+
+        payload = lookup["data"]
+        summary = build_summary(payload)
+        records.append(CheckRecord(target_id, "ok", payload, summary))
+        record_cnpj_check("success", payload.get("source", "unknown"))
+        results.append({"target_id": target_id, "status": "ok", "summary": summary})
+
+    audit = None
+    if audit_user_id is not None:
+        ok = sum(1 for item in results if item["status"] == "ok")
+        audit = AuditEntry(audit_user_id, "check_batch", {"target_ids": [target_id for target_id, _ in items], "ok": ok})
+    if records or audit:
+        db.execute(tenant_context(tenant_id))
+        record_checks(db, tenant_id, records, audit)
+    return results
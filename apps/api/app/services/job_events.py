@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import AsyncIterator, Awaitable, Callable
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.services import job_queue
+
+_EVENT_ID = re.compile(r"^\d+-\d+$")
+
+
+def _stream_id(value: str) -> tuple[int, int]:
+    millis, _, seq = value.partition("-")
+    return int(millis), int(seq)
+
+
+def format_event(event_id: str, event: str, data: str) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+async def stream_events(
+    tenant_id: int,
+    last_event_id: str | None,
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for one tenant's jobs, tailing the capped event log written by
+    job_queue._set_job_state. Entry ids double as SSE ids, so a client reconnecting with
+    Last-Event-ID resumes right after the last event it saw; if that point was already
+    trimmed a `reset` event tells it to reload state from GET /jobs/{id}.
+    """
+    client = aioredis.Redis.from_url(settings.redis_url, decode_responses=True)
+    key = job_queue.events_key(tenant_id)
+    try:
+        yield "retry: 3000\n\n"
+        if last_event_id and _EVENT_ID.match(last_event_id):
+            cursor = last_event_id
+            oldest = await client.xrange(key, count=1)
+            # "0-0" asks for everything still retained, so there is nothing to have missed
+            if last_event_id != "0-0" and oldest and _stream_id(oldest[0][0]) > _stream_id(last_event_id):
+                yield format_event(last_event_id, "reset", json.dumps({"type": "reset"}))
+        else:
+            # New subscription: only what happens from now on. A concrete id (unlike "$")
+            # leaves no gap between consecutive blocking reads.
+            newest = await client.xrevrange(key, count=1)
+            cursor = newest[0][0] if newest else "0-0"
+        while not await is_disconnected():
+            entries = await client.xread(
+                {key: cursor}, count=100, block=int(settings.job_events_heartbeat_seconds * 1000)
+            )
+            if not entries:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            for _, messages in entries:
+                for message_id, fields in messages:
+                    cursor = message_id
+                    data = fields["data"]
+                    yield format_event(message_id, json.loads(data)["type"], data)
+    finally:
+        await client.aclose()
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import json
+import time
 from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 from uuid import uuid4
 
 import redis
 import structlog
+from fastapi import HTTPException
+from redis.exceptions import RedisError, WatchError
 
 from app.core.config import settings
+from app.core.deadline import deadline_in
+from app.core.metrics import record_job_event
 from app.db.session import SessionLocal
 
 logger = structlog.get_logger()
@@ -15,6 +21,223 @@ logger = structlog.get_logger()
 _executor: ThreadPoolExecutor | None = None
 _redis_client: redis.Redis | None = None
 JOB_TTL_SECONDS = 3600 * 6  # 6h para acompanhar checks em filas curtas
+TERMINAL_STATES = ("done", "error")
+ACTIVE_STATES = ("queued", "running", "retrying")
+
+# Durable queue on Redis Streams, one stream per (priority class, tenant) so a tenant's
+# backlog only ever delays that tenant. Tenants with undelivered jobs sit in a per-class
+# ring that workers walk with deficit round-robin (see _PICK_SCRIPT); every stream shares
+# the `check-workers` consumer group (see app.worker). Failed jobs wait in a ZSET scored
+# by their retry time and are pushed back once due; jobs out of attempts are dead-lettered.
+PREFIX = "jobs:checks"
+GROUP = "check-workers"
+PRIORITIES = ("interactive", "bulk")
+# Jobs are checks unless their `kind` field says otherwise
+IMPORT_KIND = "import"
+DEAD_MAXLEN = 100_000
+
+# Shared by the enqueue and retry-promotion scripts. Like every script here it only touches
+# keys it is handed: KEYS[1..4] are the job's tenant stream, the set of streams, and the
+# active set and ring of its class (see _push_keys).
+_PUSH_LUA = """
+local function push(group, fields)
+  local tenant
+  for i = 1, #fields, 2 do
+    if fields[i] == 'tenant_id' then tenant = fields[i + 1] end
+  end
+  if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('XGROUP', 'CREATE', KEYS[1], group, '0', 'MKSTREAM')
+  end
+  local id = redis.call('XADD', KEYS[1], '*', unpack(fields))
+  redis.call('SADD', KEYS[2], KEYS[1])
+  if redis.call('SADD', KEYS[3], tenant) == 1 then
+    redis.call('RPUSH', KEYS[4], tenant)
+  end
+  return id
+end
+"""
+
+_ENQUEUE_SCRIPT = _PUSH_LUA + """
+local fields = {}
+for i = 2, #ARGV do fields[#fields + 1] = ARGV[i] end
+return push(ARGV[1], fields)
+"""
+
+# Move one due retry (ARGV[2]) from the delayed set (KEYS[5]) back into its tenant stream;
+# only the worker whose ZREM wins requeues it, so two workers never both push one job.
+_PROMOTE_SCRIPT = _PUSH_LUA + """
+if redis.call('ZREM', KEYS[5], ARGV[2]) == 0 then return 0 end
+local fields = {}
+for k, v in pairs(cjson.decode(ARGV[2])) do
+  fields[#fields + 1] = k
+  fields[#fields + 1] = tostring(v)
+end
+push(ARGV[1], fields)
+return 1
+"""
+
+# Dedup before enqueue. KEYS: in-flight job of the target, its last finished job, the
+# client's Idempotency-Key, the new job's state key, then the state keys of the jobs those
+# three pointers held when _claim_many read them (ARGV[5..7]); '' stands for an absent key.
+# Returns the job to reuse, false after registering ARGV[1] as the target's in-flight job
+# with its "queued" state, or 0 when a pointer moved since it was read.
+_CLAIM_SCRIPT = """
+for i = 1, 3 do
+  local current = KEYS[i] ~= '' and redis.call('GET', KEYS[i]) or ''
+  if current ~= ARGV[4 + i] then return 0 end
+end
+local function has_state(i, states)
+  if KEYS[4 + i] == '' then return false end
+  local raw = redis.call('GET', KEYS[4 + i])
+  if not raw then return false end
+  local status = cjson.decode(raw)['status']
+  for _, state in ipairs(states) do
+    if state == status then return true end
+  end
+  return false
+end
+local function reuse(i)
+  if KEYS[3] ~= '' then redis.call('SET', KEYS[3], ARGV[4 + i], 'EX', ARGV[3]) end
+  return ARGV[4 + i]
+end
+if KEYS[7] ~= '' and redis.call('EXISTS', KEYS[7]) == 1 then return ARGV[7] end
+if has_state(1, {'queued', 'running', 'retrying'}) then return reuse(1) end
+if has_state(2, {'done'}) then return reuse(2) end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('SET', KEYS[4], ARGV[4], 'EX', ARGV[2])
+if KEYS[3] ~= '' then redis.call('SET', KEYS[3], ARGV[1], 'EX', ARGV[3]) end
+return false
+"""
+# Rounds of read-then-claim before an enqueue gives up on a target whose pointers keep moving
+_CLAIM_ATTEMPTS = 5
+
+# Undo a claim whose job never reached its stream. KEYS: in-flight pointer, Idempotency-Key
+# ('' if none), job state; the pointers are only dropped while they still hold ARGV[1].
+_UNCLAIM_SCRIPT = """
+for i = 1, 2 do
+  if KEYS[i] ~= '' and redis.call('GET', KEYS[i]) == ARGV[1] then redis.call('DEL', KEYS[i]) end
+end
+redis.call('DEL', KEYS[3])
+return 1
+"""
+
+# On a final state: free the target's in-flight slot (only if still ours) and, on success,
+# remember the job so enqueues inside the reuse window get its result instead.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then redis.call('DEL', KEYS[1]) end
+if ARGV[2] == 'done' and tonumber(ARGV[3]) > 0 then
+  redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[3])
+end
+return 1
+"""
+
+# Deficit round-robin over the tenants of one class: the tenant at the head of the ring is
+# served up to its weight (default ARGV[4]) in consecutive picks, then rotated to the tail.
+# Tenants with nothing undelivered leave the ring until their next enqueue.
+# KEYS: ring, deficits, active set and weights of the class, then the stream of the tenant
+# pick() read at the head of the ring (ARGV[3]). Returns {stream, message id, fields}, false
+# when the class is empty, or 0 when the head moved or the tenant was drained and left.
+_PICK_SCRIPT = """
+local group, consumer, tenant = ARGV[1], ARGV[2], ARGV[3]
+local head = redis.call('LINDEX', KEYS[1], 0)
+if not head then return false end
+if head ~= tenant then return 0 end
+local res = redis.call('XREADGROUP', 'GROUP', group, consumer, 'COUNT', 1, 'STREAMS', KEYS[5], '>')
+if not res then
+  redis.call('LPOP', KEYS[1])
+  redis.call('SREM', KEYS[3], tenant)
+  redis.call('HDEL', KEYS[2], tenant)
+  return 0
+end
+local left = tonumber(redis.call('HGET', KEYS[2], tenant) or '0')
+if left <= 0 then
+  left = tonumber(redis.call('HGET', KEYS[4], tenant) or ARGV[4])
+end
+left = left - 1
+if left <= 0 then
+  redis.call('HDEL', KEYS[2], tenant)
+  redis.call('LMOVE', KEYS[1], KEYS[1], 'LEFT', 'RIGHT')
+else
+  redis.call('HSET', KEYS[2], tenant, left)
+end
+local entry = res[1][2][1]
+return {KEYS[5], entry[1], entry[2]}
+"""
+
+
+def streams_key() -> str:
+    return f"{PREFIX}:streams"
+
+
+def stream_key(priority: str, tenant_id: int | str) -> str:
+    return f"{PREFIX}:{priority}:tenant:{tenant_id}"
+
+
+def ring_key(priority: str) -> str:
+    return f"{PREFIX}:{priority}:ring"
+
+
+def active_key(priority: str) -> str:
+    return f"{PREFIX}:{priority}:active"
+
+
+def deficit_key(priority: str) -> str:
+    return f"{PREFIX}:{priority}:deficit"
+
+
+def delayed_key() -> str:
+    return f"{PREFIX}:delayed"
+
+
+def dead_key() -> str:
+    return f"{PREFIX}:dead"
+
+
+def weights_key() -> str:
+    return f"{PREFIX}:weights"
+
+
+def events_key(tenant_id: int | str) -> str:
+    return f"{PREFIX}:events:{tenant_id}"
+
+
+def batch_key(batch_id: str) -> str:
+    return f"{PREFIX}:batch:{batch_id}"
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def inflight_key(tenant_id: int | str, target_id: int | str) -> str:
+    return f"{PREFIX}:inflight:{tenant_id}:{target_id}"
+
+
+def recent_key(tenant_id: int | str, target_id: int | str) -> str:
+    return f"{PREFIX}:recent:{tenant_id}:{target_id}"
+
+
+def idempotency_key(tenant_id: int | str, key: str) -> str:
+    return f"{PREFIX}:idem:{tenant_id}:{key}"
+
+
+def parse_stream(stream: str) -> tuple[str, str]:
+    """(priority, tenant) of a tenant stream key."""
+    priority, _, tenant = stream[len(PREFIX) + 1 :].partition(":tenant:")
+    return priority, tenant
+
+
+def _push_keys(job: dict) -> list[str]:
+    priority = job["priority"]
+    return [stream_key(priority, job["tenant_id"]), streams_key(), active_key(priority), ring_key(priority)]
+
+
+def _flatten(job: dict) -> list[str]:
+    return [str(item) for pair in job.items() for item in pair]
+
+
+class RetryableJobError(Exception):
+    pass
 
 
 def _get_executor() -> ThreadPoolExecutor:
@@ -36,7 +259,24 @@ def _get_redis() -> redis.Redis | None:
     return _redis_client
 
 
-def _set_job_state(job_id: str, status: str, payload: dict | None = None, error: str | None = None) -> None:
+def _publish(redis_client: redis.Redis, tenant_id: int | str, event: dict) -> None:
+    """Append to the tenant's capped event log that GET /jobs/stream tails (see app.services.job_events)."""
+    redis_client.xadd(
+        events_key(tenant_id),
+        {"data": json.dumps(event)},
+        maxlen=settings.job_events_maxlen,
+        approximate=True,
+    )
+
+
+def _set_job_state(job: dict, status: str, payload: dict | None = None, error: str | None = None) -> None:
+    job_id = job["job_id"]
+    if job.get("kind") == IMPORT_KIND:
+        # Imports keep reporting their progress, also while retrying or after failing
+        if payload is None:
+            payload = (get_job_state(job_id) or {}).get("payload", {})
+        set_import_state(job["tenant_id"], job_id, status, payload, error=error)
+        return
     redis_client = _get_redis()
     data = {"status": status}
     if payload is not None:
@@ -45,39 +285,390 @@ def _set_job_state(job_id: str, status: str, payload: dict | None = None, error:
         data["error"] = error
     if redis_client:
         try:
-            redis_client.setex(f"job:{job_id}", JOB_TTL_SECONDS, json.dumps(data))
+            redis_client.setex(job_key(job_id), JOB_TTL_SECONDS, json.dumps(data))
+            batch_id = job.get("batch_id")
+            # Batch members only report their outcome; the batch event carries the progress
+            if not batch_id or status in TERMINAL_STATES:
+                event = {"type": "job", "job_id": job_id, "target_id": int(job["target_id"]), **data}
+                if batch_id:
+                    event["batch_id"] = batch_id
+                _publish(redis_client, job["tenant_id"], event)
+            if status in TERMINAL_STATES:
+                _release_target(redis_client, job, status)
+                if batch_id:
+                    _record_batch_progress(redis_client, job["tenant_id"], batch_id, status)
             return
         except Exception as exc:  # pragma: no cover - log only
             logger.warning("job_state_set_failed", job_id=job_id, error=str(exc))
     logger.info("job_state", job_id=job_id, status=status, payload=payload, error=error)
 
 
+def _release_target(redis_client: redis.Redis, job: dict, status: str) -> None:
+    redis_client.eval(
+        _RELEASE_SCRIPT,
+        2,
+        inflight_key(job["tenant_id"], job["target_id"]),
+        recent_key(job["tenant_id"], job["target_id"]),
+        job["job_id"],
+        status,
+        settings.job_result_reuse_seconds,
+    )
+
+
+def _record_batch_progress(redis_client: redis.Redis, tenant_id: int | str, batch_id: str, status: str) -> None:
+    pipe = redis_client.pipeline()
+    pipe.hincrby(batch_key(batch_id), "done" if status == "done" else "failed", 1)
+    pipe.hgetall(batch_key(batch_id))
+    progress = pipe.execute()[1]
+    _publish(redis_client, tenant_id, _batch_event(batch_id, progress))
+
+
+def _batch_event(batch_id: str, progress: dict) -> dict:
+    counts = {name: int(progress.get(name, 0)) for name in ("total", "done", "failed")}
+    return {"type": "batch", "batch_id": batch_id, **counts}
+
+
 def get_job_state(job_id: str) -> dict | None:
     redis_client = _get_redis()
     if redis_client:
-        data = redis_client.get(f"job:{job_id}")
+        data = redis_client.get(job_key(job_id))
         if data:
             return json.loads(data)
     return None
 
 
-def enqueue_check_job(tenant_id: int, target_id: int, document: str) -> str:
-    job_id = uuid4().hex
-    _set_job_state(job_id, "queued")
+def run_check_job(job: dict) -> dict:
+    """
+    Execute one check job and record its state. Raises RetryableJobError for failures
+    worth another attempt (provider errors, timeouts); anything else is final.
+    """
+    db = SessionLocal()
+    try:
+        from app.services.check_service import run_cnpj_check  # local import to avoid cycle
+
+        _set_job_state(job, "running")
+        summary = run_cnpj_check(
+            db,
+            int(job["tenant_id"]),
+            int(job["target_id"]),
+            job["document"],
+            deadline=deadline_in(settings.job_timeout_seconds),
+        )
+        _set_job_state(job, "done", payload={"summary": summary})
+        return summary
+    except HTTPException as exc:
+        db.rollback()
+        if exc.status_code >= 500:
+            raise RetryableJobError(str(exc.detail)) from exc
+        _set_job_state(job, "error", error=str(exc.detail))
+        raise
+    except Exception as exc:
+        db.rollback()
+        raise RetryableJobError(str(exc)) from exc
+    finally:
+        db.close()
 
-    def _task() -> None:
-        db = SessionLocal()
+
+def run_import_job(job: dict, heartbeat: Callable[[], None] | None = None) -> dict:
+    """
+    Merge a staged target import (see target_import.run_import). Every failure is worth
+    another attempt: merged rows leave the staging table with their chunk, so a retry
+    picks up where the failed attempt stopped.
+    """
+    from app.services.target_import import run_import  # local import to avoid cycle
+
+    try:
+        return run_import(int(job["tenant_id"]), int(job["user_id"]), job["job_id"], int(job["total"]), heartbeat)
+    except Exception as exc:
+        raise RetryableJobError(str(exc)) from exc
+
+
+def run_job(job: dict, heartbeat: Callable[[], None] | None = None) -> dict:
+    """
+    Execute one queued job of any kind. `heartbeat` is called between the chunks of long
+    jobs so their message is not reclaimed while they still run.
+    """
+    if job.get("kind") == IMPORT_KIND:
+        return run_import_job(job, heartbeat)
+    return run_check_job(job)
+
+
+def retry_delay(attempt: int) -> float:
+    return min(settings.job_retry_base_seconds * 2 ** (attempt - 1), settings.job_retry_max_seconds)
+
+
+def schedule_retry(redis_client: redis.Redis, job: dict, error: str) -> bool:
+    """Queue the next attempt with exponential backoff, or dead-letter it. Returns True if retried."""
+    attempt = int(job.get("attempt", 1))
+    if attempt >= settings.job_max_attempts:
+        redis_client.xadd(dead_key(), {**job, "error": error[:500]}, maxlen=DEAD_MAXLEN, approximate=True)
+        _set_job_state(job, "error", error=error)
+        record_job_event("dead")
+        logger.error("job_dead_lettered", job_id=job["job_id"], attempt=attempt, error=error)
+        return False
+    delay = retry_delay(attempt)
+    due = time.time() + delay
+    next_job = {**job, "attempt": attempt + 1, "enqueued_at": due}
+    redis_client.zadd(delayed_key(), {json.dumps(next_job, sort_keys=True): due})
+    _set_job_state(job, "retrying", error=error)
+    record_job_event("retried")
+    logger.warning("job_retry_scheduled", job_id=job["job_id"], attempt=attempt, delay=delay, error=error)
+    return True
+
+
+def promote_due(redis_client: redis.Redis, limit: int = 500) -> int:
+    due = redis_client.zrangebyscore(delayed_key(), "-inf", time.time(), start=0, num=limit)
+    if not due:
+        return 0
+    script = redis_client.register_script(_PROMOTE_SCRIPT)
+    pipe = redis_client.pipeline(transaction=False)
+    for member in due:
+        script(keys=[*_push_keys(json.loads(member)), delayed_key()], args=[GROUP, member], client=pipe)
+    return sum(pipe.execute())
+
+
+def pick(redis_client: redis.Redis, consumer: str, priority: str, max_tries: int = 16) -> tuple[str, str, dict] | None:
+    """Deliver the next job of a class to `consumer` as (stream, message id, job), or None if the class is idle."""
+    script = redis_client.register_script(_PICK_SCRIPT)
+    keys = [ring_key(priority), deficit_key(priority), active_key(priority), weights_key()]
+    for _ in range(max_tries):
+        tenant = redis_client.lindex(ring_key(priority), 0)
+        if tenant is None:
+            return None
+        result = script(keys=[*keys, stream_key(priority, tenant)], args=[GROUP, consumer, tenant, 1])
+        if result is None:
+            return None
+        if result:
+            stream, message_id, fields = result
+            return stream, message_id, dict(zip(fields[::2], fields[1::2]))
+    return None
+
+
+def _new_job(tenant_id: int, target_id: int, document: str, priority: str, batch_id: str | None = None) -> dict:
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown job priority: {priority}")
+    job = {
+        "job_id": uuid4().hex,
+        "tenant_id": tenant_id,
+        "target_id": target_id,
+        "document": document,
+        "priority": priority,
+        "attempt": 1,
+        "enqueued_at": time.time(),
+    }
+    if batch_id:
+        job["batch_id"] = batch_id
+    return job
+
+
+def _push_many(redis_client: redis.Redis, jobs: list[dict]) -> None:
+    script = redis_client.register_script(_ENQUEUE_SCRIPT)
+    pipe = redis_client.pipeline(transaction=False)
+    for job in jobs:
+        script(keys=_push_keys(job), args=[GROUP, *_flatten(job)], client=pipe)
+    pipe.execute()
+    record_job_event("enqueued", len(jobs))
+
+
+def _claim_many(redis_client: redis.Redis, jobs: list[dict], idempotency: list[str | None]) -> list[str | None]:
+    """
+    Register each job as its target's in-flight check; returns the reused job id per job (None
+    if claimed). The pointers are read first so the script is handed every key it touches;
+    jobs whose pointers moved in between are read and claimed again.
+    """
+    script = redis_client.register_script(_CLAIM_SCRIPT)
+    queued = json.dumps({"status": "queued"})
+    pointers = [
+        [
+            inflight_key(job["tenant_id"], job["target_id"]),
+            recent_key(job["tenant_id"], job["target_id"]),
+            idempotency_key(job["tenant_id"], key) if key else "",
+        ]
+        for job, key in zip(jobs, idempotency)
+    ]
+    reused: list[str | None] = [None] * len(jobs)
+    pending = list(range(len(jobs)))
+    for _ in range(_CLAIM_ATTEMPTS):
+        pipe = redis_client.pipeline(transaction=False)
+        for index in pending:
+            for key in filter(None, pointers[index]):
+                pipe.get(key)
+        values = iter(pipe.execute())
+        pipe = redis_client.pipeline(transaction=False)
+        for index in pending:
+            seen = [(next(values) or "") if key else "" for key in pointers[index]]
+            seen_keys = [job_key(job_id) if job_id else "" for job_id in seen]
+            script(
+                keys=[*pointers[index], job_key(jobs[index]["job_id"]), *seen_keys],
+                args=[jobs[index]["job_id"], JOB_TTL_SECONDS, settings.job_idempotency_ttl_seconds, queued, *seen],
+                client=pipe,
+            )
+        moved = []
+        for index, outcome in zip(pending, pipe.execute()):
+            if outcome == 0:
+                moved.append(index)
+            else:
+                reused[index] = outcome or None
+        if not moved:
+            return reused
+        pending = moved
+    raise WatchError("Dedup pointers kept changing while claiming jobs")
+
+
+def _target_idempotency(key: str | None, target_id: int) -> str | None:
+    """Idempotency-Keys are scoped to the target, so one key never answers with another target's job."""
+    return f"{key}:{target_id}" if key else None
+
+
+def _unclaim_many(redis_client: redis.Redis, jobs: list[dict], idempotency: list[str | None]) -> None:
+    """Release the claims of jobs that could not be pushed, so their targets can be queued again."""
+    try:
+        script = redis_client.register_script(_UNCLAIM_SCRIPT)
+        pipe = redis_client.pipeline(transaction=False)
+        for job, key in zip(jobs, idempotency):
+            keys = [
+                inflight_key(job["tenant_id"], job["target_id"]),
+                idempotency_key(job["tenant_id"], key) if key else "",
+                job_key(job["job_id"]),
+            ]
+            script(keys=keys, args=[job["job_id"]], client=pipe)
+        pipe.execute()
+    except RedisError as exc:
+        # The claims still expire with JOB_TTL_SECONDS
+        logger.warning("job_unclaim_failed", jobs=len(jobs), error=str(exc))
+
+
+def enqueue_check_jobs(
+    tenant_id: int,
+    targets: list[tuple[int, str]],
+    priority: str = "bulk",
+    idempotency_key: str | None = None,
+) -> tuple[str, list[str]]:
+    """
+    Queue many (target_id, document) checks as a batch in two round-trips; needs Redis.
+    Targets already queued/running, or checked within JOB_RESULT_REUSE_SECONDS, keep
+    their existing job. Returns (batch_id, job id per target); the batch only counts
+    the jobs it created, and its progress is published as `batch` events.
+    """
+    batch_id = uuid4().hex
+    jobs = [_new_job(tenant_id, target_id, document, priority, batch_id) for target_id, document in targets]
+    redis_client = _get_redis()
+    if not redis_client:
+        raise RuntimeError("Bulk enqueue requires Redis")
+    keys = [_target_idempotency(idempotency_key, job["target_id"]) for job in jobs]
+    reused = _claim_many(redis_client, jobs, keys)
+    created = [job for job, existing in zip(jobs, reused) if existing is None]
+    record_job_event("deduplicated", len(jobs) - len(created))
+
+    progress = {"total": len(created), "done": 0, "failed": 0}
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(batch_key(batch_id), mapping=progress)
+        pipe.expire(batch_key(batch_id), JOB_TTL_SECONDS)
+        pipe.execute()
+        # One event for the whole batch instead of one "queued" per job
+        _publish(redis_client, tenant_id, _batch_event(batch_id, progress))
+        if created:
+            _push_many(redis_client, created)
+    except RedisError:
+        # Without their messages the claimed targets would look in flight until the claims expire
+        _unclaim_many(redis_client, created, [key for key, existing in zip(keys, reused) if existing is None])
+        raise
+    return batch_id, [existing or job["job_id"] for job, existing in zip(jobs, reused)]
+
+
+def enqueue_check_job(
+    tenant_id: int,
+    target_id: int,
+    document: str,
+    priority: str = "interactive",
+    idempotency_key: str | None = None,
+) -> str:
+    """
+    Queue one check. Returns the id of the job that will answer it: a new one, or the
+    target's queued/running job, a result still inside the reuse window, or the job
+    an earlier request with the same Idempotency-Key created.
+    """
+    job = _new_job(tenant_id, target_id, document, priority)
+    job_id = job["job_id"]
+    idempotency = _target_idempotency(idempotency_key, target_id)
+
+    redis_client = _get_redis()
+    if redis_client:
         try:
-            from app.services.check_service import run_cnpj_check  # local import to avoid cycle
+            existing = _claim_many(redis_client, [job], [idempotency])[0]
+            if existing:
+                record_job_event("deduplicated")
+                return existing
+            try:
+                _set_job_state(job, "queued")
+                _push_many(redis_client, [job])
+            except RedisError:
+                _unclaim_many(redis_client, [job], [idempotency])
+                raise
+            return job_id
+        except RedisError as exc:
+            logger.warning("job_enqueue_stream_failed", job_id=job_id, error=str(exc))
+
+    # No Redis: run in-process as before so async checks still complete (not durable, no dedup)
+    _set_job_state(job, "queued")
 
-            _set_job_state(job_id, "running")
-            summary = run_cnpj_check(db, tenant_id, target_id, document)
-            _set_job_state(job_id, "done", payload={"summary": summary})
+    def _task() -> None:
+        try:
+            run_check_job(job)
         except Exception as exc:  # pragma: no cover - error path
             logger.error("job_failed", job_id=job_id, error=str(exc))
-            _set_job_state(job_id, "error", error=str(exc))
-        finally:
-            db.close()
+            _set_job_state(job, "error", error=str(exc))
 
     _get_executor().submit(_task)
     return job_id
+
+
+def set_import_state(tenant_id: int, job_id: str, status: str, progress: dict, error: str | None = None) -> None:
+    """State of a target import (GET /jobs/{job_id}); every update is also published as an `import` event."""
+    data = {"status": status, "payload": progress}
+    if error is not None:
+        data["error"] = error
+    redis_client = _get_redis()
+    if redis_client:
+        try:
+            redis_client.set(job_key(job_id), json.dumps(data), ex=JOB_TTL_SECONDS)
+            _publish(redis_client, tenant_id, {"type": "import", "job_id": job_id, **data})
+            return
+        except RedisError as exc:
+            logger.warning("job_state_set_failed", job_id=job_id, error=str(exc))
+    logger.info("job_state", job_id=job_id, status=status, payload=progress, error=error)
+
+
+def enqueue_import_job(tenant_id: int, user_id: int, job_id: str, progress: dict) -> None:
+    """
+    Queue the merge of a staged import as a bulk job, so a worker runs it and one that dies
+    mid-import has it reclaimed and retried. Without Redis it runs in-process (not durable).
+    """
+    job = {
+        "job_id": job_id,
+        "kind": IMPORT_KIND,
+        "tenant_id": tenant_id,
+        "user_id": user_id,
+        "total": progress["total"],
+        "priority": "bulk",
+        "attempt": 1,
+        "enqueued_at": time.time(),
+    }
+    _set_job_state(job, "queued", payload=progress)
+    redis_client = _get_redis()
+    if redis_client:
+        try:
+            _push_many(redis_client, [job])
+            return
+        except RedisError as exc:
+            logger.warning("job_enqueue_stream_failed", job_id=job_id, error=str(exc))
+
+    def _task() -> None:
+        try:
+            run_import_job(job)
+        except Exception as exc:  # pragma: no cover - error path
+            logger.error("job_failed", job_id=job_id, error=str(exc))
+            _set_job_state(job, "error", error=str(exc))
+
+    _get_executor().submit(_task)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import structlog
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import record_job_event
+from app.domain.models import Monitor
+from app.repositories.monitors import claim_due_monitors, get_monitor, save_monitor
+from app.services.job_queue import enqueue_check_jobs
+
+logger = structlog.get_logger()
+
+
+def first_run_at(now: datetime, interval_seconds: int) -> datetime:
+    # New schedules start within the jitter window instead of all at once
+    return now + timedelta(seconds=random.uniform(0, interval_seconds * settings.monitor_jitter))
+
+
+def next_run_at(now: datetime, interval_seconds: int) -> datetime:
+    """Next run measured from now (not from the missed slot), so downtime never causes a catch-up burst."""
+    jitter = settings.monitor_jitter
+    return now + timedelta(seconds=interval_seconds * random.uniform(1 - jitter, 1 + jitter))
+
+
+def upsert_monitor(db: Session, tenant_id: int, target_id: int, interval_seconds: int, paused: bool) -> Monitor:
+    now = datetime.now(timezone.utc)
+    existing = get_monitor(db, tenant_id, target_id)
+    if existing is None:
+        monitor = Monitor(
+            tenant_id=tenant_id,
+            target_id=target_id,
+            interval_seconds=interval_seconds,
+            paused=paused,
+            next_run_at=first_run_at(now, interval_seconds),
+        )
+        return save_monitor(db, monitor)
+
+    if interval_seconds != existing.interval_seconds:
+        existing.next_run_at = min(existing.next_run_at, next_run_at(now, interval_seconds))
+    if existing.paused and not paused and existing.next_run_at < now:
+        existing.next_run_at = first_run_at(now, interval_seconds)
+    existing.interval_seconds = interval_seconds
+    existing.paused = paused
+    return save_monitor(db, existing)
+
+
+def enqueue_due(db: Session, limit: int | None = None) -> int:
+    """
+    Claim one batch of due schedules, push them to the check queue as bulk jobs and move
+    each schedule to its next (jittered) run. Enqueue and reschedule commit together:
+    if the queue is unreachable the batch stays due for the next pass.
+    """
+    now = datetime.now(timezone.utc)
+    rows = claim_due_monitors(db, now, limit or settings.monitor_batch_size)
+    if not rows:
+        db.rollback()
+        return 0
+
+    by_tenant: dict[int, list[tuple[int, str]]] = defaultdict(list)
+    for monitor, document in rows:
+        monitor.next_run_at = next_run_at(now, monitor.interval_seconds)
+        monitor.last_enqueued_at = now
+        by_tenant[monitor.tenant_id].append((monitor.target_id, document))
+    try:
+        for tenant_id, targets in by_tenant.items():
+            enqueue_check_jobs(tenant_id, targets, priority="bulk")
+    except Exception:
+        db.rollback()
+        raise
+    db.commit()
+    record_job_event("scheduled", len(rows))
+    logger.info("monitors_enqueued", count=len(rows), tenants=len(by_tenant))
+    return len(rows)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.connectors import codec
+from app.repositories.payload_blobs import get_blob_data, get_blob_data_async, put_blobs
+
+
+def _canonical(document: Any) -> bytes:
+    return json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def blob_id(document: Any) -> str:
+    """Content address: identical documents (whatever their key order) share one id."""
+    return hashlib.sha256(_canonical(document)).hexdigest()
+
+
+def store_documents(db: Session, documents: list[Any]) -> list[str]:
+    """
+    Write the documents not stored yet (one INSERT, duplicates skipped) and return their ids,
+    in order. Blobs are pinned to JSON (zlib above CNPJ_CACHE_COMPRESS_MIN_BYTES) so they
+    stay readable whatever cache codec is configured.
+    """
+    rows: dict[str, dict] = {}
+    ids = []
+    for document in documents:
+        identifier = blob_id(document)
+        ids.append(identifier)
+        if identifier not in rows:
+            rows[identifier] = {
+                "id": identifier,
+                "data": codec.encode(document, codec="json", compression="zlib"),
+                "size": len(_canonical(document)),
+            }
+    put_blobs(db, list(rows.values()))
+    return ids
+
+
+def load_document(db: Session, identifier: str) -> Any | None:
+    data = get_blob_data(db, identifier)
+    return None if data is None else codec.decode(data)
+
+
+async def load_document_async(db: AsyncSession, identifier: str) -> Any | None:
+    data = await get_blob_data_async(db, identifier)
+    return None if data is None else codec.decode(data)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import time
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Iterator
+
+import structlog
+from sqlalchemy.engine import Engine
+
+logger = structlog.get_logger()
+
+# Layout of the Receita Federal "Dados Abertos CNPJ" CSVs: ';'-separated, quoted, latin-1, no header.
+EMPRESAS_COLUMNS = (
+    "cnpj_basico",
+    "razao_social",
+    "natureza_juridica",
+    "qualificacao_responsavel",
+    "capital_social",
+    "porte",
+    "ente_federativo",
+)
+ESTABELECIMENTOS_COLUMNS = (
+    "cnpj_basico",
+    "cnpj_ordem",
+    "cnpj_dv",
+    "identificador_matriz_filial",
+    "nome_fantasia",
+    "situacao_cadastral",
+    "data_situacao_cadastral",
+    "motivo_situacao_cadastral",
+    "nome_cidade_exterior",
+    "pais",
+    "data_inicio_atividade",
+    "cnae_fiscal_principal",
+    "cnae_fiscal_secundaria",
+    "tipo_logradouro",
+    "logradouro",
+    "numero",
+    "complemento",
+    "bairro",
+    "cep",
+    "uf",
+    "municipio",
+    "ddd_1",
+    "telefone_1",
+    "ddd_2",
+    "telefone_2",
+    "ddd_fax",
+    "fax",
+    "correio_eletronico",
+    "situacao_especial",
+    "data_situacao_especial",
+)
+
+_COPY_OPTIONS = "(FORMAT csv, DELIMITER ';', QUOTE '\"', ENCODING 'LATIN1')"
+_CHUNK_BYTES = 1 << 20
+
+
+def _yyyymmdd(column: str) -> str:
+    # The dump uses "0" / "00000000" / "" for unknown dates
+    return f"CASE WHEN {column} ~ '^[0-9]{{8}}$' AND {column} <> '00000000' THEN to_date({column}, 'YYYYMMDD') END"
+
+
+# One upsert per Estabelecimentos file. Company-level columns come from the staged
+# Empresas rows and keep their previous value when that file was not part of the run;
+# rows whose values did not change are left untouched so monthly refreshes stay cheap.
+_UPSERT_SQL = f"""
+INSERT INTO cnpj_registry (
+    cnpj, razao_social, nome_fantasia, natureza_juridica, porte, capital_social,
+    situacao, data_situacao, abertura, cnae_principal, uf, municipio, cep, release, updated_at
+)
+SELECT
+    e.cnpj_basico || e.cnpj_ordem || e.cnpj_dv,
+    left(NULLIF(c.razao_social, ''), 255),
+    left(NULLIF(e.nome_fantasia, ''), 255),
+    NULLIF(c.natureza_juridica, ''),
+    NULLIF(c.porte, ''),
+    NULLIF(replace(c.capital_social, ',', '.'), '')::numeric(18, 2),
+    CASE e.situacao_cadastral
+        WHEN '01' THEN 'NULA' WHEN '1' THEN 'NULA'
+        WHEN '02' THEN 'ATIVA' WHEN '2' THEN 'ATIVA'
+        WHEN '03' THEN 'SUSPENSA' WHEN '3' THEN 'SUSPENSA'
+        WHEN '04' THEN 'INAPTA' WHEN '4' THEN 'INAPTA'
+        WHEN '08' THEN 'BAIXADA' WHEN '8' THEN 'BAIXADA'
+        ELSE NULLIF(e.situacao_cadastral, '')
+    END,
+    {_yyyymmdd("e.data_situacao_cadastral")},
+    {_yyyymmdd("e.data_inicio_atividade")},
+    NULLIF(e.cnae_fiscal_principal, ''),
+    NULLIF(e.uf, ''),
+    NULLIF(e.municipio, ''),
+    NULLIF(e.cep, ''),
+    %(release)s,
+    now()
+FROM stage_estabelecimentos e
+LEFT JOIN stage_empresas c ON c.cnpj_basico = e.cnpj_basico
+WHERE length(e.cnpj_basico || e.cnpj_ordem || e.cnpj_dv) = 14
+ON CONFLICT (cnpj) DO UPDATE SET
+    razao_social = COALESCE(EXCLUDED.razao_social, cnpj_registry.razao_social),
+    nome_fantasia = EXCLUDED.nome_fantasia,
+    natureza_juridica = COALESCE(EXCLUDED.natureza_juridica, cnpj_registry.natureza_juridica),
+    porte = COALESCE(EXCLUDED.porte, cnpj_registry.porte),
+    capital_social = COALESCE(EXCLUDED.capital_social, cnpj_registry.capital_social),
+    situacao = EXCLUDED.situacao,
+    data_situacao = EXCLUDED.data_situacao,
+    abertura = EXCLUDED.abertura,
+    cnae_principal = EXCLUDED.cnae_principal,
+    uf = EXCLUDED.uf,
+    municipio = EXCLUDED.municipio,
+    cep = EXCLUDED.cep,
+    release = EXCLUDED.release,
+    updated_at = EXCLUDED.updated_at
+WHERE (
+    COALESCE(EXCLUDED.razao_social, cnpj_registry.razao_social),
+    EXCLUDED.nome_fantasia,
+    COALESCE(EXCLUDED.natureza_juridica, cnpj_registry.natureza_juridica),
+    COALESCE(EXCLUDED.porte, cnpj_registry.porte),
+    COALESCE(EXCLUDED.capital_social, cnpj_registry.capital_social),
+    EXCLUDED.situacao,
+    EXCLUDED.data_situacao,
+    EXCLUDED.abertura,
+    EXCLUDED.cnae_principal,
+    EXCLUDED.uf,
+    EXCLUDED.municipio,
+    EXCLUDED.cep
+) IS DISTINCT FROM (
+    cnpj_registry.razao_social,
+    cnpj_registry.nome_fantasia,
+    cnpj_registry.natureza_juridica,
+    cnpj_registry.porte,
+    cnpj_registry.capital_social,
+    cnpj_registry.situacao,
+    cnpj_registry.data_situacao,
+    cnpj_registry.abertura,
+    cnpj_registry.cnae_principal,
+    cnpj_registry.uf,
+    cnpj_registry.municipio,
+    cnpj_registry.cep
+)
+"""
+
+
+@dataclass
+class ImportStats:
+    release: str
+    empresas_rows: int = 0
+    estabelecimentos_rows: int = 0
+    upserted: int = 0
+    files: list[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class DumpFile:
+    kind: str  # "empresas" | "estabelecimentos"
+    label: str
+    path: Path
+    member: str | None = None  # CSV inside a .zip
+
+    @contextmanager
+    def open(self) -> Iterator[IO[bytes]]:
+        if self.member is None:
+            with self.path.open("rb") as stream:
+                yield stream
+            return
+        with zipfile.ZipFile(self.path) as archive, archive.open(self.member) as stream:
+            yield stream
+
+
+def _kind(name: str) -> str | None:
+    upper = name.upper()
+    if "ESTABELE" in upper:
+        return "estabelecimentos"
+    if "EMPRE" in upper:
+        return "empresas"
+    return None
+
+
+def discover(paths: list[Path]) -> list[DumpFile]:
+    """Expand directories and .zip archives into the Empresas/Estabelecimentos CSVs they hold."""
+    files: list[DumpFile] = []
+    candidates: list[Path] = []
+    for path in paths:
+        candidates.extend(sorted(p for p in path.iterdir() if p.is_file()) if path.is_dir() else [path])
+    for path in candidates:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for member in archive.namelist():
+                    kind = _kind(member) or _kind(path.name)
+                    if kind:
+                        files.append(DumpFile(kind, f"{path.name}:{member}", path, member))
+            continue
+        kind = _kind(path.name)
+        if kind:
+            files.append(DumpFile(kind, path.name, path))
+    return files
+
+
+def _chunks(stream: IO[bytes]) -> Iterator[bytes]:
+    while chunk := stream.read(_CHUNK_BYTES):
+        yield chunk
+
+
+def _copy(cursor, table: str, columns: tuple[str, ...], dump: DumpFile) -> int:
+    """Stream the raw CSV bytes straight into COPY; parsing and decoding happen server-side."""
+    with dump.open() as stream, cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN {_COPY_OPTIONS}") as copy:
+        for chunk in _chunks(stream):
+            copy.write(chunk)
+    return cursor.rowcount
+
+
+def import_dump(engine: Engine, paths: list[Path], release: str) -> ImportStats:
+    """
+    Load a Receita dump (full or partial) into cnpj_registry. Empresas files are staged
+    first; each Estabelecimentos file is then staged, upserted and committed on its own,
+    so a large import makes steady progress and can be resumed by re-running it.
+    """
+    files = discover(paths)
+    if not any(dump.kind == "estabelecimentos" for dump in files):
+        raise ValueError("No Estabelecimentos files found in the given paths")
+
+    stats = ImportStats(release=release)
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        with conn.cursor() as cursor:
+            # Pooled connections may still hold the staging tables from a previous run
+            cursor.execute("DROP TABLE IF EXISTS pg_temp.stage_empresas, pg_temp.stage_estabelecimentos")
+            cursor.execute(
+                f"CREATE TEMP TABLE stage_empresas ({', '.join(f'{c} text' for c in EMPRESAS_COLUMNS)})"
+            )
+            cursor.execute(
+                f"CREATE TEMP TABLE stage_estabelecimentos ({', '.join(f'{c} text' for c in ESTABELECIMENTOS_COLUMNS)})"
+            )
+            for dump in (d for d in files if d.kind == "empresas"):
+                started = time.monotonic()
+                rows = _copy(cursor, "stage_empresas", EMPRESAS_COLUMNS, dump)
+                stats.empresas_rows += rows
+                stats.files.append(dump.label)
+                logger.info("cnpj_dump_staged", file=dump.label, rows=rows, seconds=round(time.monotonic() - started, 2))
+            cursor.execute("CREATE INDEX ON stage_empresas (cnpj_basico)")
+            cursor.execute("ANALYZE stage_empresas")
+            conn.commit()
+
+            for dump in (d for d in files if d.kind == "estabelecimentos"):
+                started = time.monotonic()
+                rows = _copy(cursor, "stage_estabelecimentos", ESTABELECIMENTOS_COLUMNS, dump)
+                cursor.execute(_UPSERT_SQL, {"release": release})
+                upserted = cursor.rowcount
+                cursor.execute("TRUNCATE stage_estabelecimentos")
+                conn.commit()
+                stats.estabelecimentos_rows += rows
+                stats.upserted += upserted
+                stats.files.append(dump.label)
+                logger.info(
+                    "cnpj_dump_imported",
+                    file=dump.label,
+                    rows=rows,
+                    upserted=upserted,
+                    seconds=round(time.monotonic() - started, 2),
+                )
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        with raw.driver_connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS pg_temp.stage_empresas, pg_temp.stage_estabelecimentos")
+        raw.commit()
+        raw.close()
+    return stats
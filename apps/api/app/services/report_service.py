@@ -1,14 +1,40 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from datetime import datetime, timezone
 
+# Summary fields whose change is worth a new report; provider-specific details and
+# per-run fields (snapshot_at, source) are left out so failovers and re-checks compare equal
+RELEVANT_FIELDS = ("status", "legal_name", "opened_at")
+
 
 def build_summary(payload: dict) -> dict:
     return {
         "status": payload.get("situacao", "INDEFINIDO"),
         "legal_name": payload.get("razao_social"),
+        "opened_at": payload.get("abertura"),
         "document": payload.get("cnpj"),
         "snapshot_at": payload.get("consulta_em", datetime.now(timezone.utc).isoformat()),
         "source": payload.get("source", "unknown"),
         "details": payload.get("full_data", {}),
     }
+
+
+def _comparable(value):
+    # Providers differ in case/spacing ("Ativa" vs "ATIVA"); that is not a change
+    return " ".join(value.split()).upper() if isinstance(value, str) else value
+
+
+def snapshot_hash(summary: dict) -> str:
+    relevant = {field: _comparable(summary.get(field)) for field in RELEVANT_FIELDS}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def diff_summaries(previous: dict, current: dict) -> dict:
+    """Relevant fields that changed, as {field: {"from": old, "to": new}}. Fields the previous summary lacks are skipped."""
+    return {
+        field: {"from": previous[field], "to": current.get(field)}
+        for field in RELEVANT_FIELDS
+        if field in previous and _comparable(previous[field]) != _comparable(current.get(field))
+    }
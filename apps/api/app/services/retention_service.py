@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.partitions import PARTITIONED_TABLES, add_months, default_partition, drop_partition, list_partitions
+from app.repositories.tenants import list_retention_policies
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class RetentionStats:
+    partitions_removed: list[str] = field(default_factory=list)
+    rows_deleted: dict[str, int] = field(default_factory=dict)
+    blobs_deleted: int = 0
+
+
+def _delete_batch(db: Session, table: str, column: str, tenant_id: int, cutoff: datetime, batch_size: int) -> int:
+    # (id, ts) is the partition-wide key; the ts bound keeps the scan to the partitions before the cutoff
+    result = db.execute(
+        text(
+            f"DELETE FROM {table} WHERE (id, {column}) IN ("
+            f"SELECT id, {column} FROM {table} WHERE tenant_id = :tenant_id AND {column} < :cutoff LIMIT :limit)"
+        ),
+        {"tenant_id": tenant_id, "cutoff": cutoff, "limit": batch_size},
+    )
+    db.commit()
+    return result.rowcount
+
+
+def _delete_orphan_blobs(db: Session, after: str, batch_size: int) -> tuple[str | None, int]:
+    """
+    Delete the blobs no check or report references among the next `batch_size` ids after
+    `after`. Returns the last id looked at (None once past the end) and the rows deleted.
+    SKIP LOCKED leaves the blobs a check transaction has locked through put_blobs (it is
+    about to reference them) to the next pass.
+    """
+    last, deleted = db.execute(
+        text(
+            "WITH batch AS (SELECT id FROM payload_blobs WHERE id > :after ORDER BY id LIMIT :limit), "
+            "orphans AS (SELECT b.id FROM payload_blobs b JOIN batch USING (id) "
+            "WHERE NOT EXISTS (SELECT 1 FROM checks c WHERE c.payload_blob_id = b.id) "
+            "AND NOT EXISTS (SELECT 1 FROM reports r WHERE r.details_blob_id = b.id) "
+            "FOR UPDATE OF b SKIP LOCKED), "
+            "gone AS (DELETE FROM payload_blobs WHERE id IN (SELECT id FROM orphans) RETURNING 1) "
+            "SELECT (SELECT max(id) FROM batch), (SELECT count(*) FROM gone)"
+        ),
+        {"after": after, "limit": batch_size},
+    ).one()
+    db.commit()
+    return last, deleted
+
+
+def purge_expired(db: Session, now: datetime | None = None) -> RetentionStats:
+    """
+    Apply the tenants' retention policies to checks and audit_log.
+
+    Months older than the longest policy in force are removed whole (dropped, or only
+    detached with RETENTION_DETACH_ONLY). Tenants with a shorter policy have their older
+    rows deleted in RETENTION_PURGE_BATCH_SIZE batches, one commit each, so no statement
+    holds locks or builds up WAL for long; the other tenants only have rows deleted from
+    the default partition, which is never dropped. Payload blobs left without a check or
+    report are then deleted in batches of the same size.
+    """
+    now = now or datetime.now(timezone.utc)
+    stats = RetentionStats()
+    policies = {
+        tenant_id: days or settings.retention_default_days for tenant_id, days in list_retention_policies(db).items()
+    }
+    longest = max([settings.retention_default_days, *policies.values()])
+    partition_cutoff = now - timedelta(days=longest)
+
+    for table, column in PARTITIONED_TABLES.items():
+        conn = db.connection()
+        for name, month in sorted(list_partitions(conn, table).items(), key=lambda item: item[1]):
+            upper = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc)
+            if upper > partition_cutoff:
+                break
+            drop_partition(conn, table, name, detach_only=settings.retention_detach_only)
+            db.commit()
+            conn = db.connection()
+            stats.partitions_removed.append(name)
+            logger.info("retention_partition_removed", table=table, partition=name, detached=settings.retention_detach_only)
+
+        default = default_partition(db.connection(), table)
+        deleted = 0
+        for tenant_id, days in policies.items():
+            # Rows past the longest policy are gone with their month unless they sit in the default partition
+            source = table if days < longest else default
+            if source is None:
+                continue
+            cutoff = now - timedelta(days=days)
+            while True:
+                batch = _delete_batch(db, source, column, tenant_id, cutoff, settings.retention_purge_batch_size)
+                deleted += batch
+                if batch < settings.retention_purge_batch_size:
+                    break
+        stats.rows_deleted[table] = deleted
+        if deleted:
+            logger.info("retention_rows_deleted", table=table, rows=deleted)
+
+    after: str | None = ""
+    while after is not None:
+        after, deleted = _delete_orphan_blobs(db, after, settings.retention_purge_batch_size)
+        stats.blobs_deleted += deleted
+    if stats.blobs_deleted:
+        logger.info("retention_blobs_deleted", blobs=stats.blobs_deleted)
+    return stats
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from itertools import chain
+from typing import IO, Callable, Iterator
+from uuid import uuid4
+
+import structlog
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.repositories.audit_logs import insert_audit_log
+from app.repositories.target_imports import delete_staged, merge_staged, stage_rows
+from app.services.job_queue import enqueue_import_job, get_job_state, set_import_state
+
+logger = structlog.get_logger()
+
+FORMATS = ("csv", "ndjson")
+COLUMNS = ("document", "name_hint", "type")
+_MAX_INVALID_LINES = 100
+# Staged rows of imports whose process died before merging them
+_STALE_STAGING_SECONDS = 86400
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or (content_type or "").endswith(("ndjson", "jsonl", "json-seq")):
+        return "ndjson"
+    return "csv"
+
+
+def _text(value) -> str | None:
+    return None if value is None else str(value)
+
+
+def _csv_rows(stream: io.TextIOWrapper) -> Iterator[tuple[int, str | None, str | None, str | None]]:
+    first = stream.readline()
+    # Spreadsheets exported with a Brazilian locale separate fields with ';'
+    delimiter = ";" if first.count(";") > first.count(",") else ","
+    reader = csv.reader(io.StringIO(first), delimiter=delimiter)
+    header = [cell.strip().lower() for cell in next(reader, [])]
+    if "document" in header:
+        positions = [header.index(name) if name in header else None for name in COLUMNS]
+        lines, offset = csv.reader(stream, delimiter=delimiter), 1
+    else:
+        # No header: columns are positional and the first line is data
+        positions = [0, 1, 2]
+        lines, offset = csv.reader(chain([first], stream), delimiter=delimiter), 0
+    for row in lines:
+        if not any(cell.strip() for cell in row):
+            continue
+        values = [row[index] if index is not None and index < len(row) else None for index in positions]
+        yield lines.line_num + offset, values[0], values[1], values[2]
+
+
+def _ndjson_rows(stream: io.TextIOWrapper) -> Iterator[tuple[int, str | None, str | None, str | None]]:
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            item = None
+        if not isinstance(item, dict):
+            yield line_no, None, None, None  # counted as invalid
+            continue
+        yield line_no, _text(item.get("document")), _text(item.get("name_hint")), _text(item.get("type"))
+
+
+def parse_rows(stream: IO[bytes], fmt: str) -> Iterator[tuple[int, str | None, str | None, str | None]]:
+    """(line number, document, name_hint, type) per uploaded row, read incrementally. Validation happens in SQL."""
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        yield from (_ndjson_rows if fmt == "ndjson" else _csv_rows)(text_stream)
+    finally:
+        text_stream.detach()  # the upload belongs to the caller
+
+
+def start_import(db: Session, tenant_id: int, user_id: int, stream: IO[bytes], fmt: str) -> tuple[str, int]:
+    """
+    Stage an uploaded CSV/NDJSON file with COPY and queue a bulk job that validates and
+    merges it on a worker (see run_import). Returns (job id, rows staged); raises
+    ValueError for files that cannot be read.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    job_id = uuid4().hex
+    try:
+        delete_staged(db, older_than_seconds=_STALE_STAGING_SECONDS)
+        rows = stage_rows(db, job_id, tenant_id, parse_rows(stream, fmt))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        db.rollback()
+        raise ValueError(f"Could not read the {fmt} file: {exc}") from exc
+    if not rows:
+        db.rollback()
+        raise ValueError("The file has no rows")
+    db.commit()
+
+    enqueue_import_job(tenant_id, user_id, job_id, _new_progress(rows))
+    return job_id, rows
+
+
+def _new_progress(total: int) -> dict:
+    return {"total": total, "processed": 0, "created": 0, "skipped": 0, "invalid": 0, "invalid_lines": []}
+
+
+def run_import(
+    tenant_id: int, user_id: int, job_id: str, total: int, heartbeat: Callable[[], None] | None = None
+) -> dict:
+    """
+    Merge a staged import TARGET_IMPORT_BATCH_SIZE rows at a time. Each chunk leaves the
+    staging table in the transaction that merges it, and progress is published after its
+    commit, so a retry after a failure resumes from the last chunk and its counts. Documents
+    the tenant already has (or that repeat in the file) are skipped. Raises on failure,
+    keeping the unmerged rows staged for the retry.
+    """
+    state = get_job_state(job_id)
+    progress = state["payload"] if state and state.get("payload") else _new_progress(total)
+    db = SessionLocal()
+    try:
+        set_import_state(tenant_id, job_id, "running", progress)
+        after_line = 0
+        while (result := merge_staged(db, tenant_id, job_id, after_line, settings.target_import_batch_size)) is not None:
+            delete_staged(db, job_id, through_line=result.last_line)
+            db.commit()
+            after_line = result.last_line
+            progress["processed"] += result.rows
+            progress["created"] += result.created
+            progress["invalid"] += len(result.invalid_lines)
+            progress["skipped"] = progress["processed"] - progress["created"] - progress["invalid"]
+            room = _MAX_INVALID_LINES - len(progress["invalid_lines"])
+            progress["invalid_lines"].extend(result.invalid_lines[:room])
+            set_import_state(tenant_id, job_id, "running", progress)
+            if heartbeat is not None:
+                heartbeat()
+
+        counts = {key: progress[key] for key in ("total", "created", "skipped", "invalid")}
+        insert_audit_log(db, tenant_id, user_id, "target_import", {"job_id": job_id, **counts})
+        db.commit()
+        set_import_state(tenant_id, job_id, "done", progress)
+        logger.info("target_import_done", job_id=job_id, tenant_id=tenant_id, **counts)
+    except Exception as exc:
+        db.rollback()
+        logger.error("target_import_failed", job_id=job_id, error=str(exc))
+        raise
+    finally:
+        db.close()
+    return progress
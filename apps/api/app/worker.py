@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+"""
+Standalone consumer for the async job queue (checks and target imports):
+
+    python -m app.worker [--concurrency 4] [--name worker-1]
+
+Each thread picks jobs fairly across tenants (deficit round-robin per priority class,
+weighted round-robin across classes), acks on completion, retries failures with backoff
+and dead-letters jobs out of attempts. A housekeeping thread promotes due retries,
+reclaims messages whose consumer died and exports per-tenant queue depth.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+
+import redis
+import structlog
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+from app.core.metrics import record_job_event, record_job_queue_depth, record_job_wait
+from app.services import job_queue
+from app.services.job_queue import RetryableJobError
+
+try:
+    from prometheus_client import start_http_server
+except Exception:  # pragma: no cover - metrics are optional for the worker
+    start_http_server = None
+
+logger = structlog.get_logger()
+
+_IDLE_MIN_SECONDS = 0.05
+_IDLE_MAX_SECONDS = 1.0
+_HOUSEKEEPING_SECONDS = 1.0
+_DEPTH_EVERY_SECONDS = 10.0
+
+
+def class_schedule(weights: dict[str, int]) -> list[str]:
+    """Smooth weighted round-robin order of priority classes, e.g. 4:1 -> i i b i i ... interleaved."""
+    total = sum(weights.values())
+    current = dict.fromkeys(weights, 0)
+    order: list[str] = []
+    for _ in range(total):
+        for name, weight in weights.items():
+            current[name] += weight
+        chosen = max(current, key=current.get)
+        current[chosen] -= total
+        order.append(chosen)
+    return order
+
+
+class Worker:
+    def __init__(self, redis_client: redis.Redis, name: str, concurrency: int):
+        self.redis = redis_client
+        self.name = name
+        self.concurrency = concurrency
+        self.stopping = threading.Event()
+        weights = settings.job_priority_weight_map()
+        self.schedule = class_schedule(
+            {priority: weights.get(priority, 1) for priority in job_queue.PRIORITIES}
+        )
+
+    def handle(self, stream: str, message_id: str, job: dict, consumer: str) -> None:
+        """Run one job and settle its message: ack on success/final failure, requeue on retryable failure."""
+        try:
+            job_queue.run_job(job, heartbeat=lambda: self._touch(stream, message_id, consumer))
+            record_job_event("done")
+        except RetryableJobError as exc:
+            job_queue.schedule_retry(self.redis, job, str(exc))
+        except Exception as exc:
+            record_job_event("failed")
+            logger.info("job_failed_final", job_id=job.get("job_id"), error=str(exc))
+        self._settle(stream, message_id)
+
+    def _touch(self, stream: str, message_id: str, consumer: str) -> None:
+        # Resets the message's idle time so reclaim_once leaves a long job to the consumer running it
+        self.redis.xclaim(stream, job_queue.GROUP, consumer, 0, [message_id], justid=True)
+
+    def _settle(self, stream: str, message_id: str) -> None:
+        # Deleting settled messages keeps each stream down to undelivered/in-flight work
+        pipe = self.redis.pipeline()
+        pipe.xack(stream, job_queue.GROUP, message_id)
+        pipe.xdel(stream, message_id)
+        pipe.execute()
+
+    def consume_once(self, consumer: str, turn: int = 0) -> int:
+        """Pick one job, starting with the class scheduled for this turn and falling back to the others."""
+        first = self.schedule[turn % len(self.schedule)]
+        for priority in (first, *(p for p in job_queue.PRIORITIES if p != first)):
+            picked = job_queue.pick(self.redis, consumer, priority)
+            if picked is None:
+                continue
+            stream, message_id, job = picked
+            enqueued_at = float(job.get("enqueued_at") or time.time())
+            record_job_wait(priority, job.get("tenant_id", ""), time.time() - enqueued_at)
+            self.handle(stream, message_id, job, consumer)
+            return 1
+        return 0
+
+    def reclaim_once(self) -> int:
+        """Take over messages idle past JOB_CLAIM_IDLE_SECONDS; each counts as a failed attempt."""
+        reclaimed = 0
+        for stream in self.redis.sscan_iter(job_queue.streams_key(), count=500):
+            start = "0-0"
+            while True:
+                result = self.redis.xautoclaim(
+                    stream,
+                    job_queue.GROUP,
+                    f"{self.name}:reclaimer",
+                    min_idle_time=int(settings.job_claim_idle_seconds * 1000),
+                    start_id=start,
+                    count=100,
+                )
+                start, messages = result[0], result[1]
+                for message_id, job in messages:
+                    if job:  # empty when deleted while pending
+                        logger.warning("job_reclaimed", job_id=job.get("job_id"), message_id=message_id)
+                        job_queue.schedule_retry(self.redis, job, "worker stopped before finishing the job")
+                        reclaimed += 1
+                    self._settle(stream, message_id)
+                if start == "0-0":
+                    break
+        record_job_event("reclaimed", reclaimed)
+        return reclaimed
+
+    def export_depth(self) -> None:
+        streams = list(self.redis.sscan_iter(job_queue.streams_key(), count=500))
+        pipe = self.redis.pipeline(transaction=False)
+        for stream in streams:
+            pipe.xlen(stream)
+        for stream, depth in zip(streams, pipe.execute()):
+            priority, tenant = job_queue.parse_stream(stream)
+            record_job_queue_depth(priority, tenant, depth)
+
+    def sync_weights(self) -> None:
+        weights = settings.job_tenant_weight_map()
+        pipe = self.redis.pipeline()
+        pipe.delete(job_queue.weights_key())
+        if weights:
+            pipe.hset(job_queue.weights_key(), mapping=weights)
+        pipe.execute()
+
+    def _consumer_loop(self, consumer: str) -> None:
+        turn = 0
+        idle = _IDLE_MIN_SECONDS
+        while not self.stopping.is_set():
+            try:
+                if self.consume_once(consumer, turn):
+                    turn += 1
+                    idle = _IDLE_MIN_SECONDS
+                    continue
+            except RedisError as exc:
+                logger.warning("worker_redis_error", consumer=consumer, error=str(exc))
+                idle = _IDLE_MAX_SECONDS
+            self.stopping.wait(idle)
+            idle = min(idle * 2, _IDLE_MAX_SECONDS)
+
+    def _housekeeping_loop(self) -> None:
+        # Reclaiming walks every tenant stream, so it runs far less often than retry promotion
+        reclaim_every = max(_HOUSEKEEPING_SECONDS, min(settings.job_claim_idle_seconds / 2, 30.0))
+        last_reclaim = last_depth = 0.0
+        while not self.stopping.wait(_HOUSEKEEPING_SECONDS):
+            try:
+                job_queue.promote_due(self.redis)
+                now = time.monotonic()
+                if now - last_reclaim >= reclaim_every:
+                    self.reclaim_once()
+                    last_reclaim = now
+                if now - last_depth >= _DEPTH_EVERY_SECONDS:
+                    self.export_depth()
+                    last_depth = now
+            except RedisError as exc:
+                logger.warning("worker_housekeeping_failed", error=str(exc))
+
+    def run(self) -> None:
+        self.sync_weights()
+        threads = [
+            threading.Thread(target=self._consumer_loop, args=(f"{self.name}:{index}",), name=f"consumer-{index}")
+            for index in range(self.concurrency)
+        ]
+        threads.append(threading.Thread(target=self._housekeeping_loop, name="housekeeping"))
+        for thread in threads:
+            thread.start()
+        logger.info("worker_started", name=self.name, concurrency=self.concurrency)
+        for thread in threads:
+            thread.join()
+        logger.info("worker_stopped", name=self.name)
+
+    def stop(self, *_args) -> None:
+        # In-flight jobs finish; idle consumers wake up right away
+        self.stopping.set()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Async check queue worker")
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency)
+    parser.add_argument("--name", default=f"{socket.gethostname()}-{os.getpid()}")
+    args = parser.parse_args()
+
+    configure_logging()
+    if settings.metrics_enabled and start_http_server is not None:
+        start_http_server(settings.worker_metrics_port)
+    worker = Worker(redis.Redis.from_url(settings.redis_url, decode_responses=True), args.name, args.concurrency)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
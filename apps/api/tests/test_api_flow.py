@@ -3,6 +3,8 @@ from __future__ import annotations
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.db.session import SessionLocal
+from app.domain.models import AuditLog, Check, PayloadBlob, Report, TargetChange
 from app.services.check_service import run_cnpj_check
 
 
@@ -47,7 +49,7 @@ def test_target_check_and_report(client: TestClient, db_session: Session):
     headers = {"Authorization": f"Bearer {access}"}
 
     # Create target
-    resp_target = client.post("/targets", json={"document": "12345678000190", "name_hint": "ACME", "type": "cnpj"}, headers=headers)
+    resp_target = client.post("/targets", json={"document": "12345678000195", "name_hint": "ACME", "type": "cnpj"}, headers=headers)
     assert resp_target.status_code == 201
     target_id = resp_target.json()["id"]
 
@@ -63,9 +65,189 @@ def test_target_check_and_report(client: TestClient, db_session: Session):
     assert resp_report.status_code == 200
     latest = resp_report.json()
     assert latest["summary_json"]["status"]
+    assert latest["version"] == 1
+
+    # An identical second check writes no new report, it only marks the target as verified
+    client.post(f"/targets/{target_id}/check", headers=headers)
+    latest_again = client.get(f"/targets/{target_id}/report/latest", headers=headers).json()
+    assert latest_again["id"] == latest["id"]
+    target = client.get("/targets", headers=headers).json()["items"][0]
+    assert (target["latest_report_id"], target["report_version"]) == (latest["id"], 1)
+    assert target["last_verified_at"]
+
+
+def test_async_routes_stay_within_the_tenant(client: TestClient, db_session: Session):
+    headers = {}
+    for tenant in ("async-a", "async-b"):
+        reg = client.post(
+            "/auth/register",
+            json={"email": f"{tenant}@example.com", "password": "Pass1234!", "tenant_name": tenant},
+        )
+        headers[tenant] = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+    me = client.get("/me", headers=headers["async-a"]).json()
+    assert me["email"] == "async-a@example.com"
+
+    target_id = client.post("/targets", json={"document": "12345678000195"}, headers=headers["async-a"]).json()["id"]
+    assert client.post(f"/targets/{target_id}/check", headers=headers["async-a"]).status_code == 200
+    assert client.get("/targets", headers=headers["async-b"]).json()["items"] == []
+    assert client.get(f"/targets/{target_id}/report/latest", headers=headers["async-b"]).status_code == 404
+    assert client.post(f"/targets/{target_id}/check", headers=headers["async-b"]).status_code == 404
+
+    check = db_session.query(Check).one()
+    audit = db_session.query(AuditLog).filter(AuditLog.action == "check_run").one()
+    assert check.tenant_id == audit.tenant_id == me["tenant_id"]
+
+
+def test_check_with_spent_deadline_returns_504(client: TestClient):
+    reg = client.post(
+        "/auth/register",
+        json={"email": "deadline@example.com", "password": "Pass1234!", "tenant_name": "deadlineco"},
+    )
+    headers = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+    target_id = client.post("/targets", json={"document": "12345678000195", "type": "cnpj"}, headers=headers).json()["id"]
+
+    resp = client.post(f"/targets/{target_id}/check", headers={**headers, "X-Request-Timeout": "0"})
+    assert resp.status_code == 504
+    resp = client.post("/targets/checks:batch", json={"target_ids": [target_id]}, headers={**headers, "X-Request-Timeout": "0"})
+    assert resp.status_code == 504
+
+
+def test_batch_check(client: TestClient, db_session: Session):
+    reg = client.post(
+        "/auth/register",
+        json={"email": "batch@example.com", "password": "Pass1234!", "tenant_name": "batchco"},
+    )
+    headers = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+    target_ids = [
+        client.post("/targets", json={"document": doc, "type": "cnpj"}, headers=headers).json()["id"]
+        for doc in ("12345678000195", "98765432000198")
+    ]
+
+    resp = client.post("/targets/checks:batch", json={"target_ids": target_ids + [999999]}, headers=headers)
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [item["target_id"] for item in results] == target_ids + [999999]
+    assert [item["status"] for item in results] == ["ok", "ok", "error"]
+
+    resp_report = client.get(f"/targets/{target_ids[1]}/report/latest", headers=headers)
+    assert resp_report.status_code == 200
+    # Checks, reports and the audit entry were written together
+    assert db_session.query(Check).filter(Check.target_id.in_(target_ids)).count() == 2
+    assert db_session.query(Report).filter(Report.target_id.in_(target_ids)).count() == 2
+    audit = db_session.query(AuditLog).filter(AuditLog.action == "check_batch").one()
+    assert audit.metadata_json == {"target_ids": target_ids, "ok": 2}
 
 
 def test_metrics_endpoint(client: TestClient):
     resp = client.get("/metrics")
     assert resp.status_code == 200
     assert resp.text  # non-empty
+
+
+def test_targets_keyset_pagination_and_filters(client: TestClient):
+    reg = client.post(
+        "/auth/register",
+        json={"email": "pages@example.com", "password": "Pass1234!", "tenant_name": "pagesco"},
+    )
+    headers = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+    documents = ("12345678000195", "98765432000198", "45997418000153", "11222333000181")
+    ids = [
+        client.post("/targets", json={"document": doc, "type": "cnpj"}, headers=headers).json()["id"]
+        for doc in documents
+    ]
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/targets", params=params, headers=headers).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(ids, reverse=True)
+
+    by_prefix = client.get("/targets", params={"document_prefix": "9876"}, headers=headers).json()
+    assert [item["id"] for item in by_prefix["items"]] == [ids[1]]
+    assert len(client.get("/targets", params={"type": "CNPJ"}, headers=headers).json()["items"]) == 4
+
+    client.post(f"/targets/{ids[2]}/check", headers=headers)
+    by_status = client.get("/targets", params={"report_status": "ATIVA"}, headers=headers).json()
+    assert [item["id"] for item in by_status["items"]] == [ids[2]]
+    assert client.get("/targets", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
+
+
+def test_identical_payloads_share_one_blob(client: TestClient, db_session: Session, monkeypatch):
+    full_data = {"razao_social": "ACME", "socios": [{"nome": "SOCIO"}] * 50}
+    async def fetch(cnpj, **_):
+        return {"cnpj": cnpj, "situacao": "ATIVA", "source": "publica.cnpj.ws", "full_data": full_data}
+
+    monkeypatch.setattr("app.services.check_service.fetch_cnpj_async", fetch)
+    report_ids = []
+    for tenant in ("blob-a", "blob-b"):
+        reg = client.post(
+            "/auth/register",
+            json={"email": f"{tenant}@example.com", "password": "Pass1234!", "tenant_name": tenant},
+        )
+        headers = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+        target_id = client.post("/targets", json={"document": "12345678000195"}, headers=headers).json()["id"]
+        assert client.post(f"/targets/{target_id}/check", headers=headers).json()["summary"]["details"] == full_data
+
+        lean = client.get(f"/targets/{target_id}/report/latest", headers=headers).json()
+        assert "details" not in lean["summary_json"] and lean["details_blob_id"]
+        full = client.get(
+            f"/targets/{target_id}/report/latest", params={"include_details": True}, headers=headers
+        ).json()
+        assert full["summary_json"]["details"] == full_data
+        report_ids.append(lean["details_blob_id"])
+
+    assert report_ids[0] == report_ids[1]
+    assert db_session.query(PayloadBlob).count() == 1
+    check = db_session.query(Check).first()
+    assert check.payload_blob_id == report_ids[0] and "full_data" not in check.raw_payload_json
+
+
+def test_change_feed_records_relevant_changes_only(client: TestClient, db_session: Session, monkeypatch):
+    situacao = {"value": "ATIVA"}
+    async def fetch(cnpj, **_):
+        return {"cnpj": cnpj, "situacao": situacao["value"], "razao_social": "ACME LTDA", "source": "mock"}
+
+    monkeypatch.setattr("app.services.check_service.fetch_cnpj_async", fetch)
+    reg = client.post(
+        "/auth/register",
+        json={"email": "feed@example.com", "password": "Pass1234!", "tenant_name": "feed"},
+    )
+    headers = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+    target_id = client.post("/targets", json={"document": "12345678000195"}, headers=headers).json()["id"]
+
+    client.post(f"/targets/{target_id}/check", headers=headers)
+    client.post(f"/targets/{target_id}/check", headers=headers)
+    assert db_session.query(Report).count() == 1 and db_session.query(Check).count() == 1
+    feed = client.get("/changes", headers=headers).json()
+    assert feed["items"] == []
+
+    situacao["value"] = "BAIXADA"
+    client.post(f"/targets/{target_id}/check", headers=headers)
+    latest = client.get(f"/targets/{target_id}/report/latest", headers=headers).json()
+    assert latest["version"] == 2
+    feed = client.get("/changes", params={"cursor": feed["next_cursor"]}, headers=headers).json()
+    assert [item["changes_json"] for item in feed["items"]] == [{"status": {"from": "ATIVA", "to": "BAIXADA"}}]
+    assert feed["items"][0]["report_id"] == latest["id"]
+    assert client.get("/changes", params={"cursor": feed["next_cursor"]}, headers=headers).json()["items"] == []
+
+    # A transaction that took its id first but commits last must not be skipped by the cursor
+    cursor = feed["next_cursor"]
+    row = {"tenant_id": db_session.get(Report, latest["id"]).tenant_id, "target_id": target_id, "report_id": latest["id"]}
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        first.add(TargetChange(**row, changes_json={"order": 1}))
+        first.flush()
+        second.add(TargetChange(**row, changes_json={"order": 2}))
+        second.commit()
+        assert client.get("/changes", params={"cursor": cursor}, headers=headers).json()["items"] == []
+        first.commit()
+    finally:
+        first.close()
+        second.close()
+    feed = client.get("/changes", params={"cursor": cursor}, headers=headers).json()
+    assert [item["changes_json"] for item in feed["items"]] == [{"order": 1}, {"order": 2}]
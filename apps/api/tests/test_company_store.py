@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.connectors import cache, company_store, receita
+from app.db.session import engine
+from app.domain.models import Company
+
+
+@pytest.fixture
+def store(db_session: Session, monkeypatch) -> Session:
+    Company.__table__.create(bind=engine, checkfirst=True)
+    monkeypatch.setattr(receita, "_get_redis", lambda: None)
+    monkeypatch.setattr(receita.settings, "cnpj_company_store_enabled", True)
+    cache.clear_local()
+    return db_session
+
+
+def test_provider_results_survive_cache_loss(store: Session, monkeypatch):
+    calls = []
+
+    async def _fetch_hedged(cnpj, opts):
+        calls.append(cnpj)
+        return receita.PROVIDERS[0], {"cnpj": cnpj, "razao_social": "Empresa X", "source": "publica.cnpj.ws"}
+
+    monkeypatch.setattr(receita, "_fetch_hedged", _fetch_hedged)
+
+    assert receita.fetch_cnpj("12345678000195")["razao_social"] == "Empresa X"
+    # Simulate a Redis flush / new replica: the shared table answers without a provider call
+    cache.clear_local()
+    assert receita.fetch_cnpj("12345678000195")["source"] == "publica.cnpj.ws"
+    assert calls == ["12345678000195"]
+    assert store.get(Company, "12345678000195").source == "publica.cnpj.ws"
+
+
+def test_expired_company_rows_are_misses(store: Session, monkeypatch):
+    old = datetime.now(timezone.utc) - timedelta(seconds=receita.settings.cnpj_company_ttl_seconds + 60)
+    store.add(Company(cnpj="98765432000198", payload_json={"cnpj": "98765432000198"}, source="brasilapi", fetched_at=old))
+    store.commit()
+
+    assert company_store.load_many(["98765432000198"]) == {}
+    # Saving a fresher fetch replaces the row; mock data is never persisted
+    company_store.save_many([{"cnpj": "98765432000198", "source": "brasilapi", "razao_social": "Nova"}])
+    company_store.save_many([{"cnpj": "98765432000198", "source": "mock"}])
+    assert company_store.load_many(["98765432000198"])["98765432000198"]["razao_social"] == "Nova"
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import time
+
 import httpx
 import pytest
 
-from app.connectors import receita
+from app.connectors import cache, codec, http, ratelimit, receita, routing
+from app.core.deadline import DeadlineExceeded, deadline_in
 
 
 class _FakeResponse:
@@ -29,13 +33,7 @@ class _FakeClient:
         self._idx = 0
         self._by_url = by_url or {}
 
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc, tb):
-        return False
-
-    def get(self, url: str):
+    async def get(self, url: str, timeout=None):
         if self._by_url:
             return self._by_url.get(url, _FakeResponse({}, status_code=500))
         # Return sequential responses to simulate primary/fallback chain
@@ -48,8 +46,17 @@ class _FakeClient:
 
 @pytest.fixture(autouse=True)
 def disable_cache(monkeypatch):
-    # Avoid touching Redis during connector tests
+    # Avoid touching Redis and Postgres during connector tests and start from an empty local tier
     monkeypatch.setattr(receita, "_get_redis", lambda: None)
+    monkeypatch.setattr(receita.settings, "cnpj_company_store_enabled", False)
+    cache.clear_local()
+
+
+@pytest.fixture(autouse=True)
+def reset_clients(monkeypatch):
+    # Fresh per-provider registry so fake clients do not leak between tests
+    monkeypatch.setattr(http, "_clients", {})
+    monkeypatch.setattr(receita, "_router", routing.ProviderRouter())
 
 
 def test_fetch_cnpj_primary_success(monkeypatch):
@@ -59,11 +66,11 @@ def test_fetch_cnpj_primary_success(monkeypatch):
     }
     monkeypatch.setattr(
         receita.httpx,
-        "Client",
+        "AsyncClient",
         lambda *args, **kwargs: _FakeClient([_FakeResponse(fake_payload, 200)]),
     )
 
-    data = receita.fetch_cnpj("12.345.678/0001-90", use_mock=False)
+    data = receita.fetch_cnpj("12.345.678/0001-95", use_mock=False)
     assert data["source"] == "publica.cnpj.ws"
     assert data["razao_social"] == "Empresa X"
     assert data["situacao"] == "ATIVA"
@@ -78,14 +85,14 @@ def test_fetch_cnpj_fallback_to_brasilapi(monkeypatch):
 
     def _fake_client(*args, **kwargs):
         by_url = {
-            "https://publica.cnpj.ws/cnpj/12345678000190": _FakeResponse({}, status_code=500),
-            "https://brasilapi.com.br/api/cnpj/v1/12345678000190": _FakeResponse(brasilapi_payload, 200),
+            "https://publica.cnpj.ws/cnpj/12345678000195": _FakeResponse({}, status_code=500),
+            "https://brasilapi.com.br/api/cnpj/v1/12345678000195": _FakeResponse(brasilapi_payload, 200),
         }
         return _FakeClient([], by_url=by_url)
 
-    monkeypatch.setattr(receita.httpx, "Client", _fake_client)
+    monkeypatch.setattr(receita.httpx, "AsyncClient", _fake_client)
 
-    data = receita.fetch_cnpj("12345678000190", use_mock=False)
+    data = receita.fetch_cnpj("12345678000195", use_mock=False)
     assert data["source"] == "brasilapi"
     assert data["razao_social"] == "Fallback SA"
     assert data["situacao"] == "INAPTA"
@@ -95,7 +102,7 @@ def test_fetch_cnpj_mock_when_all_fail(monkeypatch):
     # All attempts raise HTTP error; mock should be returned when allowed
     monkeypatch.setattr(
         receita.httpx,
-        "Client",
+        "AsyncClient",
         lambda *args, **kwargs: _FakeClient(
             [
                 _FakeResponse({}, status_code=500),
@@ -104,6 +111,354 @@ def test_fetch_cnpj_mock_when_all_fail(monkeypatch):
             ]
         ),
     )
-    data = receita.fetch_cnpj("12345678000190", use_mock=False)
+    data = receita.fetch_cnpj("12345678000195", use_mock=False)
     assert data["source"] == "mock"
-    assert data["cnpj"] == "12345678000190"
+    assert data["cnpj"] == "12345678000195"
+
+
+def test_fetch_cnpj_reuses_provider_client(monkeypatch):
+    fake_payload = {
+        "razao_social": "Empresa X",
+        "estabelecimento": {"situacao_cadastral": "ATIVA", "data_inicio_atividade": "2020-01-01"},
+    }
+    created = []
+
+    def _fake_client(*args, **kwargs):
+        client = _FakeClient([_FakeResponse(fake_payload, 200), _FakeResponse(fake_payload, 200)])
+        created.append(kwargs)
+        return client
+
+    monkeypatch.setattr(receita.httpx, "AsyncClient", _fake_client)
+
+    receita.fetch_cnpj("12345678000195", use_mock=False)
+    receita.fetch_cnpj("12345678000195", use_mock=False)
+    assert len(created) == 1
+    assert created[0]["limits"].max_connections == receita.settings.cnpj_http_max_connections
+
+
+def test_fetch_cnpj_hedges_slow_primary(monkeypatch):
+    brasilapi_payload = {
+        "razao_social": "Hedge SA",
+        "descricao_situacao_cadastral": "ATIVA",
+        "data_inicio_atividade": "2019-05-01",
+    }
+    cancelled = []
+
+    class _SlowPrimaryClient(_FakeClient):
+        async def get(self, url: str, timeout=None):
+            if "publica.cnpj.ws" in url:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(url)
+                    raise
+            return _FakeResponse(brasilapi_payload, 200)
+
+    monkeypatch.setattr(receita.settings, "cnpj_hedge_delay_seconds", 0.05)
+    monkeypatch.setattr(receita.httpx, "AsyncClient", lambda *args, **kwargs: _SlowPrimaryClient([]))
+
+    data = receita.fetch_cnpj("12345678000195", use_mock=False)
+    assert data["source"] == "brasilapi"
+    assert cancelled == ["https://publica.cnpj.ws/cnpj/12345678000195"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_cnpj_async_from_running_loop(monkeypatch):
+    fake_payload = {
+        "razao_social": "Empresa X",
+        "estabelecimento": {"situacao_cadastral": "ATIVA", "data_inicio_atividade": "2020-01-01"},
+    }
+    monkeypatch.setattr(
+        receita.httpx,
+        "AsyncClient",
+        lambda *args, **kwargs: _FakeClient([_FakeResponse(fake_payload, 200)]),
+    )
+
+    data = await receita.fetch_cnpj_async("12345678000195", use_mock=False)
+    assert data["source"] == "publica.cnpj.ws"
+
+
+def test_fetch_cnpj_many_dedupes_and_keeps_order(monkeypatch):
+    fake_payload = {
+        "razao_social": "Empresa X",
+        "estabelecimento": {"situacao_cadastral": "ATIVA", "data_inicio_atividade": "2020-01-01"},
+    }
+    urls = []
+
+    class _CountingClient(_FakeClient):
+        async def get(self, url: str, timeout=None):
+            urls.append(url)
+            return _FakeResponse(fake_payload, 200)
+
+    monkeypatch.setattr(receita.httpx, "AsyncClient", lambda *args, **kwargs: _CountingClient([]))
+
+    results = receita.fetch_cnpj_many(
+        ["12.345.678/0001-95", "123", "98765432000198", "12345678000195"],
+        use_mock=False,
+    )
+    assert [item["ok"] for item in results] == [True, False, True, True]
+    assert results[0]["cnpj"] == results[3]["cnpj"] == "12345678000195"
+    assert results[1]["error"]
+    assert results[2]["data"]["cnpj"] == "98765432000198"
+    assert len(urls) == 2
+
+
+def test_fetch_many_marks_misses_past_deadline(monkeypatch):
+    urls = []
+
+    class _CountingClient(_FakeClient):
+        async def get(self, url: str, timeout=None):
+            urls.append(url)
+            return _FakeResponse({}, 200)
+
+    monkeypatch.setattr(receita.settings, "allow_mock_on_error", True)
+    monkeypatch.setattr(receita.httpx, "AsyncClient", lambda *args, **kwargs: _CountingClient([]))
+
+    results = receita.fetch_cnpj_many(["12345678000195", "98765432000198"], use_mock=False, deadline=time.monotonic())
+    assert [item["ok"] for item in results] == [False, False]
+    assert all(item["timed_out"] for item in results)
+    assert urls == []
+
+
+def test_local_cache_evicts_least_recently_used():
+    local = cache.LocalCache(maxsize=2)
+    for key in ("a", "b"):
+        local.set(key, cache.CacheEntry({"cnpj": key}, fresh_until=100, expires_at=200))
+    assert local.get("a", now=0) is not None
+    local.set("c", cache.CacheEntry({"cnpj": "c"}, fresh_until=100, expires_at=200))
+    assert local.get("b", now=0) is None
+    assert local.get("a", now=0) is not None
+    assert local.get("a", now=200) is None
+
+
+def test_fetch_cnpj_serves_stale_and_refreshes(monkeypatch):
+    fresh_payload = {
+        "razao_social": "Empresa Nova",
+        "estabelecimento": {"situacao_cadastral": "BAIXADA", "data_inicio_atividade": "2020-01-01"},
+    }
+    monkeypatch.setattr(
+        receita.httpx,
+        "AsyncClient",
+        lambda *args, **kwargs: _FakeClient([_FakeResponse(fresh_payload, 200)]),
+    )
+    stale = {"cnpj": "12345678000195", "situacao": "ATIVA", "source": "publica.cnpj.ws"}
+    now = time.time()
+    cache._local.set("12345678000195", cache.CacheEntry(stale, fresh_until=now - 1, expires_at=now + 60))
+
+    data = receita.fetch_cnpj("12345678000195", use_mock=False)
+    assert data["situacao"] == "ATIVA"
+
+    deadline = time.time() + 2
+    while receita._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+    data = receita.fetch_cnpj("12345678000195", use_mock=False)
+    assert data["situacao"] == "BAIXADA"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_fetch(monkeypatch):
+    fake_payload = {
+        "razao_social": "Empresa X",
+        "estabelecimento": {"situacao_cadastral": "ATIVA", "data_inicio_atividade": "2020-01-01"},
+    }
+    urls = []
+
+    class _SlowClient(_FakeClient):
+        async def get(self, url: str, timeout=None):
+            urls.append(url)
+            await asyncio.sleep(0.05)
+            return _FakeResponse(fake_payload, 200)
+
+    monkeypatch.setattr(receita.httpx, "AsyncClient", lambda *args, **kwargs: _SlowClient([]))
+
+    results = await asyncio.gather(
+        *(receita.fetch_cnpj_async("12345678000195", use_mock=False) for _ in range(5))
+    )
+    assert all(item["razao_social"] == "Empresa X" for item in results)
+    assert len(urls) == 1
+
+
+@pytest.mark.asyncio
+async def test_router_opens_breaker_and_skips_provider(monkeypatch):
+    monkeypatch.setattr(routing.settings, "cnpj_breaker_consecutive_failures", 2)
+    router = routing.ProviderRouter()
+    for _ in range(2):
+        await router.record(None, "publica.cnpj.ws", ok=False, latency=1.0)
+    assert await router.state(None, "publica.cnpj.ws") == routing.OPEN
+
+    ordered = await router.order(None, receita.PROVIDERS)
+    assert [provider.name for provider in ordered] == ["brasilapi", "receitaws"]
+
+
+@pytest.mark.asyncio
+async def test_router_half_open_probe_closes_on_success(monkeypatch):
+    monkeypatch.setattr(routing.settings, "cnpj_breaker_consecutive_failures", 1)
+    monkeypatch.setattr(routing.settings, "cnpj_breaker_cooldown_seconds", 0.01)
+    router = routing.ProviderRouter()
+    await router.record(None, "brasilapi", ok=False, latency=1.0)
+    await asyncio.sleep(0.02)
+    assert await router.state(None, "brasilapi") == routing.HALF_OPEN
+
+    first = [provider.name for provider in await router.order(None, receita.PROVIDERS)]
+    second = [provider.name for provider in await router.order(None, receita.PROVIDERS)]
+    assert first[-1] == "brasilapi"
+    assert "brasilapi" not in second  # only one probe at a time
+
+    await router.record(None, "brasilapi", ok=True, latency=0.1)
+    assert await router.state(None, "brasilapi") == routing.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_router_prefers_faster_provider(monkeypatch):
+    monkeypatch.setattr(routing.settings, "cnpj_router_min_samples", 2)
+    router = routing.ProviderRouter()
+    for _ in range(2):
+        await router.record(None, "publica.cnpj.ws", ok=True, latency=3.0)
+        await router.record(None, "brasilapi", ok=True, latency=0.2)
+    ordered = [provider.name for provider in await router.order(None, receita.PROVIDERS)]
+    assert ordered == ["brasilapi", "publica.cnpj.ws", "receitaws"]
+
+
+def test_rate_limited_provider_is_skipped(monkeypatch):
+    brasilapi_payload = {
+        "razao_social": "Fallback SA",
+        "descricao_situacao_cadastral": "ATIVA",
+        "data_inicio_atividade": "2019-05-01",
+    }
+    urls = []
+
+    class _RecordingClient(_FakeClient):
+        async def get(self, url: str, timeout=None):
+            urls.append(url)
+            if "publica.cnpj.ws" in url:
+                return _FakeResponse({"razao_social": "Primary", "estabelecimento": {}}, 200)
+            return _FakeResponse(brasilapi_payload, 200)
+
+    monkeypatch.setattr(ratelimit, "_local_buckets", {})
+    monkeypatch.setattr(receita.settings, "cnpj_provider_rate_limits", "publica.cnpj.ws:1/60")
+    monkeypatch.setattr(receita.httpx, "AsyncClient", lambda *args, **kwargs: _RecordingClient([]))
+
+    first = receita.fetch_cnpj("12345678000195", use_mock=False)
+    second = receita.fetch_cnpj("98765432000198", use_mock=False, token_wait=0)
+    assert first["source"] == "publica.cnpj.ws"
+    assert second["source"] == "brasilapi"
+    assert sum("publica.cnpj.ws" in url for url in urls) == 1
+
+
+def test_all_providers_rate_limited_raises_without_mock(monkeypatch):
+    urls = []
+
+    class _RecordingClient(_FakeClient):
+        async def get(self, url: str, timeout=None):
+            urls.append(url)
+            return _FakeResponse({"razao_social": "Primary", "estabelecimento": {}}, 200)
+
+    providers = [provider.name for provider in receita.PROVIDERS]
+    # Every bucket starts empty
+    monkeypatch.setattr(ratelimit, "_local_buckets", {name: (0.0, time.monotonic()) for name in providers})
+    monkeypatch.setattr(receita.settings, "cnpj_provider_rate_limits", ",".join(f"{name}:1/60" for name in providers))
+    monkeypatch.setattr(receita.settings, "allow_mock_on_error", True)
+    monkeypatch.setattr(receita.httpx, "AsyncClient", lambda *args, **kwargs: _RecordingClient([]))
+
+    with pytest.raises(ratelimit.ProviderRateLimited):
+        receita.fetch_cnpj("12345678000195", use_mock=False, token_wait=0)
+    assert urls == []
+    # Nothing was cached, so once tokens are back the providers are asked again
+    monkeypatch.setattr(ratelimit, "_local_buckets", {})
+    monkeypatch.setattr(receita.settings, "cnpj_provider_rate_limits", "")
+    receita.fetch_cnpj("12345678000195", use_mock=False)
+    assert len(urls) == 1
+
+
+def test_rate_limit_waits_for_token(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_local_buckets", {})
+    monkeypatch.setattr(ratelimit.settings, "cnpj_provider_rate_limits", "brasilapi:1/0.05")
+
+    async def _take_two():
+        await ratelimit.acquire(None, "brasilapi", wait=0)
+        with pytest.raises(ratelimit.ProviderRateLimited):
+            await ratelimit.acquire(None, "brasilapi", wait=0)
+        await ratelimit.acquire(None, "brasilapi", wait=1)
+
+    asyncio.run(_take_two())
+
+
+def test_fetch_cnpj_deadline_fails_fast(monkeypatch):
+    class _HangingClient(_FakeClient):
+        async def get(self, url: str, timeout=None):
+            await asyncio.sleep(5)
+
+    monkeypatch.setattr(receita.settings, "cnpj_min_attempt_seconds", 0.05)
+    monkeypatch.setattr(receita.httpx, "AsyncClient", lambda *args, **kwargs: _HangingClient([]))
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        receita.fetch_cnpj("12345678000195", use_mock=False, deadline=deadline_in(0.3))
+    assert time.monotonic() - start < 1.5
+
+
+def test_fetch_cnpj_keeps_waiting_when_no_provider_is_left_to_hedge(monkeypatch):
+    class _HangingClient(_FakeClient):
+        async def get(self, url: str, timeout=None):
+            await asyncio.sleep(5)
+
+    # The wait for the last provider can time out a hair before the deadline does
+    expires = time.monotonic() + 0.5
+    monkeypatch.setattr(receita, "remaining", lambda deadline: 0.05 if time.monotonic() < expires else 0.0)
+    monkeypatch.setattr(receita.settings, "cnpj_hedge_delay_seconds", 0.01)
+    monkeypatch.setattr(receita.settings, "cnpj_min_attempt_seconds", 0.01)
+    monkeypatch.setattr(receita.httpx, "AsyncClient", lambda *args, **kwargs: _HangingClient([]))
+
+    with pytest.raises(DeadlineExceeded):
+        receita.fetch_cnpj("12345678000195", use_mock=False, deadline=deadline_in(10))
+
+
+def test_fetch_cnpj_rejects_bad_check_digits():
+    with pytest.raises(ValueError):
+        receita.fetch_cnpj("12345678000190", use_mock=True)
+    with pytest.raises(ValueError):
+        receita.fetch_cnpj("11111111111111", use_mock=True)
+
+
+def test_unknown_cnpj_is_negative_cached(monkeypatch):
+    urls = []
+
+    class _NotFoundClient(_FakeClient):
+        async def get(self, url: str, timeout=None):
+            urls.append(url)
+            if "receitaws" in url:
+                return _FakeResponse({"status": "ERROR", "message": "CNPJ inválido"}, 200)
+            return _FakeResponse({}, status_code=404)
+
+    monkeypatch.setattr(receita.settings, "allow_mock_on_error", True)
+    monkeypatch.setattr(receita.httpx, "AsyncClient", lambda *args, **kwargs: _NotFoundClient([]))
+
+    with pytest.raises(receita.CnpjNotFound):
+        receita.fetch_cnpj("12345678000195", use_mock=False)
+    fetched = len(urls)
+    assert fetched >= 1
+
+    with pytest.raises(receita.CnpjNotFound):
+        receita.fetch_cnpj("12345678000195", use_mock=False)
+    results = receita.fetch_cnpj_many(["12345678000195"], use_mock=False)
+    assert results[0]["ok"] is False and results[0]["not_found"] is True
+    assert len(urls) == fetched
+
+
+def test_codec_round_trip_and_legacy_entries(monkeypatch):
+    monkeypatch.setattr(codec.settings, "cnpj_cache_compress_min_bytes", 64)
+    value = {"payload": {"cnpj": "12345678000195", "full_data": {"socios": ["Sócio"] * 50}}, "fresh_until": 1.5}
+
+    small = codec.encode({"payload": None, "fresh_until": 1.0})
+    large = codec.encode(value, compression="zlib")
+    assert small[:3] == bytes((codec.FORMAT_VERSION, codec.CODECS["json"], codec.COMPRESSIONS["none"]))
+    assert large[2] == codec.COMPRESSIONS["zlib"]
+    assert codec.decode(large) == value
+    # Values written before the codec existed are bare JSON
+    assert codec.decode(b'{"cnpj": "12345678000195"}') == {"cnpj": "12345678000195"}
+    with pytest.raises(ValueError):
+        codec.decode(b"\x09\x01\x00{}")
+    # A truncated or corrupted compressed body is a decode error too, not a zlib/zstd one
+    for compression in ("zlib", "zstd"):
+        with pytest.raises(ValueError):
+            codec.decode(bytes((codec.FORMAT_VERSION, codec.CODECS["json"], codec.COMPRESSIONS[compression])) + b"junk")
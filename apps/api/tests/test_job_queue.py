@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.services import job_queue
+from app.services.job_events import stream_events
+from app.services.job_queue import RetryableJobError
+from app.worker import Worker, class_schedule
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    prefix = f"test:jobs:{uuid4().hex[:8]}"
+    monkeypatch.setattr(job_queue, "PREFIX", prefix)
+    redis_client = job_queue._get_redis()
+    yield redis_client
+    keys = list(redis_client.scan_iter(f"{prefix}*"))
+    if keys:
+        redis_client.delete(*keys)
+
+
+def _fake_run(outcomes: list):
+    def _run(job: dict) -> dict:
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        job_queue._set_job_state(job, "done", payload={"summary": outcome})
+        return outcome
+
+    return _run
+
+
+def _stream(tenant_id: int, priority: str = "interactive") -> str:
+    return f"{job_queue.PREFIX}:{priority}:tenant:{tenant_id}"
+
+
+def test_worker_runs_and_acks_job(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "run_check_job", _fake_run([{"status": "ATIVA"}]))
+    job_id = job_queue.enqueue_check_job(1, 2, "12345678000195")
+    assert job_queue.get_job_state(job_id) == {"status": "queued"}
+
+    worker = Worker(queue, "test", 1)
+    assert worker.consume_once("test:0") == 1
+    assert worker.consume_once("test:0") == 0
+    assert job_queue.get_job_state(job_id)["status"] == "done"
+    assert queue.xlen(_stream(1)) == 0
+    assert queue.xpending(_stream(1), job_queue.GROUP)["pending"] == 0
+
+
+def test_failed_job_retries_then_dead_letters(queue, monkeypatch):
+    monkeypatch.setattr(job_queue.settings, "job_max_attempts", 2)
+    monkeypatch.setattr(job_queue.settings, "job_retry_base_seconds", 0)
+    monkeypatch.setattr(
+        job_queue, "run_check_job", _fake_run([RetryableJobError("provider down"), RetryableJobError("still down")])
+    )
+    job_id = job_queue.enqueue_check_job(1, 2, "12345678000195")
+    worker = Worker(queue, "test", 1)
+
+    worker.consume_once("test:0")
+    assert job_queue.get_job_state(job_id)["status"] == "retrying"
+    assert job_queue.promote_due(queue) == 1
+
+    worker.consume_once("test:0")
+    state = job_queue.get_job_state(job_id)
+    assert state == {"status": "error", "error": "still down"}
+    dead = queue.xrange(job_queue.dead_key())
+    assert len(dead) == 1 and dead[0][1]["attempt"] == "2"
+
+
+def test_reclaims_messages_from_dead_consumer(queue, monkeypatch):
+    monkeypatch.setattr(job_queue.settings, "job_claim_idle_seconds", 0)
+    job_id = job_queue.enqueue_check_job(1, 2, "12345678000195")
+    # A consumer takes the job and dies before acking
+    assert job_queue.pick(queue, "crashed", "interactive") is not None
+
+    assert Worker(queue, "test", 1).reclaim_once() == 1
+    assert job_queue.get_job_state(job_id)["status"] == "retrying"
+    assert queue.zcard(job_queue.delayed_key()) == 1
+    assert queue.xpending(_stream(1), job_queue.GROUP)["pending"] == 0
+
+
+def test_bulk_backlog_does_not_starve_other_tenants(queue, monkeypatch):
+    served: list[tuple[str, str]] = []
+    monkeypatch.setattr(
+        job_queue, "run_check_job", lambda job: served.append((job["priority"], job["tenant_id"]))
+    )
+    monkeypatch.setattr(job_queue.settings, "job_priority_weights", "interactive:4,bulk:1")
+    job_queue.enqueue_check_jobs(1, [(target_id, "12345678000195") for target_id in range(20)])
+    job_queue.enqueue_check_jobs(2, [(100, "98765432000198"), (101, "98765432000198")])
+    job_queue.enqueue_check_job(3, 200, "45997418000153")
+
+    worker = Worker(queue, "test", 1)
+    for turn in range(5):
+        worker.consume_once("test:0", turn)
+
+    # The interactive check goes first; bulk work alternates between tenants despite tenant 1's backlog
+    assert served == [("interactive", "3"), ("bulk", "1"), ("bulk", "2"), ("bulk", "1"), ("bulk", "2")]
+
+
+def test_tenant_weight_and_class_schedule(queue, monkeypatch):
+    served: list[str] = []
+    monkeypatch.setattr(job_queue, "run_check_job", lambda job: served.append(job["tenant_id"]))
+    monkeypatch.setattr(job_queue.settings, "job_tenant_weights", "1:2")
+    worker = Worker(queue, "test", 1)
+    worker.sync_weights()
+    for tenant_id in (1, 2):
+        job_queue.enqueue_check_jobs(tenant_id, [(target_id, "12345678000195") for target_id in range(4)])
+    for _ in range(6):
+        worker.consume_once("test:0")
+
+    assert served == ["1", "1", "2", "1", "1", "2"]
+    assert class_schedule({"interactive": 4, "bulk": 1}).count("bulk") == 1
+
+
+def _collect(tenant_id: int, last_event_id: str | None, count: int) -> list[tuple[str, str, dict]]:
+    async def _run() -> list[tuple[str, str, dict]]:
+        events: list[tuple[str, str, dict]] = []
+        stream = stream_events(tenant_id, last_event_id, lambda: asyncio.sleep(0, result=len(events) >= count))
+        async for chunk in stream:
+            if chunk.startswith("id:"):
+                lines = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+                events.append((lines["id"], lines["event"], json.loads(lines["data"])))
+        return events
+
+    return asyncio.run(_run())
+
+
+def test_event_stream_reports_batch_progress_and_resumes(queue, monkeypatch):
+    monkeypatch.setattr(job_queue.settings, "job_events_heartbeat_seconds", 0.1)
+    monkeypatch.setattr(job_queue, "run_check_job", _fake_run([{"status": "ATIVA"}, {"status": "ATIVA"}]))
+    batch_id, job_ids = job_queue.enqueue_check_jobs(7, [(1, "12345678000195"), (2, "98765432000198")])
+    worker = Worker(queue, "test", 1)
+    worker.consume_once("test:0")
+    worker.consume_once("test:0")
+
+    events = _collect(7, "0-0", 5)
+    assert [(kind, data.get("job_id")) for _, kind, data in events] == [
+        ("batch", None),
+        ("job", job_ids[0]),
+        ("batch", None),
+        ("job", job_ids[1]),
+        ("batch", None),
+    ]
+    assert events[-1][2] == {"type": "batch", "batch_id": batch_id, "total": 2, "done": 2, "failed": 0}
+
+    # Reconnecting with Last-Event-ID replays only what came after it
+    resumed = _collect(7, events[2][0], 2)
+    assert [event_id for event_id, _, _ in resumed] == [events[3][0], events[4][0]]
+
+
+def test_enqueue_deduplicates_in_flight_and_recent_checks(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "run_check_job", _fake_run([{"status": "ATIVA"}, {"status": "ATIVA"}]))
+    job_id = job_queue.enqueue_check_job(1, 2, "12345678000195")
+    assert job_queue.enqueue_check_job(1, 2, "12345678000195") == job_id
+    _, batch_jobs = job_queue.enqueue_check_jobs(1, [(2, "12345678000195"), (3, "98765432000198")])
+    assert batch_jobs[0] == job_id and batch_jobs[1] != job_id
+    assert queue.xlen(_stream(1)) == 1
+
+    worker = Worker(queue, "test", 1)
+    worker.consume_once("test:0")
+    # Finished inside the reuse window: the result is served again
+    assert job_queue.enqueue_check_job(1, 2, "12345678000195") == job_id
+
+    monkeypatch.setattr(job_queue.settings, "job_result_reuse_seconds", 0)
+    queue.delete(job_queue.recent_key(1, 2))
+    fresh = job_queue.enqueue_check_job(1, 2, "12345678000195", idempotency_key="click-1")
+    assert fresh != job_id
+    worker.consume_once("test:0", 1)
+    assert job_queue.get_job_state(fresh)["status"] == "done"
+    # Same Idempotency-Key: same job, even though it finished and nothing is reused any more
+    assert job_queue.enqueue_check_job(1, 2, "12345678000195", idempotency_key="click-1") == fresh
+    assert job_queue.enqueue_check_job(1, 2, "12345678000195", idempotency_key="click-2") != fresh
+    # The key belongs to the target it was sent for
+    assert job_queue.enqueue_check_job(1, 3, "98765432000198", idempotency_key="click-1") != fresh
+
+
+def test_claim_rereads_pointers_that_moved(queue, monkeypatch):
+    job = job_queue._new_job(1, 2, "12345678000195", "interactive")
+    rival = job_queue._new_job(1, 2, "12345678000195", "interactive")
+    pipelines = []
+    pipeline = queue.pipeline
+
+    def _racing_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        pipelines.append(pipe)
+        if len(pipelines) == 1:
+            execute = pipe.execute
+
+            def _execute():
+                values = execute()
+                # Another enqueue claims the target between the pointer read and the script
+                assert job_queue._claim_many(queue, [rival], [None]) == [None]
+                return values
+
+            pipe.execute = _execute
+        return pipe
+
+    monkeypatch.setattr(queue, "pipeline", _racing_pipeline)
+    assert job_queue._claim_many(queue, [job], ["click-1"]) == [rival["job_id"]]
+    assert queue.get(job_queue.idempotency_key(1, "click-1")) == rival["job_id"]
+    assert queue.get(job_queue.job_key(job["job_id"])) is None
+
+
+def test_failed_push_releases_claims(queue, monkeypatch):
+    def _push_fails(redis_client, jobs):
+        raise job_queue.RedisError("connection lost")
+
+    monkeypatch.setattr(job_queue, "_push_many", _push_fails)
+    with pytest.raises(job_queue.RedisError):
+        job_queue.enqueue_check_jobs(1, [(2, "12345678000195"), (3, "98765432000198")], idempotency_key="bulk-1")
+    for target_id in (2, 3):
+        assert queue.get(job_queue.inflight_key(1, target_id)) is None
+        assert queue.get(job_queue.idempotency_key(1, f"bulk-1:{target_id}")) is None
+
+    # The in-process fallback is not run here, so only the released claims are checked
+    monkeypatch.setattr(job_queue, "_get_executor", lambda: SimpleNamespace(submit=lambda task: None))
+    job_queue.enqueue_check_job(1, 2, "12345678000195", idempotency_key="click-1")
+    assert queue.get(job_queue.inflight_key(1, 2)) is None
+    assert queue.get(job_queue.idempotency_key(1, "click-1:2")) is None
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.domain.models import Monitor
+from app.services import job_queue
+from app.services.monitor_service import enqueue_due
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    prefix = f"test:jobs:{uuid4().hex[:8]}"
+    monkeypatch.setattr(job_queue, "PREFIX", prefix)
+    redis_client = job_queue._get_redis()
+    yield redis_client
+    keys = list(redis_client.scan_iter(f"{prefix}*"))
+    if keys:
+        redis_client.delete(*keys)
+
+
+def _target(client: TestClient, email: str) -> tuple[dict, int]:
+    reg = client.post("/auth/register", json={"email": email, "password": "Pass1234!", "tenant_name": email})
+    headers = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+    resp = client.post("/targets", json={"document": "12345678000195"}, headers=headers)
+    return headers, resp.json()["id"]
+
+
+def test_monitor_crud_and_tenant_pause(client: TestClient):
+    headers, target_id = _target(client, "monitor@example.com")
+
+    assert client.put(f"/targets/{target_id}/monitor", json={"interval_seconds": 60}, headers=headers).status_code == 422
+    resp = client.put(f"/targets/{target_id}/monitor", json={"interval_seconds": 7200}, headers=headers)
+    assert resp.status_code == 200
+    monitor = resp.json()
+    assert monitor["interval_seconds"] == 7200 and not monitor["paused"]
+    assert client.put("/targets/999999/monitor", json={}, headers=headers).status_code == 404
+
+    resp = client.post("/monitors:pause", headers=headers)
+    assert resp.json()["updated"] == 1
+    assert client.get(f"/targets/{target_id}/monitor", headers=headers).json()["paused"]
+    assert client.post("/monitors:resume", headers=headers).json()["updated"] == 1
+    assert len(client.get("/monitors", headers=headers).json()) == 1
+
+    assert client.delete(f"/targets/{target_id}/monitor", headers=headers).status_code == 204
+    assert client.get(f"/targets/{target_id}/monitor", headers=headers).status_code == 404
+
+
+def test_scheduler_enqueues_due_monitors_and_reschedules(client: TestClient, db_session: Session, queue):
+    headers, target_id = _target(client, "scheduler@example.com")
+    client.put(f"/targets/{target_id}/monitor", json={"interval_seconds": 3600}, headers=headers)
+    monitor = db_session.query(Monitor).one()
+    now = datetime.now(timezone.utc)
+    monitor.next_run_at = now - timedelta(seconds=1)
+    db_session.commit()
+
+    assert enqueue_due(db_session) == 1
+    assert enqueue_due(db_session) == 0  # rescheduled, nothing due any more
+
+    db_session.refresh(monitor)
+    assert monitor.last_enqueued_at is not None
+    assert now + timedelta(seconds=3600 * 0.85) < monitor.next_run_at < now + timedelta(seconds=3600 * 1.15)
+    stream = f"{job_queue.PREFIX}:bulk:tenant:{monitor.tenant_id}"
+    (_, job), = queue.xrange(stream)
+    assert job["target_id"] == str(target_id) and job["document"] == "12345678000195"
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.connectors import cache, offline, receita
+from app.db.session import engine
+from app.domain.models import CnpjRegistryEntry
+from app.services.registry_import import discover, import_dump
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "cnpj_dump"
+
+
+@pytest.fixture
+def registry(db_session: Session) -> Session:
+    CnpjRegistryEntry.__table__.create(bind=engine, checkfirst=True)
+    return db_session
+
+
+def _zipped_dump(tmp_path: Path) -> Path:
+    # Same layout as the published archives: one CSV per zip
+    for source in FIXTURE_DIR.iterdir():
+        name = "Empresas0.zip" if "EMPRE" in source.name else "Estabelecimentos0.zip"
+        with zipfile.ZipFile(tmp_path / name, "w") as archive:
+            archive.write(source, source.name)
+    return tmp_path
+
+
+def test_discover_classifies_files(tmp_path):
+    kinds = sorted(dump.kind for dump in discover([_zipped_dump(tmp_path)]))
+    assert kinds == ["empresas", "estabelecimentos"]
+
+
+def test_import_dump_loads_and_refreshes_incrementally(registry: Session, tmp_path):
+    stats = import_dump(engine, [_zipped_dump(tmp_path)], release="2026-08")
+    assert (stats.empresas_rows, stats.estabelecimentos_rows, stats.upserted) == (3, 3, 3)
+
+    entry = registry.get(CnpjRegistryEntry, "12345678000195")
+    assert entry.razao_social == "EMPRESA TESTE COMERCIO E SERVIÇOS LTDA"
+    assert entry.situacao == "ATIVA"
+    assert entry.abertura.isoformat() == "2012-05-14"
+    assert str(entry.capital_social) == "150000.00"
+    assert registry.get(CnpjRegistryEntry, "45997418000153").situacao == "BAIXADA"
+
+    # Same data under a new release: nothing changed, nothing rewritten
+    stats = import_dump(engine, [FIXTURE_DIR], release="2026-09")
+    assert stats.upserted == 0
+    registry.expire_all()
+    assert registry.get(CnpjRegistryEntry, "12345678000195").release == "2026-08"
+
+
+def test_offline_provider_answers_without_network(registry: Session, monkeypatch):
+    import_dump(engine, [FIXTURE_DIR], release="2026-09")
+    monkeypatch.setattr(receita, "_get_redis", lambda: None)
+    monkeypatch.setattr(receita.settings, "cnpj_offline_enabled", True)
+    cache.clear_local()
+
+    async def _no_network(*args, **kwargs):
+        raise AssertionError("network provider called")
+
+    monkeypatch.setattr(receita, "_fetch_hedged", _no_network)
+
+    data = receita.fetch_cnpj("98765432000198", use_mock=False)
+    assert data["source"] == offline.NAME
+    assert data["razao_social"] == "ACME INDÚSTRIA S.A."
+    assert data["full_data"]["uf"] == "MG"
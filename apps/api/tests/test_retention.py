@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.partitions import add_months, default_partition, ensure_partitions, list_partitions, month_start, partition_name
+from app.db.session import SessionLocal, engine
+from app.domain.models import AuditLog, Check, PayloadBlob, Target, Tenant, User
+from app.repositories.payload_blobs import put_blobs
+from app.services.retention_service import _delete_orphan_blobs, purge_expired
+
+
+def test_retention_drops_old_months_trims_shorter_policies_and_orphan_blobs(db_session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "retention_default_days", 365)
+    monkeypatch.setattr(settings, "retention_purge_batch_size", 1)
+    now = datetime.now(timezone.utc)
+    ancient, old, recent = now - timedelta(days=400), now - timedelta(days=100), now - timedelta(days=1)
+    # Older than the first monthly partition: lands in the default one
+    prehistoric = now - timedelta(days=800)
+    ensure_partitions(engine, months_ahead=1, start=ancient)
+    blobs = {when: f"{index:064x}" for index, when in enumerate((prehistoric, ancient, old, recent))}
+    db_session.add_all([PayloadBlob(id=blob_id, data=b"{}", size=2) for blob_id in [*blobs.values(), "f" * 64]])
+
+    tenants = [Tenant(name="retention-default"), Tenant(name="retention-short", retention_days=30)]
+    db_session.add_all(tenants)
+    db_session.flush()
+    for tenant in tenants:
+        user = User(tenant_id=tenant.id, email=f"{tenant.name}@example.com", password_hash="x", role="admin")
+        target = Target(tenant_id=tenant.id, type="CNPJ", document="12345678000195")
+        db_session.add_all([user, target])
+        db_session.flush()
+        for when in (prehistoric, ancient, old, recent):
+            db_session.add(
+                Check(
+                    tenant_id=tenant.id,
+                    target_id=target.id,
+                    provider="receita",
+                    status="ok",
+                    raw_payload_json={},
+                    payload_blob_id=blobs[when],
+                    fetched_at=when,
+                )
+            )
+            db_session.add(AuditLog(tenant_id=tenant.id, user_id=user.id, action="check_run", metadata_json={}, created_at=when))
+    db_session.commit()
+
+    stats = purge_expired(db_session, now=now)
+
+    ancient_partition = partition_name("checks", month_start(ancient))
+    assert ancient_partition in stats.partitions_removed
+    assert ancient_partition not in list_partitions(db_session.connection(), "checks")
+    assert stats.rows_deleted == {"checks": 3, "audit_log": 3}
+    for model, column in ((Check, Check.fetched_at), (AuditLog, AuditLog.created_at)):
+        kept = {
+            (tenant_id, when.date())
+            for tenant_id, when in db_session.query(model.tenant_id, column).order_by(column).all()
+        }
+        assert kept == {
+            (tenants[0].id, old.date()),
+            (tenants[0].id, recent.date()),
+            (tenants[1].id, recent.date()),
+        }
+    # Only blobs still referenced by a kept check survive
+    assert stats.blobs_deleted == 3
+    assert {blob_id for (blob_id,) in db_session.query(PayloadBlob.id)} == {blobs[old], blobs[recent]}
+
+
+def test_orphan_sweep_skips_blob_a_check_is_about_to_reference(db_session: Session):
+    tenant = Tenant(name="retention-race")
+    db_session.add(tenant)
+    db_session.flush()
+    target = Target(tenant_id=tenant.id, type="CNPJ", document="12345678000195")
+    db_session.add_all([target, PayloadBlob(id="a" * 64, data=b"{}", size=2)])
+    db_session.commit()
+    target_id = target.id
+
+    writer = SessionLocal()
+    try:
+        # The check transaction finds the blob already stored...
+        put_blobs(writer, [{"id": "a" * 64, "data": b"{}", "size": 2}])
+        # ...the sweep runs before it references it...
+        assert _delete_orphan_blobs(db_session, "", 100) == ("a" * 64, 0)
+        # ...and the reference still commits
+        writer.add(
+            Check(
+                tenant_id=tenant.id,
+                target_id=target_id,
+                provider="receita",
+                status="ok",
+                raw_payload_json={},
+                payload_blob_id="a" * 64,
+            )
+        )
+        writer.commit()
+    finally:
+        writer.close()
+    assert _delete_orphan_blobs(db_session, "", 100) == ("a" * 64, 0)
+
+
+def test_new_partition_adopts_rows_already_in_default(db_session: Session):
+    tenant = Tenant(name="partition-adopt")
+    db_session.add(tenant)
+    db_session.flush()
+    target = Target(tenant_id=tenant.id, type="CNPJ", document="12345678000195")
+    db_session.add(target)
+    db_session.flush()
+    # Beyond every premade month, so the row lands in the default partition
+    month = add_months(month_start(datetime.now(timezone.utc)), 9)
+    when = datetime(month.year, month.month, 15, tzinfo=timezone.utc)
+    check = Check(tenant_id=tenant.id, target_id=target.id, provider="receita", status="ok", raw_payload_json={}, fetched_at=when)
+    db_session.add(check)
+    db_session.commit()
+
+    def _partition_of(check_id: int) -> str:
+        return db_session.execute(text("SELECT tableoid::regclass::text FROM checks WHERE id = :id"), {"id": check_id}).scalar()
+
+    assert _partition_of(check.id) == "checks_default"
+    db_session.commit()  # detaching the default partition waits for every open transaction on checks
+    created = ensure_partitions(engine, months_ahead=9)
+    assert partition_name("checks", month) in created
+    assert _partition_of(check.id) == partition_name("checks", month)
+    assert default_partition(db_session.connection(), "checks") == "checks_default"
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import random
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.utils import cnpj_check_digits, normalize_cnpj
+from app.services import job_queue, target_import
+from app.worker import Worker
+
+
+@pytest.fixture(autouse=True)
+def worker(monkeypatch):
+    # Imports run on the queue worker; each test gets its own streams
+    prefix = f"test:jobs:{uuid4().hex[:8]}"
+    monkeypatch.setattr(job_queue, "PREFIX", prefix)
+    redis_client = job_queue._get_redis()
+    yield Worker(redis_client, "test", 1)
+    keys = list(redis_client.scan_iter(f"{prefix}*"))
+    if keys:
+        redis_client.delete(*keys)
+
+
+def _headers(client: TestClient, tenant: str) -> dict:
+    reg = client.post(
+        "/auth/register",
+        json={"email": f"{tenant}@example.com", "password": "Pass1234!", "tenant_name": tenant},
+    )
+    return {"Authorization": f"Bearer {reg.json()['access_token']}"}
+
+
+def _wait(client: TestClient, worker: Worker, job_id: str, headers: dict) -> dict:
+    for _ in range(200):
+        worker.consume_once("test:0")
+        state = client.get(f"/jobs/{job_id}", headers=headers).json()
+        if state.get("status") in ("done", "error"):
+            return state
+        time.sleep(0.05)
+    raise AssertionError("import did not finish")
+
+
+def test_csv_import_dedupes_and_reports_invalid_lines(client: TestClient, worker: Worker, monkeypatch):
+    monkeypatch.setattr(settings, "target_import_batch_size", 2)
+    headers = _headers(client, "importer")
+    client.post("/targets", json={"document": "12345678000195"}, headers=headers)
+    body = "\n".join(
+        [
+            "document;name_hint;type",
+            "12.345.678/0001-95;ACME;CNPJ",
+            "98765432000198;Beta;",
+            "98.765.432/0001-98;Beta again;",
+            "11111111111111;repeated digits;",
+            "12345678000100;wrong check digits;",
+            "123;short;",
+            "",
+            "45997418000153;Gama;cnpj",
+        ]
+    )
+    resp = client.post(
+        "/targets:import", files={"file": ("targets.csv", body.encode(), "text/csv")}, headers=headers
+    )
+    assert resp.status_code == 202
+    assert resp.json()["rows"] == 7
+
+    state = _wait(client, worker, resp.json()["job_id"], headers)
+    assert state["status"] == "done"
+    progress = state["payload"]
+    assert (progress["created"], progress["skipped"], progress["invalid"]) == (2, 2, 3)
+    assert progress["invalid_lines"] == [5, 6, 7]
+
+    items = client.get("/targets", headers=headers).json()["items"]
+    assert [(item["document"], item["name_hint"], item["type"]) for item in items] == [
+        ("45997418000153", "Gama", "cnpj"),
+        ("98765432000198", "Beta", "CNPJ"),
+        ("12345678000195", None, "CNPJ"),
+    ]
+
+    # Re-running the same file changes nothing
+    again = client.post("/targets:import", files={"file": ("targets.csv", body.encode())}, headers=headers)
+    assert _wait(client, worker, again.json()["job_id"], headers)["payload"]["created"] == 0
+    assert client.post("/targets:import", files={"file": ("empty.csv", b"")}, headers=headers).status_code == 400
+
+
+def test_ndjson_import_check_digits_match_python(client: TestClient, worker: Worker):
+    headers = _headers(client, "ndjson-importer")
+    rng = random.Random(7)
+    lines, expected_invalid = [], []
+    for line_no in range(1, 301):
+        base = f"{rng.randrange(10**12):012d}"
+        document = base + cnpj_check_digits(base)
+        if rng.random() < 0.3:
+            document = document[:-1] + str((int(document[-1]) + rng.randrange(1, 10)) % 10)
+        try:
+            normalize_cnpj(document)
+        except ValueError:
+            expected_invalid.append(line_no)
+        lines.append(json.dumps({"document": document, "name_hint": f"row {line_no}"}))
+    lines.append("{not json")
+    expected_invalid.append(len(lines))
+
+    resp = client.post(
+        "/targets:import", files={"file": ("targets.ndjson", "\n".join(lines).encode())}, headers=headers
+    )
+    progress = _wait(client, worker, resp.json()["job_id"], headers)["payload"]
+    assert progress["invalid"] == len(expected_invalid)
+    assert progress["invalid_lines"] == expected_invalid[:100]  # the sample kept in the job is capped
+    assert progress["created"] == len(lines) - len(expected_invalid)
+
+
+def test_failed_import_is_retried_from_its_last_chunk(client: TestClient, worker: Worker, monkeypatch):
+    monkeypatch.setattr(settings, "target_import_batch_size", 2)
+    monkeypatch.setattr(settings, "job_retry_base_seconds", 0)
+    headers = _headers(client, "retry-importer")
+    bases = [f"{10**11 + index:012d}" for index in range(5)]
+    body = "\n".join(base + cnpj_check_digits(base) for base in bases)
+    merged = []
+    merge_staged = target_import.merge_staged
+
+    def _flaky_merge(*args):
+        merged.append(args[3])
+        if len(merged) == 2:
+            raise RuntimeError("connection lost")
+        return merge_staged(*args)
+
+    monkeypatch.setattr(target_import, "merge_staged", _flaky_merge)
+    resp = client.post("/targets:import", files={"file": ("targets.csv", body.encode())}, headers=headers)
+    job_id = resp.json()["job_id"]
+    worker.consume_once("test:0")
+    assert client.get(f"/jobs/{job_id}", headers=headers).json()["status"] == "retrying"
+
+    job_queue.promote_due(worker.redis)
+    state = _wait(client, worker, job_id, headers)
+    assert state["status"] == "done"
+    # The first chunk was not merged again and its counts carried over
+    assert (state["payload"]["processed"], state["payload"]["created"], state["payload"]["skipped"]) == (5, 5, 0)
+    assert len(client.get("/targets", headers=headers).json()["items"]) == 5
@@ -15,7 +15,7 @@ export default function TargetsPage() {
 
   const targetsQuery = useQuery({
     queryKey: ["targets"],
-    queryFn: api.listTargets,
+    queryFn: () => api.listTargets(),
   });
 
   const createMutation = useMutation({
@@ -97,7 +97,7 @@ export default function TargetsPage() {
         <div className="flex items-center justify-between">
           <h2 className="text-lg font-semibold text-white">Lista de targets</h2>
           <span className="text-xs text-cloud/60">
-            {targetsQuery.data ? `${targetsQuery.data.length} registrados` : ""}
+            {targetsQuery.data ? `${targetsQuery.data.items.length}${targetsQuery.data.next_cursor ? "+" : ""} registrados` : ""}
           </span>
         </div>
         {isLoadingList ? (
@@ -109,9 +109,9 @@ export default function TargetsPage() {
               />
             ))}
           </div>
-        ) : targetsQuery.data && targetsQuery.data.length > 0 ? (
+        ) : targetsQuery.data && targetsQuery.data.items.length > 0 ? (
           <div className="mt-4 space-y-3">
-            {targetsQuery.data.map((target) => (
+            {targetsQuery.data.items.map((target) => (
               <Link
                 key={target.id}
                 to={`/targets/${target.id}`}
@@ -102,15 +102,16 @@ export const api = {
       method: "POST",
       body: JSON.stringify({ email, password, tenant_name: tenantName }),
     }),
-  listTargets: () =>
-    request<
-      Array<{
+  listTargets: (cursor?: string) =>
+    request<{
+      items: Array<{
         id: number;
         document: string;
         name_hint?: string | null;
         created_at?: string;
-      }>
-    >("/targets"),
+      }>;
+      next_cursor: string | null;
+    }>(cursor ? `/targets?cursor=${encodeURIComponent(cursor)}` : "/targets"),
   createTarget: (document: string, nameHint?: string) =>
     request<{
       id: number;
@@ -123,5 +124,5 @@ export const api = {
     }),
   runCheck: (targetId: number) => request(`/targets/${targetId}/check`, { method: "POST" }),
   getLatestReport: (targetId: number) =>
-    request<{ summary_json: Record<string, any> }>(`/targets/${targetId}/report/latest`),
+    request<{ summary_json: Record<string, any> }>(`/targets/${targetId}/report/latest?include_details=true`),
 };